@@ -2,20 +2,19 @@ from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.admin.widgets import AdminDateWidget
 from django.urls import path
-from django.shortcuts import render, redirect
+from django.shortcuts import render
 from django import forms
 import random
 import string
 from datetime import date
 from django.utils.crypto import get_random_string
 import csv
-from django.http import HttpResponse
-import os
-from django.conf import settings
-from django.utils.html import format_html
+from django.http import HttpResponse, StreamingHttpResponse
 
-from .models import User, ExamineeAccount, School, Course, DownloadLog
+from .models import User, ExamineeAccount, School, Course, DownloadLog, EXAMINEE_HASHER
+from .search import search_examinees
 from exams.models import TestBattery
+from jjtproject.csvstream import Echo
 
 
 # --- USER ADMIN ---
@@ -49,30 +48,32 @@ class BulkAccountCreationForm(forms.Form):
     school = forms.ModelChoiceField(queryset=School.objects.all(), required=False)
     course = forms.ModelChoiceField(queryset=Course.objects.all(), required=False)
 
+# Passwords are stored hashed; plaintext is only in the CSV returned at creation time.
+ACCOUNT_CSV_HEADER = ['Username', 'Test Battery', 'School', 'Course', 'Expiration From', 'Expiration To', 'Created At']
+ACCOUNT_CSV_FIELDS = (
+    'username', 'test_battery__name', 'school', 'course',
+    'expiration_from', 'expiration_to', 'created_at',
+)
+
+
 # Place this function above or below the ExamineeAccountAdmin class
 @admin.action(description="Download selected examinee accounts as CSV")
 def download_selected_as_csv(modeladmin, request, queryset):
-    from django.http import HttpResponse
-    import csv
-
-    response = HttpResponse(content_type='text/csv')
+    """
+    Stream the selection as CSV. One values_list() query with the battery name
+    joined in SQL, read in chunks, so large selections stay in constant memory.
+    (school/course are plain text columns on ExamineeAccount.)
+    """
+    rows = queryset.order_by('pk').values_list(*ACCOUNT_CSV_FIELDS).iterator(chunk_size=2000)
+    writer = csv.writer(Echo())
+
+    def stream():
+        yield writer.writerow(ACCOUNT_CSV_HEADER)
+        for row in rows:
+            yield writer.writerow(['' if v is None else v for v in row])
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="selected_accounts.csv"'
-    writer = csv.writer(response)
-
-    writer.writerow(['Username', 'password','Test Battery', 'School', 'Course', 'Expiration From', 'Expiration To', 'Created At'])
-
-    for account in queryset:
-        writer.writerow([
-            account.username,
-            account.password,
-            account.test_battery.name if account.test_battery else '',
-            account.school.name if account.school else '',
-            account.course.name if account.course else '',
-            account.expiration_from,
-            account.expiration_to,
-            account.created_at,
-        ])
-
     return response
 
 # --- EXAMINEE ACCOUNT ADMIN ---
@@ -82,6 +83,10 @@ class ExamineeAccountAdmin(admin.ModelAdmin):
     list_display = ['username', 'test_battery', 'school', 'course', 'expiration_from', 'expiration_to', 'created_at']
     search_fields = ['first_name', 'middle_name', 'last_name', 'username', 'email']
     readonly_fields = ('created_at',) 
+
+    def get_search_results(self, request, queryset, search_term):
+        # Same fields as search_fields, answered from the search index (accounts/search.py)
+        return search_examinees(queryset, search_term), False
     
     
     def get_urls(self):
@@ -97,21 +102,23 @@ class ExamineeAccountAdmin(admin.ModelAdmin):
             form = AccountCreationForm(request.POST)
             if form.is_valid():
                 accounts = []
+                passwords = []
                 for _ in range(form.cleaned_data['number_of_accounts']):
                     username = ''.join(random.choices(string.ascii_lowercase + string.digits, k=10))
                     password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-                    accounts.append(ExamineeAccount(
+                    passwords.append(password)
+                    account = ExamineeAccount(
                         username=username,
-                        password=password,
                         test_battery=form.cleaned_data['test_battery'],
                         school=form.cleaned_data.get('school'),
                         course=form.cleaned_data.get('course'),
                         expiration_from=form.cleaned_data['expiration_from'],
                         expiration_to=form.cleaned_data['expiration_to'],
-                    ))
+                    )
+                    account.set_password(password)
+                    accounts.append(account)
                 ExamineeAccount.objects.bulk_create(accounts)
-                self.message_user(request, f"{len(accounts)} accounts created.", messages.SUCCESS)
-                return redirect("..")
+                return self._export_credentials(request, 'created_accounts.csv', accounts, passwords)
         else:
             form = AccountCreationForm()
 
@@ -137,58 +144,56 @@ class ExamineeAccountAdmin(admin.ModelAdmin):
 
                     account = ExamineeAccount(
                         username=username,
-                        password=password,
                         test_battery=form.cleaned_data['battery'],
                         expiration_from=form.cleaned_data['expiration_from'],
                         expiration_to=form.cleaned_data['expiration_to'],
                         school=form.cleaned_data.get('school'),
                         course=form.cleaned_data.get('course'),
                     )
+                    account.set_password(password)
                     accounts.append(account)
 
                 ExamineeAccount.objects.bulk_create(accounts)
-
-                # Save CSV to media/exports/
-                export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
-                os.makedirs(export_dir, exist_ok=True)
-                filepath = os.path.join(export_dir, 'bulk_accounts.csv')
-
-                with open(filepath, mode='w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['Username', 'Password', 'Test Battery', 'School', 'Course', 'Expiration From', 'Expiration To'])
-                    for i, account in enumerate(accounts):
-                        writer.writerow([
-                            account.username,
-                            passwords[i],
-                            account.test_battery.name if account.test_battery else '',
-                            account.school.name if account.school else '',
-                            account.course.name if account.course else '',
-                            account.expiration_from,
-                            account.expiration_to,
-                        ])
-
-                # Show download link
-                csv_url = os.path.join(settings.MEDIA_URL, 'exports/bulk_accounts.csv')
-                self.message_user(
-                    request,
-                    format_html(
-                        '{} accounts created. <a href="{}" target="_blank">Download CSV</a>',
-                        len(accounts),
-                        csv_url
-                    ),
-                    messages.SUCCESS
-                )
-
-                DownloadLog.objects.create(
-                    filename='bulk_accounts.csv',
-                    downloaded_by=request.user,
-                    number_of_accounts=len(accounts)
-            )
-                return redirect("..")
+                return self._export_credentials(request, 'bulk_accounts.csv', accounts, passwords)
         else:
             form = BulkAccountCreationForm()
 
         return render(request, "admin/accounts/examineeaccount/bulk_create.html", {'form': form})
+
+    def _export_credentials(self, request, filename, accounts, passwords):
+        """
+        The one-time plaintext credentials as the response to the creating POST.
+        Never written to disk: anything under MEDIA_ROOT is publicly served.
+        """
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        writer = csv.writer(response)
+        writer.writerow(['Username', 'Password', 'Test Battery', 'School', 'Course', 'Expiration From', 'Expiration To'])
+        for account, password in zip(accounts, passwords):
+            writer.writerow([
+                account.username,
+                password,
+                account.test_battery.name if account.test_battery else '',
+                account.school or '',
+                account.course or '',
+                account.expiration_from,
+                account.expiration_to,
+            ])
+
+        self.message_user(request, f"{len(accounts)} accounts created.", messages.SUCCESS)
+
+        DownloadLog.objects.create(
+            filename=filename,
+            downloaded_by=request.user,
+            number_of_accounts=len(accounts)
+        )
+        return response
+
+    def save_model(self, request, obj, form, change):
+        # The change form edits the raw column; hash anything typed into it.
+        if 'password' in form.changed_data and not obj.password.startswith(EXAMINEE_HASHER + '$'):
+            obj.set_password(obj.password)
+        super().save_model(request, obj, form, change)
     
 
 
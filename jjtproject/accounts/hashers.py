@@ -0,0 +1,19 @@
+# accounts/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ExamineePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 for ExamineeAccount passwords with its own work factor.
+
+    Examinee credentials are random, short-lived (expiration window) and all
+    get used within the first minute of a session, so the cost is set by
+    EXAMINEE_PASSWORD_ITERATIONS instead of Django's staff-login default.
+    Stored hashes with a different count are upgraded on the next login.
+    """
+    algorithm = "examinee_pbkdf2_sha256"
+
+    @property
+    def iterations(self):
+        return getattr(settings, "EXAMINEE_PASSWORD_ITERATIONS", 100_000)
@@ -0,0 +1,51 @@
+# accounts/identity.py
+"""
+Normalized identity keys for duplicate-examinee checks.
+
+name_key     -> case- and whitespace-folded "first|middle|last"
+phonetic_key -> Soundex of first and last name, for "sounds like" matches
+
+Both are stored on ExamineeAccount and indexed together with birthdate/gender,
+so check_examinee_exists is an index probe instead of a table scan.
+"""
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def fold(value):
+    """Casefold and collapse internal whitespace; None -> ''."""
+    return " ".join((value or "").split()).casefold()
+
+
+def name_key(first_name, middle_name, last_name):
+    return "|".join(fold(v) for v in (first_name, middle_name, last_name))
+
+
+def soundex(value):
+    """Classic 4-character American Soundex ('' for names without letters)."""
+    letters = [c for c in fold(value) if "a" <= c <= "z"]
+    if not letters:
+        return ""
+    head = letters[0]
+    out = [head.upper()]
+    prev = _SOUNDEX_CODES.get(head, "")
+    for c in letters[1:]:
+        code = _SOUNDEX_CODES.get(c, "")
+        if code and code != prev:
+            out.append(code)
+            if len(out) == 4:
+                break
+        if c not in "hw":  # h/w do not separate equal codes
+            prev = code
+    return "".join(out).ljust(4, "0")
+
+
+def phonetic_key(first_name, last_name):
+    return f"{soundex(first_name)}|{soundex(last_name)}"
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from accounts.hashers import ExamineePBKDF2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure examinee password verification throughput at several PBKDF2 "
+        "iteration counts and project the CPU cost of a login storm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, nargs="+",
+            default=[20_000, 60_000, 100_000, 260_000, 1_000_000],
+            help="Iteration counts to compare",
+        )
+        parser.add_argument("--samples", type=int, default=20, help="Verifications per setting")
+        parser.add_argument("--storm", type=int, default=300, help="Logins expected in the window")
+        parser.add_argument("--window", type=int, default=60, help="Storm window in seconds")
+
+    def handle(self, *args, **opts):
+        storm, window = opts["storm"], opts["window"]
+        self.stdout.write(
+            f"{'iterations':>12} {'ms/login':>10} {'logins/s/core':>14} "
+            f"{'storm cpu-s':>12} {'cores needed':>13}"
+        )
+        for iterations in opts["iterations"]:
+            with override_settings(EXAMINEE_PASSWORD_ITERATIONS=iterations):
+                hasher = ExamineePBKDF2PasswordHasher()
+                encoded = hasher.encode("Xk29mQp4", hasher.salt())
+                hasher.verify("Xk29mQp4", encoded)  # warm up
+                start = time.perf_counter()
+                for _ in range(opts["samples"]):
+                    hasher.verify("Xk29mQp4", encoded)
+                per_login = (time.perf_counter() - start) / opts["samples"]
+
+            storm_cpu = per_login * storm
+            self.stdout.write(
+                f"{iterations:>12,} {per_login * 1000:>10.1f} {1 / per_login:>14.1f} "
+                f"{storm_cpu:>12.1f} {storm_cpu / window:>13.2f}"
+            )
+        self.stdout.write(
+            f"\nStorm: {storm} logins in {window}s. The lookup itself is one indexed "
+            "query; hashing dominates the login cost."
+        )
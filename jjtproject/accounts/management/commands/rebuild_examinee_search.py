@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the examinee search index (SQLite FTS5 table + triggers, or the "
+        "PostgreSQL trigram index) and reindex every account. Needed on SQLite after a "
+        "migration rebuilds accounts_examineeaccount."
+    )
+
+    def handle(self, *args, **opts):
+        install_search_index(connection)
+        self.stdout.write(f"Examinee search index rebuilt ({connection.vendor}).")
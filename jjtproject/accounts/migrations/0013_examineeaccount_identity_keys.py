@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:59
+
+from django.db import migrations, models
+
+from accounts.identity import name_key, phonetic_key
+
+
+def backfill_identity_keys(apps, schema_editor):
+    ExamineeAccount = apps.get_model('accounts', 'ExamineeAccount')
+    batch = []
+    qs = ExamineeAccount.objects.only('id', 'first_name', 'middle_name', 'last_name')
+    for acc in qs.iterator(chunk_size=2000):
+        acc.name_key = name_key(acc.first_name, acc.middle_name, acc.last_name)
+        acc.phonetic_key = phonetic_key(acc.first_name, acc.last_name)
+        batch.append(acc)
+        if len(batch) >= 2000:
+            ExamineeAccount.objects.bulk_update(batch, ['name_key', 'phonetic_key'])
+            batch = []
+    if batch:
+        ExamineeAccount.objects.bulk_update(batch, ['name_key', 'phonetic_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_alter_examineeaccount_birthdate'),
+        ('exams', '0016_alter_exam_options_exam_sort_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examineeaccount',
+            name='name_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=160),
+        ),
+        migrations.AddField(
+            model_name='examineeaccount',
+            name='phonetic_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16),
+        ),
+        migrations.RunPython(backfill_identity_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='examineeaccount',
+            index=models.Index(fields=['name_key', 'birthdate', 'gender'], name='accounts_ex_name_ke_23e0b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examineeaccount',
+            index=models.Index(fields=['phonetic_key', 'birthdate'], name='accounts_ex_phoneti_85a4e6_idx'),
+        ),
+    ]
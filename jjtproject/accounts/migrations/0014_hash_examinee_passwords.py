@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:00
+
+from django.contrib.auth.hashers import make_password
+from django.db import migrations, models
+
+
+def hash_plaintext_passwords(apps, schema_editor):
+    ExamineeAccount = apps.get_model('accounts', 'ExamineeAccount')
+    batch = []
+    qs = ExamineeAccount.objects.exclude(password__startswith='examinee_pbkdf2_sha256$').only('id', 'password')
+    for acc in qs.iterator(chunk_size=500):
+        acc.password = make_password(acc.password, hasher='examinee_pbkdf2_sha256')
+        batch.append(acc)
+        if len(batch) >= 500:
+            ExamineeAccount.objects.bulk_update(batch, ['password'])
+            batch = []
+    if batch:
+        ExamineeAccount.objects.bulk_update(batch, ['password'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_examineeaccount_identity_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='examineeaccount',
+            name='password',
+            field=models.CharField(max_length=128),
+        ),
+        migrations.RunPython(hash_plaintext_passwords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from accounts.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from accounts.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_hash_examinee_passwords'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
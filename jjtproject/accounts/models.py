@@ -1,6 +1,8 @@
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from exams.models import TestBattery
+from .identity import name_key, phonetic_key
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -30,9 +32,12 @@ class Course(models.Model):
         return self.name
 
 
+EXAMINEE_HASHER = 'examinee_pbkdf2_sha256'
+
+
 class ExamineeAccount(models.Model):
     username = models.CharField(max_length=100, unique=True)
-    password = models.CharField(max_length=50)
+    password = models.CharField(max_length=128)  # hashed, see set_password()
 
     test_battery = models.ForeignKey(TestBattery, on_delete=models.CASCADE, related_name="accounts")
     expiration_from = models.DateField()
@@ -93,9 +98,42 @@ class ExamineeAccount(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Normalized identity keys (see accounts/identity.py), kept in sync on save
+    name_key = models.CharField(max_length=160, blank=True, default='', editable=False)
+    phonetic_key = models.CharField(max_length=16, blank=True, default='', editable=False)
+
+    IDENTITY_FIELDS = {'first_name', 'middle_name', 'last_name'}
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name_key', 'birthdate', 'gender']),
+            models.Index(fields=['phonetic_key', 'birthdate']),
+        ]
+
     def __str__(self):
         return self.username
 
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password, hasher=EXAMINEE_HASHER)
+
+    def check_password(self, raw_password):
+        """Verify a password, re-hashing it in place if the work factor changed."""
+        def setter(raw):
+            self.set_password(raw)
+            ExamineeAccount.objects.filter(pk=self.pk).update(password=self.password)
+        return check_password(raw_password, self.password, setter, preferred=EXAMINEE_HASHER)
+
+    def refresh_identity_keys(self):
+        self.name_key = name_key(self.first_name, self.middle_name, self.last_name)
+        self.phonetic_key = phonetic_key(self.first_name, self.last_name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_identity_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.IDENTITY_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'name_key', 'phonetic_key'}
+        super().save(*args, **kwargs)
+
 
 class ExamineeConsent(models.Model):
     examinee = models.OneToOneField(ExamineeAccount, on_delete=models.CASCADE)
@@ -0,0 +1,116 @@
+# accounts/search.py
+"""
+Indexed examinee search (names, username, email).
+
+One entry point, `examinee_search_q(term, prefix)`, returns a Q usable on any
+queryset that reaches ExamineeAccount (prefix "examinee__" from attempts).
+The matching runs against a real index instead of a multi-column icontains:
+
+  * SQLite: an FTS5 table kept in sync by triggers on accounts_examineeaccount
+    (so bulk_create and queryset updates are covered too). Each word of the
+    term must match the start of a word in one of the fields: "dela cr"
+    finds "Juan Dela Cruz".
+  * PostgreSQL: a pg_trgm GIN index over the lowercased, concatenated fields.
+    Each word of the term must appear anywhere (LIKE '%word%' on the lowercased text).
+  * Anything else: the old icontains OR, unindexed.
+
+Both index objects are created by migration 0015_examinee_search_index. On
+SQLite a later migration that rebuilds accounts_examineeaccount drops the
+triggers with the old table; run `manage.py rebuild_examinee_search` after it.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABLE = "accounts_examineeaccount"
+FTS_TABLE = "accounts_examineeaccount_fts"
+SEARCH_FIELDS = ("first_name", "middle_name", "last_name", "username", "email")
+
+# The trigram index is built on this exact expression; queries must repeat it verbatim.
+PG_SEARCH_EXPR = "lower(" + " || ' ' || ".join(f"coalesce({f}, '')" for f in SEARCH_FIELDS) + ")"
+
+_FTS_COLUMNS = ", ".join(SEARCH_FIELDS)
+_FTS_NEW = ", ".join(f"new.{f}" for f in SEARCH_FIELDS)
+_FTS_OLD = ", ".join(f"old.{f}" for f in SEARCH_FIELDS)
+
+SQLITE_INDEX_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({_FTS_COLUMNS}, "
+    f"content='{TABLE}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_FTS_COLUMNS} ON {TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW}); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_trgm ON {TABLE} USING gin (({PG_SEARCH_EXPR}) gin_trgm_ops)",
+]
+
+POSTGRES_DROP_SQL = [
+    f"DROP INDEX IF EXISTS {TABLE}_search_trgm",
+]
+
+
+def install_search_index(conn=connection):
+    """Create (or repair) the search index for this database backend."""
+    statements = {"sqlite": SQLITE_INDEX_SQL, "postgresql": POSTGRES_INDEX_SQL}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def drop_search_index(conn=connection):
+    statements = {"sqlite": SQLITE_DROP_SQL, "postgresql": POSTGRES_DROP_SQL}.get(conn.vendor, [])
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(term):
+    return _WORD.findall((term or "").lower())
+
+
+def examinee_search_q(term, prefix=""):
+    """Q matching examinees for a free-text term; `prefix` is the lookup path to ExamineeAccount."""
+    words = _words(term)
+    if not words:
+        return Q()
+
+    vendor = connection.vendor
+    if vendor == "sqlite":
+        match = " ".join(f'"{w}"*' for w in words)  # implicit AND of word prefixes
+        ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        return Q(**{f"{prefix}id__in": ids})
+    if vendor == "postgresql":
+        where = " AND ".join([f"{PG_SEARCH_EXPR} LIKE %s"] * len(words))
+        ids = RawSQL(f"SELECT id FROM {TABLE} WHERE {where}", [f"%{w}%" for w in words])
+        return Q(**{f"{prefix}id__in": ids})
+
+    q = Q()
+    for w in words:
+        any_field = Q()
+        for f in SEARCH_FIELDS:
+            any_field |= Q(**{f"{prefix}{f}__icontains": w})
+        q &= any_field
+    return q
+
+
+def search_examinees(queryset, term, prefix=""):
+    return queryset.filter(examinee_search_q(term, prefix))
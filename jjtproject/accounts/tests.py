@@ -1,3 +1,48 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from exams.models import TestBattery
+
+from .models import DownloadLog, ExamineeAccount
+
+
+class AccountCreationExportTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(admin)
+        self.battery = TestBattery.objects.create(name="Battery")
+
+    def test_credentials_come_back_in_the_response_only(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post(reverse("admin:accounts_examineeaccount_bulk_create"), {
+                "battery": self.battery.pk, "number_of_accounts": 2, "username_prefix": "kid",
+                "expiration_from": "2026-01-01", "expiration_to": "2026-12-31",
+            })
+
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="bulk_accounts.csv"')
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual([r["Username"] for r in rows], ["kid001", "kid002"])
+        for row in rows:
+            self.assertTrue(ExamineeAccount.objects.get(username=row["Username"]).check_password(row["Password"]))
+        self.assertEqual(DownloadLog.objects.get().number_of_accounts, 2)
+        self.assertEqual(os.listdir(self.media_root), [])
+
+    def test_download_selected_streams_csv(self):
+        account = ExamineeAccount.objects.create(
+            username="kid", password="x", test_battery=self.battery,
+            expiration_from="2026-01-01", expiration_to="2026-12-31",
+        )
+        response = self.client.post(reverse("admin:accounts_examineeaccount_changelist"), {
+            "action": "download_selected_as_csv", "_selected_action": [account.pk],
+        })
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][:2], ["kid", "Battery"])
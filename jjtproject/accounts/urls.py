@@ -4,6 +4,7 @@ from . import views
 
 urlpatterns = [
  
+    path('login/examinee/', views.examinee_login, name='examinee_login'),
     path('consent/', views.examinee_consent, name='examinee_consent'),
     path('register/', views.examinee_registration, name='examinee_registration'),
     path('change-password/', views.change_password, name='change_password'),
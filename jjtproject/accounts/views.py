@@ -1,24 +1,37 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.utils.timezone import now
+from django.utils.timezone import localdate, now
 from django.http import JsonResponse
+from django.utils.dateparse import parse_date
 
 from .forms import PasswordChangeForm, ExamineeRegistrationForm, ExamineeAccountUpdateForm
 from .models import ExamineeAccount, ExamineeConsent
+from .identity import name_key, phonetic_key
 from exams.models import Exam
 
 
 def examinee_login(request):
     if request.method == "POST":
         username = request.POST.get("username")
-        password = request.POST.get("password")
-
-        try:
-            examinee = ExamineeAccount.objects.get(username=username, password=password)
+        password = request.POST.get("password") or ""
+
+        # One probe on the unique username index; the validity window is part of
+        # the same WHERE so expired accounts never reach the password check.
+        today = localdate()
+        examinee = (
+            ExamineeAccount.objects
+            .filter(username=username, expiration_from__lte=today, expiration_to__gte=today)
+            .only("id", "password", "test_battery_id")
+            .first()
+        )
+        if examinee is None:
+            # Burn one hash anyway so unknown usernames take as long as bad passwords.
+            ExamineeAccount().set_password(password)
+        elif examinee.check_password(password):
             request.session["examinee_id"] = examinee.id
+            request.session["battery_id"] = examinee.test_battery_id
             return redirect("examinee_consent")
-        except ExamineeAccount.DoesNotExist:
-            messages.error(request, "Invalid username or password.")
+        messages.error(request, "Invalid username or password.")
 
     return render(request, "accounts/examinee_login.html")
 
@@ -83,22 +96,33 @@ def exam_instructions(request):
 
 
 def check_examinee_exists(request):
+    """
+    Duplicate-identity probe for the registration form. Matches on the folded
+    name key + birthdate + gender (one index lookup); with fuzzy=1 it also
+    reports sound-alike names born the same day via the phonetic key.
+    """
     if request.method == "POST":
         first_name = request.POST.get('first_name')
         middle_name = request.POST.get('middle_name')
         last_name = request.POST.get('last_name')
         gender = request.POST.get('gender')
-        birthdate = request.POST.get('birthdate')
+        birthdate = parse_date(request.POST.get('birthdate') or '')
+        if not birthdate:
+            return JsonResponse({'exists': False})
 
         exists = ExamineeAccount.objects.filter(
-            first_name=first_name,
-            middle_name=middle_name,
-            last_name=last_name,
+            name_key=name_key(first_name, middle_name, last_name),
+            birthdate=birthdate,
             gender=gender,
-            birthdate=birthdate
         ).exists()
 
-        return JsonResponse({'exists': exists})
+        data = {'exists': exists}
+        if request.POST.get('fuzzy') == '1':
+            data['similar'] = exists or ExamineeAccount.objects.filter(
+                phonetic_key=phonetic_key(first_name, last_name),
+                birthdate=birthdate,
+            ).exists()
+        return JsonResponse(data)
 
 
 def start_exam(request):
@@ -123,11 +147,11 @@ def change_password(request):
     if request.method == 'POST':
         form = PasswordChangeForm(request.POST)
         if form.is_valid():
-            if examinee.password != form.cleaned_data['current_password']:
+            if not examinee.check_password(form.cleaned_data['current_password']):
                 messages.error(request, "Incorrect current password.")
             else:
-                examinee.password = form.cleaned_data['new_password']
-                examinee.save()
+                examinee.set_password(form.cleaned_data['new_password'])
+                examinee.save(update_fields=['password'])
                 messages.success(request, "Password updated.")
                 return redirect('examinee_consent')
     else:
@@ -0,0 +1,152 @@
+# dashboard/cube.py
+"""
+Pre-aggregated attempt cube behind the Analytics page.
+
+`refresh` recomputes whole (exam, week) blocks of CubeCell rows from
+ExamAttempt with one GROUP BY per run. An incremental run only touches the
+blocks that saw an attempt start or submit since the previous refresh (minus
+a lookback that also catches sweeper expiries, which carry no timestamp).
+`slice_cube` answers the page from CubeCell alone, so requests never scan
+ExamAttempt or Answer.
+
+Re-run with --full after bulk changes that leave no timestamp behind
+(apply_norms rescoring, edits to examinee demographics).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from responses.models import ExamAttempt
+from .models import CubeCell
+
+DIMENSIONS = {
+    "exam": "exam__title",
+    "week": "week",
+    "gender": "gender",
+    "level": "level",
+    "education": "highest_education_level",
+}
+
+MEASURES = ("attempts", "completed", "expired", "duration_sum", "duration_n",
+            "score_sum", "score_n", "percentile_sum", "percentile_n")
+
+DEFAULT_LOOKBACK = timedelta(days=2)
+
+
+def _aggregate(attempts):
+    """GROUP BY exam, week and demographics over an ExamAttempt queryset."""
+    return (
+        attempts
+        .annotate(week=TruncWeek("started_at"))
+        .values("exam_id", "week", "examinee__gender", "examinee__level",
+                "examinee__highest_education_level")
+        .annotate(
+            attempts=Count("id"),
+            completed=Count("id", filter=Q(status="submitted")),
+            expired=Count("id", filter=Q(status="expired")),
+            duration_sum=Sum("duration_seconds", filter=Q(status="submitted")),
+            duration_n=Count("duration_seconds", filter=Q(status="submitted")),
+            score_sum=Sum("raw_score"),
+            score_n=Count("raw_score"),
+            percentile_sum=Sum("scaled_score"),
+            percentile_n=Count("scaled_score"),
+        )
+        .order_by()
+    )
+
+
+def _cell(row):
+    week = row["week"]
+    return CubeCell(
+        exam_id=row["exam_id"],
+        week=week.date() if hasattr(week, "date") else week,
+        gender=row["examinee__gender"] or "",
+        level=row["examinee__level"] or "",
+        highest_education_level=row["examinee__highest_education_level"] or "",
+        **{m: row[m] or 0 for m in MEASURES},
+    )
+
+
+def _week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+def refresh(since=None, full=False, lookback=DEFAULT_LOOKBACK):
+    """Rebuild the cube blocks touched since `since` (default: last refresh). Returns cells written."""
+    if not full and since is None:
+        last = CubeCell.objects.aggregate(Max("refreshed_at"))["refreshed_at__max"]
+        if last is None:
+            full = True
+        else:
+            since = last - lookback
+
+    if full:
+        cells = [_cell(r) for r in _aggregate(ExamAttempt.objects.all())]
+        with transaction.atomic():
+            CubeCell.objects.all().delete()
+            CubeCell.objects.bulk_create(cells, batch_size=1000)
+        return len(cells)
+
+    touched = (
+        ExamAttempt.objects
+        .filter(Q(started_at__gte=since) | Q(submitted_at__gte=since) | Q(deadline__gte=since))
+        .annotate(week=TruncWeek("started_at"))
+        .values_list("exam_id", "week")
+        .distinct()
+        .order_by()
+    )
+    blocks = {}
+    for exam_id, week in touched:
+        week = week.date() if hasattr(week, "date") else week
+        blocks.setdefault(week, set()).add(exam_id)
+
+    written = 0
+    tz = timezone.get_current_timezone()
+    for week, exam_ids in sorted(blocks.items()):
+        start = timezone.make_aware(datetime.combine(week, time.min), tz)
+        attempts = ExamAttempt.objects.filter(
+            exam_id__in=exam_ids, started_at__gte=start, started_at__lt=start + timedelta(days=7)
+        )
+        cells = [_cell(r) for r in _aggregate(attempts)]
+        with transaction.atomic():
+            CubeCell.objects.filter(week=week, exam_id__in=exam_ids).delete()
+            CubeCell.objects.bulk_create(cells)
+        written += len(cells)
+    return written
+
+
+def slice_cube(rows="exam", filters=None):
+    """
+    Roll the cube up to one dimension (`rows`, a DIMENSIONS key) under equality
+    filters on the others ({"gender": "Female", "week_from": date, ...}).
+    Returns dicts with the dimension value, totals and derived rates/means.
+    """
+    filters = filters or {}
+    qs = CubeCell.objects.all()
+    if filters.get("exam"):
+        qs = qs.filter(exam_id=filters["exam"])
+    for key in ("gender", "level", "education"):
+        if filters.get(key):
+            qs = qs.filter(**{DIMENSIONS[key]: filters[key]})
+    if filters.get("week_from"):
+        qs = qs.filter(week__gte=_week_start(filters["week_from"]))
+    if filters.get("week_to"):
+        qs = qs.filter(week__lte=filters["week_to"])
+
+    field = DIMENSIONS[rows]
+    out = []
+    for r in qs.values(field).annotate(**{m: Sum(m) for m in MEASURES}).order_by(field):
+        out.append({
+            "label": r[field] if r[field] not in ("", None) else "(unspecified)",
+            "attempts": r["attempts"],
+            "completed": r["completed"],
+            "expired": r["expired"],
+            "completion_rate": round(100 * r["completed"] / r["attempts"], 1) if r["attempts"] else None,
+            "mean_minutes": round(r["duration_sum"] / r["duration_n"] / 60, 1) if r["duration_n"] else None,
+            "mean_score": round(r["score_sum"] / r["score_n"], 2) if r["score_n"] else None,
+            "mean_percentile": round(r["percentile_sum"] / r["percentile_n"], 1) if r["percentile_n"] else None,
+        })
+    return out
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from dashboard.pdf_reports import cache_dir, prune_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete cached PDF reports not rendered within --days. They are rendered "
+        "again on the next request; run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Keep reports rendered within this many days")
+
+    def handle(self, *args, **opts):
+        removed = prune_cache(timedelta(days=opts["days"]))
+        self.stdout.write(f"{removed} cached report(s) removed from {cache_dir()}.")
@@ -0,0 +1,32 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from dashboard.cube import DEFAULT_LOOKBACK, refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the dashboard analytics cube. By default only the (exam, week) blocks "
+        "with attempts started or submitted since the last refresh are recomputed; "
+        "run every few minutes from cron, and with --full after rescoring or bulk edits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild every cell")
+        parser.add_argument("--since", help="Recompute blocks touched on/after YYYY-MM-DD")
+        parser.add_argument(
+            "--lookback-hours", type=int, default=int(DEFAULT_LOOKBACK.total_seconds() // 3600),
+            help="Overlap with the previous refresh window",
+        )
+
+    def handle(self, *args, **opts):
+        since = None
+        if opts["since"]:
+            since = timezone.make_aware(datetime.combine(parse_date(opts["since"]), time.min))
+        written = refresh(
+            since=since, full=opts["full"], lookback=timedelta(hours=opts["lookback_hours"])
+        )
+        self.stdout.write(f"{written} cube cell(s) written.")
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CubeCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('gender', models.CharField(blank=True, max_length=10)),
+                ('level', models.CharField(blank=True, max_length=50)),
+                ('highest_education_level', models.CharField(blank=True, max_length=50)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('expired', models.PositiveIntegerField(default=0)),
+                ('duration_sum', models.PositiveBigIntegerField(default=0)),
+                ('duration_n', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_n', models.PositiveIntegerField(default=0)),
+                ('percentile_sum', models.FloatField(default=0)),
+                ('percentile_n', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cube_cells', to='exams.exam')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['week'], name='dashboard_c_week_8b6093_idx')],
+                'unique_together': {('exam', 'week', 'gender', 'level', 'highest_education_level')},
+            },
+        ),
+    ]
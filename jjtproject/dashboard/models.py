@@ -1,3 +1,38 @@
 from django.db import models
 
-# Create your models here.
+from exams.models import Exam
+
+
+class CubeCell(models.Model):
+    """
+    One cell of the pre-aggregated attempt cube: exam x gender x level x
+    education x week (Monday of the week the attempt started). Counts and
+    sums are additive, so any slice is a SUM over cells; means are sum / n.
+    Maintained by `manage.py refresh_cube` (see dashboard/cube.py).
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="cube_cells")
+    week = models.DateField()
+    gender = models.CharField(max_length=10, blank=True)
+    level = models.CharField(max_length=50, blank=True)
+    highest_education_level = models.CharField(max_length=50, blank=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    expired = models.PositiveIntegerField(default=0)
+    duration_sum = models.PositiveBigIntegerField(default=0)   # seconds, completed attempts
+    duration_n = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)                   # raw_score
+    score_n = models.PositiveIntegerField(default=0)
+    percentile_sum = models.FloatField(default=0)              # scaled_score
+    percentile_n = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["week"]),
+        ]
+        unique_together = (("exam", "week", "gender", "level", "highest_education_level"),)
+
+    def __str__(self):
+        return f"{self.exam_id} {self.week} {self.gender}/{self.level}/{self.highest_education_level}"
@@ -0,0 +1,230 @@
+# dashboard/pdf_reports.py
+"""
+Per-attempt PDF reports, rendered in bulk.
+
+Every report comes from one template (dashboard/report_pdf.html). For a batch,
+the parent process renders the HTML (that needs the ORM), and a process pool
+turns the HTML into PDF (WeasyPrint, CPU-bound and ORM-free).
+
+Finished PDFs are cached on disk under REPORT_CACHE_DIR. The cache key is the
+attempt plus a scoring version, a digest of everything the report shows. A
+rescore, a profile correction or a bump of REPORT_TEMPLATE_VERSION therefore
+produces a new file instead of serving a stale one. Writing a new version
+deletes the attempt's older ones, and `manage.py prune_report_cache` removes
+reports nobody has regenerated in a while.
+
+`stream_zip` writes the PDFs one by one into a streamed ZIP, so a cohort of
+hundreds of reports never sits in memory at once.
+
+WeasyPrint is optional. Without it `pdf_available()` is False and the
+single-report view falls back to the HTML.
+"""
+import hashlib
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+try:
+    import weasyprint
+except (ImportError, OSError):  # not installed, or its Pango/Cairo libraries are missing
+    weasyprint = None
+
+REPORT_TEMPLATE = "dashboard/report_pdf.html"
+REPORT_TEMPLATE_VERSION = 1          # bump when the template changes
+RENDER_CHUNK = 32                    # reports handed to the pool per round
+STANINE_BANDS = (4, 7, 12, 17, 20, 17, 12, 7, 4)  # % of the norm group per stanine
+
+
+def pdf_available():
+    return weasyprint is not None
+
+
+def cache_dir():
+    return Path(getattr(settings, "REPORT_CACHE_DIR", Path(settings.BASE_DIR) / "report_cache"))
+
+
+def report_workers():
+    return getattr(settings, "REPORT_WORKERS", None) or os.cpu_count() or 1
+
+
+def scoring_version(attempt):
+    """Digest of everything the report shows: attempt, examinee, exam and norm fields."""
+    e = attempt.examinee
+    parts = (
+        REPORT_TEMPLATE_VERSION,
+        attempt.status, attempt.attempt_number, attempt.started_at, attempt.submitted_at,
+        attempt.duration_seconds, getattr(attempt, "answered", None),
+        attempt.raw_score, attempt.scaled_score, attempt.stanine, attempt.norm_table_id,
+        e.username, e.first_name, e.middle_name, e.last_name, e.gender,
+        e.position, e.level, e.highest_education_level,
+        attempt.exam.title, attempt.exam.battery.name if attempt.exam.battery_id else None,
+        str(attempt.norm_table) if attempt.norm_table_id else None,
+    )
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:12]
+
+
+def cache_path(attempt):
+    return cache_dir() / f"attempt-{attempt.id}-{scoring_version(attempt)}.pdf"
+
+
+def report_filename(attempt):
+    e = attempt.examinee
+    name = "_".join(p for p in (e.last_name, e.first_name) if p).replace(" ", "_") or e.username
+    return f"{name}-{attempt.exam.title}-{attempt.id}.pdf".replace("/", "-")
+
+
+def load_attempts(ids):
+    """Attempts with everything the template needs, in the order given."""
+    from responses.models import ExamAttempt
+    from responses.packing import answered_counts
+
+    by_id = (
+        ExamAttempt.objects.filter(id__in=ids)
+        .select_related("examinee", "exam", "exam__battery", "norm_table")
+        .in_bulk()
+    )
+    answered = answered_counts(by_id)
+    for attempt in by_id.values():
+        attempt.answered = answered.get(attempt.id, 0)
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def report_context(attempt):
+    return {
+        "attempt": attempt,
+        "examinee": attempt.examinee,
+        "exam": attempt.exam,
+        "norm": attempt.norm_table,
+        "generated_at": timezone.localtime(),
+        "stanines": [
+            {"n": n, "share": share, "x": 20 + (n - 1) * 40, "y": 130 - share * 6,
+             "height": share * 6, "current": attempt.stanine == n}
+            for n, share in enumerate(STANINE_BANDS, start=1)
+        ],
+        "percentile_width": round(float(attempt.scaled_score or 0) * 3.6, 1),  # of a 360px bar
+    }
+
+
+def render_html(attempt):
+    return render_to_string(REPORT_TEMPLATE, report_context(attempt))
+
+
+def html_to_pdf(html):
+    """Runs in pool workers: plain HTML in, PDF bytes out, no Django state needed."""
+    if weasyprint is None:
+        raise ImproperlyConfigured("WeasyPrint is required for PDF reports (pip install weasyprint).")
+    return weasyprint.HTML(string=html).write_pdf()
+
+
+def _store(path, pdf):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(pdf)
+    os.replace(tmp, path)  # readers never see half a file
+    prefix = path.name.rsplit("-", 1)[0]  # attempt-<id>
+    for old in path.parent.glob(f"{prefix}-*.pdf"):
+        if old != path:
+            old.unlink(missing_ok=True)  # superseded version of the same report
+
+
+def prune_cache(max_age):
+    """Delete cached PDFs (and abandoned .tmp files) not written within `max_age`; returns the count."""
+    root = cache_dir()
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - max_age.total_seconds()
+    removed = 0
+    for path in [*root.glob("attempt-*.pdf"), *root.glob("attempt-*.tmp")]:
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass  # replaced or pruned concurrently
+    return removed
+
+
+def report_pdf_path(attempt):
+    """Cached PDF for one attempt, rendered in-process if missing."""
+    path = cache_path(attempt)
+    if not path.exists():
+        _store(path, html_to_pdf(render_html(attempt)))
+    return path
+
+
+def iter_report_paths(attempts, workers=None):
+    """
+    Yield (attempt, cached PDF path) in order. Cache misses are rendered on a
+    process pool RENDER_CHUNK attempts at a time, so memory holds at most one
+    chunk of PDFs.
+    """
+    pool = None
+
+    def run(batch):
+        nonlocal pool
+        misses = [(a, p) for a, p in batch if not p.exists()]
+        if misses:
+            # spawn, not fork: web servers are threaded, and workers need no Django state
+            pool = pool or ProcessPoolExecutor(
+                max_workers=workers or report_workers(), mp_context=multiprocessing.get_context("spawn")
+            )
+            htmls = [render_html(a) for a, _ in misses]
+            for (_, path), pdf in zip(misses, pool.map(html_to_pdf, htmls)):
+                _store(path, pdf)
+        return batch
+
+    try:
+        batch = []
+        for attempt in attempts:
+            batch.append((attempt, cache_path(attempt)))
+            if len(batch) >= RENDER_CHUNK:
+                yield from run(batch)
+                batch = []
+        if batch:
+            yield from run(batch)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+class _ZipSink:
+    """Write-only buffer for zipfile: collects bytes until the generator drains them."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream_zip(attempts, workers=None, chunk_size=64 * 1024):
+    """Yield a ZIP of one PDF per attempt, piece by piece (PDFs are stored, not recompressed)."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        for attempt, path in iter_report_paths(attempts, workers):
+            info = zipfile.ZipInfo(report_filename(attempt), date_time=timezone.localtime().timetuple()[:6])
+            with zf.open(info, mode="w", force_zip64=True) as dest, open(path, "rb") as src:
+                while block := src.read(chunk_size):
+                    dest.write(block)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    yield sink.drain()  # central directory
@@ -1,3 +1,84 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from accounts.models import ExamineeAccount
+from exams.models import Exam, TestBattery
+from responses.events import LocalBroker
+from responses.models import ExamAttempt
+
+from .pagination import keyset_page
+from .views import live_stream
+
+
+class LiveStreamTests(TestCase):
+    def setUp(self):
+        self.broker = LocalBroker()
+        patcher = mock.patch("responses.events._broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.staff = get_user_model().objects.create_user("proctor", password="x", is_staff=True)
+
+    def stream(self, last_event_id):
+        request = RequestFactory().get("/dashboard/live/stream/", HTTP_LAST_EVENT_ID=last_event_id)
+        request.user = self.staff
+        return iter(live_stream(request).streaming_content)
+
+    def test_id_beyond_the_broker_resets_the_client(self):
+        self.broker.publish("started", {"attempt": 1})
+        chunks = self.stream("500")
+        next(chunks)  # retry:
+        self.assertEqual(next(chunks), b"id: 1\nevent: reset\ndata: {}\n\n")
+        self.broker.publish("submitted", {"attempt": 1})
+        self.assertIn(b"id: 2\nevent: submitted", next(chunks))
+
+    def test_known_id_resumes_without_reset(self):
+        self.broker.publish("started", {"attempt": 1})
+        chunks = self.stream("0")
+        next(chunks)
+        self.assertIn(b"id: 1\nevent: started", next(chunks))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        exam = Exam.objects.create(battery=battery, title="Exam")
+        examinee = ExamineeAccount.objects.create(
+            username="examinee", password="x", test_battery=battery,
+            expiration_from=date(2026, 1, 1), expiration_to=date(2099, 12, 31),
+        )
+        base = timezone.now()
+        # NULL sort keys interleaved with ties, so every branch of the cursor filter is hit
+        for number, minutes in enumerate((None, 3, None, 1, 3, None, 2), start=1):
+            ExamAttempt.objects.create(
+                examinee=examinee, exam=exam, attempt_number=number,
+                submitted_at=None if minutes is None else base + timedelta(minutes=minutes),
+            )
+
+    def expected(self, desc):
+        key = F("submitted_at").desc(nulls_last=True) if desc else F("submitted_at").asc(nulls_first=True)
+        return list(ExamAttempt.objects.order_by(key, "-id" if desc else "id").values_list("id", flat=True))
+
+    def walk(self, desc):
+        keys = [("submitted_at", desc), ("id", desc)]
+        pages, after = [], None
+        while True:
+            page = keyset_page(ExamAttempt.objects.all(), keys, 2, after=after)
+            pages.append(page)
+            if not page.has_next:
+                return keys, pages
+            after = page.next_cursor
+
+    def test_forward_and_back_visit_every_row_once(self):
+        for desc in (False, True):
+            with self.subTest(desc=desc):
+                keys, pages = self.walk(desc)
+                self.assertEqual([a.id for p in pages for a in p], self.expected(desc))
+
+                back = keyset_page(ExamAttempt.objects.all(), keys, 2, before=pages[-1].prev_cursor)
+                self.assertEqual([a.id for a in back], [a.id for a in pages[-2]])
+                self.assertTrue(back.has_previous)
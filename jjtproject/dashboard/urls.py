@@ -6,8 +6,13 @@ urlpatterns = [
     path("", views.dashboard_home, name="dashboard_home"),
     path("reports/", views.reports, name="dashboard_reports"),
     path("reports/export.csv", views.reports_export_csv, name="reports_export_csv"),
+    path("reports/sittings.csv", views.sittings_export_csv, name="sittings_export_csv"),
     path("report/<int:attempt_id>/pdf/", views.report_pdf, name="dashboard_report_pdf"),
+    path("reports/batch.zip", views.batch_report_pdf, name="dashboard_batch_report_pdf"),
     path("attempt/<int:attempt_id>/tests/", views.view_attempt_tests, name="dashboard_attempt_tests"),
+    path("analytics/", views.analytics, name="dashboard_analytics"),
+    path("live/", views.live_monitor, name="dashboard_live_monitor"),
+    path("live/stream/", views.live_stream, name="dashboard_live_stream"),
 ]
 
 
@@ -1,6 +1,10 @@
 # dashboard/views.py
 from __future__ import annotations
 
+import asyncio
+import csv
+import json
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from io import StringIO
@@ -10,12 +14,15 @@ from typing import Any, Iterable, List, Optional, Tuple
 from django.apps import apps
 from django.contrib.auth.decorators import user_passes_test
 from django.core.exceptions import ImproperlyConfigured
-from django.core.paginator import Paginator
-from django.db.models import Count, Min, Q
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Min
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 
+from accounts.search import examinee_search_q
+from .pagination import COUNT_TIMEOUT, cached_count, keyset_page
+
 
 # ---------------------------------------------------------------------------
 # Gate
@@ -32,9 +39,9 @@ admin_only = user_passes_test(_is_admin, login_url="staff_login")
 # ---------------------------------------------------------------------------
 
 def _attempt_model():
-    """Your canonical attempt model (exams.ExamAttempt) if available."""
+    """The canonical attempt model (responses.ExamAttempt) if available."""
     try:
-        return apps.get_model("exams", "ExamAttempt")
+        return apps.get_model("responses", "ExamAttempt")
     except (LookupError, ImproperlyConfigured):
         return None
 
@@ -146,7 +153,7 @@ def _fallback_progress_queryset() -> List[SimpleNamespace]:
                     filt[f] = row[f]
             total_qs = (
                 Answer.objects.filter(**filt)
-                .values("question_id").distinct().count()
+                .values("item_id").distinct().count()
             )
         total_qs = max(total_qs, 1)
 
@@ -178,7 +185,7 @@ def _fallback_progress_queryset() -> List[SimpleNamespace]:
 def dashboard_home(request):
     """
     Minimal dashboard: 4 tiles (today, yesterday, last 7, last 30),
-    counting UNIQUE examinees/users who have attempts in each range.
+    counting UNIQUE examinees who started a battery sitting in each range.
     The "View Details" buttons link to /clientadmin/reports/?quick=...
     """
     AttemptModel = _attempt_model()
@@ -188,40 +195,20 @@ def dashboard_home(request):
     start_last7 = today - timedelta(days=7)
     start_last30 = today - timedelta(days=30)
 
-    def _unique_people(qs):
-        seen = set()
-        for a in qs:
-            if getattr(a, "user_id", None):
-                key = ("u", a.user_id)
-            elif getattr(a, "examinee_id", None):
-                key = ("e", a.examinee_id)
-            elif getattr(a, "person_id", None):
-                key = ("p", a.person_id)
-            else:
-                key = ("anon", a.pk)
-            seen.add(key)
-        return len(seen)
-
     if AttemptModel:
-        base = AttemptModel.objects.all()
-
-        # if the model has a started_at or created_at field, use it
-        date_field = "started_at"
-        for f in ("started_at", "start_time", "created_at", "timestamp", "created"):
-            try:
-                AttemptModel._meta.get_field(f)
-                date_field = f
-                break
-            except Exception:
-                continue
-
-        def f_between(start, end):
-            return base.filter(**{f"{date_field}__gte": start, f"{date_field}__lt": end})
-
-        count_today     = _unique_people(f_between(start_today, today))
-        count_yesterday = _unique_people(f_between(start_yesterday, start_today))
-        count_last7     = _unique_people(f_between(start_last7, today))
-        count_last30    = _unique_people(f_between(start_last30, today))
+        # One row per battery sitting: unique people is a COUNT(DISTINCT) per range
+        Sitting = apps.get_model("responses", "BatterySitting")
+
+        def people_between(start, end):
+            return (
+                Sitting.objects.filter(started_at__gte=start, started_at__lt=end)
+                .values("examinee_id").distinct().count()
+            )
+
+        count_today     = people_between(start_today, today)
+        count_yesterday = people_between(start_yesterday, start_today)
+        count_last7     = people_between(start_last7, today)
+        count_last30    = people_between(start_last30, today)
     else:
         # Fallback (no ExamAttempt): best-effort using the rows builder you already have
         rows = _fallback_progress_queryset()
@@ -262,6 +249,99 @@ def dashboard_home(request):
 # REPORTS
 # ===========================================================================
 
+def _filtered_attempts(AttemptModel, params):
+    """ExamAttempt queryset for the reports filters (shared by the list and the CSV export)."""
+    return _report_filters(AttemptModel.objects.all(), params, completed_status="submitted")
+
+
+def _report_filters(qs, params, completed_status):
+    """Apply the reports filters to attempts or sittings (both have examinee/status/started_at)."""
+    position = params.get("position", "").strip()
+    level = params.get("level", "").strip()
+    gender = params.get("gender", "").strip()
+    progress_state = params.get("progress", "").strip()
+    quick = params.get("quick", "").strip()
+    date_start = params.get("date_start", "").strip()
+    date_end = params.get("date_end", "").strip()
+    search = params.get("search", "").strip()
+    examinee_param = params.get("examinee")
+    user_param = params.get("user")
+
+    if position:
+        qs = qs.filter(examinee__position__iexact=position)
+    if level:
+        qs = qs.filter(examinee__level__iexact=level)
+    if gender:
+        qs = qs.filter(examinee__gender__iexact=gender)
+
+    if progress_state == "completed":
+        qs = qs.filter(status=completed_status)
+    elif progress_state == "in_progress":
+        qs = qs.filter(status="in_progress")
+
+    s, e = _range(quick) if quick else (None, None)
+    if s and e:
+        qs = qs.filter(started_at__gte=s, started_at__lt=e)
+    else:
+        if date_start:
+            qs = qs.filter(started_at__date__gte=date_start)
+        if date_end:
+            qs = qs.filter(started_at__date__lte=date_end)
+
+    # indexed name/username/email search (accounts/search.py)
+    for term in (search, None if (examinee_param and str(examinee_param).isdigit()) else user_param):
+        if term:
+            qs = qs.filter(examinee_search_q(term, prefix="examinee__"))
+    if examinee_param and str(examinee_param).isdigit():
+        qs = qs.filter(examinee_id=int(examinee_param))
+    return qs
+
+
+REPORT_FILTERS = ("position", "level", "gender", "progress", "quick",
+                  "date_start", "date_end", "search", "examinee", "user")
+
+
+def _count_filters(params):
+    """
+    The reports filters as a cache key for cached_count: blank ones dropped and
+    a quick range replaced by its bounds floored to COUNT_TIMEOUT, so
+    quick=today keeps one key for a few minutes rather than one per request.
+    """
+    filters = {k: params.get(k, "").strip() for k in REPORT_FILTERS}
+    filters = {k: v for k, v in filters.items() if v}
+    s, e = _range(filters.pop("quick", ""))
+    if s and e:
+        filters.pop("date_start", None)  # ignored under a quick range (_report_filters)
+        filters.pop("date_end", None)
+        step = COUNT_TIMEOUT
+        filters["range"] = [int(s.timestamp()) // step * step, int(e.timestamp()) // step * step]
+    return filters
+
+
+def _decorate_attempts(attempts):
+    """
+    Attach what the reports template shows (completed_at, demographics,
+    progress %) to one page of attempts: one answer count for the page,
+    question totals from the cached exam catalog.
+    """
+    from exams.catalog import exam_question_count
+    from responses.packing import answered_counts
+
+    answered = answered_counts(a.id for a in attempts)
+    for a in attempts:
+        a.user = None
+        a.completed_at = a.submitted_at
+        a.gender = a.examinee.gender
+        a.position = a.examinee.position
+        a.level = a.examinee.level
+        if a.status == "submitted":
+            a.progress = 100.0
+        else:
+            total = max(exam_question_count(a.exam_id), 1)
+            a.progress = float(min(100, round(answered.get(a.id, 0) * 100 / total)))
+    return attempts
+
+
 @admin_only
 def reports(request):
     """Admin reports with filters, sorting, pagination, and single-user view."""
@@ -280,152 +360,43 @@ def reports(request):
     user_param = request.GET.get("user")
     show_latest = request.GET.get("latest") == "1"
 
-    # Sorting
-    SORT_MAP = {
-        "started_at": "started_at",
-        "completed_at": "completed_at",
-        "fullname": "user__username",
-        "gender": "gender",
-        "position": "position",
-        "level": "level",
-        "progress": "progress",
+    # Sorting: keyset key per column, always ending in id so the order is total
+    SORT_KEYS = {
+        "started_at": ["started_at"],
+        "completed_at": ["submitted_at"],
+        "fullname": ["examinee__last_name", "examinee__first_name"],
+        "gender": ["examinee__gender"],
+        "position": ["examinee__position"],
+        "level": ["examinee__level"],
+        "progress": ["status"],  # in_progress < submitted; live percentages are not stored
     }
     sort = request.GET.get("sort") or "started_at"
+    if sort not in SORT_KEYS:
+        sort = "started_at"
     direction = request.GET.get("dir") or "desc"
-    order_by = f"-{SORT_MAP.get(sort, 'started_at')}" if direction == "desc" else SORT_MAP.get(sort, "started_at")
-
-    if AttemptModel:
-        qs = AttemptModel.objects.all()
-        rel_names = [f.name for f in AttemptModel._meta.fields if getattr(f, "is_relation", False)]
-        if "user" in rel_names or "examinee" in rel_names or "exam" in rel_names:
-            qs = qs.select_related(*(n for n in ("user", "examinee", "exam") if n in rel_names))
-
-        # Filters
-        if position:
-            qs = qs.filter(Q(position__iexact=position) | Q(examinee__position__iexact=position))
-        if level:
-            qs = qs.filter(Q(level__iexact=level) | Q(examinee__level__iexact=level))
-        if gender:
-            qs = qs.filter(Q(gender__iexact=gender) | Q(examinee__gender__iexact=gender))
-
-        if progress_state == "completed":
-            qs = qs.filter(Q(progress__gte=100) | Q(status="completed"))
-        elif progress_state == "in_progress":
-            qs = qs.filter(Q(progress__lt=100) | Q(status="in_progress"))
-
-        s, e = _range(quick) if quick else (None, None)
-        if s and e:
-            qs = qs.filter(started_at__gte=s, started_at__lt=e)
-        else:
-            if date_start:
-                qs = qs.filter(started_at__date__gte=date_start)
-            if date_end:
-                qs = qs.filter(started_at__date__lte=date_end)
-
-        if search:
-            qs = qs.filter(
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search)  |
-                Q(user__username__icontains=search)   |
-                Q(examinee__first_name__icontains=search) |
-                Q(examinee__last_name__icontains=search)  |
-                Q(examinee__fullname__icontains=search)
-            )
 
-        if examinee_param and str(examinee_param).isdigit():
-            qs = qs.filter(Q(examinee_id=int(examinee_param)) | Q(user_id=int(examinee_param)))
-        elif user_param:
-            qs = qs.filter(
-                Q(user__username__icontains=user_param) |
-                Q(user__first_name__icontains=user_param) |
-                Q(user__last_name__icontains=user_param)  |
-                Q(examinee__first_name__icontains=user_param) |
-                Q(examinee__last_name__icontains=user_param)  |
-                Q(examinee__fullname__icontains=user_param)
-            )
+    if not AttemptModel:
+        return HttpResponseBadRequest("Attempt model not available")
 
-        qs = qs.order_by(order_by)
-        per_page = 1 if (show_latest and (examinee_param or user_param)) else 50
-        paginator = Paginator(qs, per_page)
-        page_obj = paginator.get_page(request.GET.get("page", 1))
-        
-        return render(request, "dashboard/reports.html", {
-            "page_obj": page_obj,
-            "attempt_model_exists": True,
-            "filters": {
-                "position": position, "level": level, "gender": gender,
-                "progress": progress_state, "quick": quick,
-                "date_start": date_start, "date_end": date_end, "search": search,
-            },
-        })
-
-    # ---- Fallback list (best-effort) – build rows from Answer
-    rows = _fallback_progress_queryset()
-
-    # Filter in Python for fallback
-    def _row_ok(r):
-        ok = True
-        if position and (getattr(r, "position", "") or "").lower() != position.lower(): ok = False
-        if level and (getattr(r, "level", "") or "").lower() != level.lower(): ok = False
-        if gender and (getattr(r, "gender", "") or "").lower() != gender.lower(): ok = False
-        if progress_state == "completed" and (r.progress or 0) < 100: ok = False
-        if progress_state == "in_progress" and (r.progress or 0) >= 100: ok = False
-        if search:
-            u = r.user
-            name = f"{getattr(u,'first_name','')} {getattr(u,'last_name','')}".strip() or getattr(u, "username", "")
-            if search.lower() not in (name or "").lower(): ok = False
-        if examinee_param and str(getattr(r.examinee, "id", "")) != str(examinee_param): ok = False
-        if user_param:
-            u = r.user
-            name = f"{getattr(u,'first_name','')} {getattr(u,'last_name','')}".strip() or getattr(u, "username", "")
-            if user_param.lower() not in (name or "").lower(): ok = False
-        if quick:
-            s, e = _range(quick)
-            dt = r.started_at
-            if s and e and not (dt and s <= dt < e): ok = False
-        else:
-            if date_start:
-                dt = r.started_at
-                if not (dt and dt.date() >= timezone.datetime.fromisoformat(date_start).date()): ok = False
-            if date_end:
-                dt = r.started_at
-                if not (dt and dt.date() <= timezone.datetime.fromisoformat(date_end).date()): ok = False
-        return ok
-
-    filtered = [r for r in rows if _row_ok(r)]
-
-    # Sorting (fallback)
-    reverse = (direction == "desc")
-    if sort == "fullname":
-        def key_fn(r):
-            u = r.user
-            return (f"{getattr(u,'first_name','')} {getattr(u,'last_name','')}".strip() or getattr(u, "username", "")).lower()
-    else:
-        key_fn = lambda r: getattr(r, sort, None)
-    filtered.sort(key=key_fn, reverse=reverse)
+    qs = _filtered_attempts(AttemptModel, request.GET)
+    keys = [(f, direction == "desc") for f in SORT_KEYS[sort]] + [("id", direction == "desc")]
+    per_page = 1 if (show_latest and (examinee_param or user_param)) else 50
+    page_obj = keyset_page(
+        qs.select_related("examinee", "exam"), keys, per_page,
+        after=request.GET.get("after"), before=request.GET.get("before"),
+    )
+    _decorate_attempts(page_obj.object_list)
 
-    if show_latest and (examinee_param or user_param):
-        filtered = filtered[:1]
+    # Filters/sort without the cursor, for the pager links
+    params = request.GET.copy()
+    for k in ("after", "before", "page"):
+        params.pop(k, None)
 
-    # Manual pagination
-    per_page = 1 if (show_latest and (examinee_param or user_param)) else 50
-    page = int(request.GET.get("page", 1))
-    start = (page - 1) * per_page
-    items = filtered[start:start + per_page]
-
-    class SimplePage:
-        object_list = items
-        number = page
-        has_previous = page > 1
-        has_next = len(filtered) > start + per_page
-        def previous_page_number(self): return self.number - 1
-        def next_page_number(self): return self.number + 1
-
-    page_obj = SimplePage()
-    # in reports()
     return render(request, "dashboard/reports.html", {
         "page_obj": page_obj,
-        "attempt_model_exists": False,
+        "total": cached_count(qs, _count_filters(request.GET)),
+        "querystring": params.urlencode(),
+        "attempt_model_exists": True,
         "filters": {
             "position": position, "level": level, "gender": gender,
             "progress": progress_state, "quick": quick,
@@ -460,55 +431,10 @@ def reports_export_csv(request):
     rows = []
 
     if AttemptModel:
-        qs = AttemptModel.objects.all()
-        rel_names = [f.name for f in AttemptModel._meta.fields if getattr(f, "is_relation", False)]
-        if "user" in rel_names or "examinee" in rel_names or "exam" in rel_names:
-            qs = qs.select_related(*(n for n in ("user", "examinee", "exam") if n in rel_names))
-
-        if position:
-            qs = qs.filter(Q(position__iexact=position) | Q(examinee__position__iexact=position))
-        if level:
-            qs = qs.filter(Q(level__iexact=level) | Q(examinee__level__iexact=level))
-        if gender:
-            qs = qs.filter(Q(gender__iexact=gender) | Q(examinee__gender__iexact=gender))
-
-        if progress_state == "completed":
-            qs = qs.filter(Q(progress__gte=100) | Q(status="completed"))
-        elif progress_state == "in_progress":
-            qs = qs.filter(Q(progress__lt=100) | Q(status="in_progress"))
-
-        s, e = _range(quick) if quick else (None, None)
-        if s and e:
-            qs = qs.filter(started_at__gte=s, started_at__lt=e)
-        else:
-            if date_start:
-                qs = qs.filter(started_at__date__gte=date_start)
-            if date_end:
-                qs = qs.filter(started_at__date__lte=date_end)
-
-        if search:
-            qs = qs.filter(
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search)  |
-                Q(user__username__icontains=search)   |
-                Q(examinee__first_name__icontains=search) |
-                Q(examinee__last_name__icontains=search)  |
-                Q(examinee__fullname__icontains=search)
-            )
-
-        if examinee_param and str(examinee_param).isdigit():
-            qs = qs.filter(Q(examinee_id=int(examinee_param)) | Q(user_id=int(examinee_param)))
-        elif user_param:
-            qs = qs.filter(
-                Q(user__username__icontains=user_param) |
-                Q(user__first_name__icontains=user_param) |
-                Q(user__last_name__icontains=user_param)  |
-                Q(examinee__first_name__icontains=user_param) |
-                Q(examinee__last_name__icontains=user_param)  |
-                Q(examinee__fullname__icontains=user_param)
-            )
+        qs = _filtered_attempts(AttemptModel, request.GET).select_related("examinee", "exam")
+        attempts = _decorate_attempts(list(qs.order_by("-started_at", "-id")[:5000]))
 
-        for a in qs.order_by("-started_at")[:5000]:
+        for a in attempts:
             person = getattr(a, "user", None) or getattr(a, "examinee", None)
             if person and hasattr(person, "get_full_name") and person.get_full_name():
                 fullname = person.get_full_name()
@@ -559,35 +485,101 @@ def reports_export_csv(request):
     return resp
 
 
+@admin_only
+def sittings_export_csv(request):
+    """One row per battery sitting (same filters as `reports`), read straight from the denormalized record."""
+    Sitting = apps.get_model("responses", "BatterySitting")
+    qs = (
+        _report_filters(Sitting.objects.all(), request.GET, completed_status="completed")
+        .select_related("examinee", "battery")
+        .order_by("-started_at", "-id")[:5000]
+    )
+
+    def fmt(dt):
+        return timezone.localtime(dt).strftime("%Y-%m-%d %H:%M") if dt else ""
+
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow([
+        "Start", "End", "Fullname", "Gender", "Position", "Level", "Battery", "Sitting #",
+        "Status", "Exams Submitted", "Exams Total", "Items Answered", "Items Total", "Progress", "Minutes",
+    ])
+    for s in qs:
+        e = s.examinee
+        writer.writerow([
+            fmt(s.started_at),
+            fmt(s.completed_at),
+            f"{e.first_name} {e.last_name}".strip() or e.username,
+            e.gender or "",
+            e.position or "",
+            e.level or "",
+            s.battery.name,
+            s.sitting_number,
+            s.get_status_display(),
+            s.exams_submitted,
+            s.exams_total,
+            s.items_answered,
+            s.items_total,
+            int(round(s.progress)),
+            round(s.duration_seconds / 60, 1) if s.duration_seconds else "",
+        ])
+    resp = HttpResponse(out.getvalue(), content_type="text/csv; charset=utf-8")
+    resp["Content-Disposition"] = "attachment; filename=sittings.csv"
+    return resp
+
+
+REPORT_BATCH_LIMIT = 500
+
+
 @admin_only
 def report_pdf(request, attempt_id):
-    AttemptModel = _attempt_model()
-    if not AttemptModel:
-        return HttpResponseBadRequest("Attempt model not available")
-    attempt = get_object_or_404(AttemptModel, pk=attempt_id)
-    html = f"""
-    <h1>{getattr(attempt.user, 'get_full_name', lambda: '')() or getattr(attempt.user, 'username', str(attempt.user))}</h1>
-    <p>Exam: {_exam_display(getattr(attempt, 'exam', None))}</p>
-    <p>Started: {getattr(attempt, 'started_at', '')}</p>
-    <p>Completed: {getattr(attempt, 'completed_at', '-') or '-'}</p>
-    <p>Progress: {int(round(float(getattr(attempt, 'progress', 0) or 0)))}%</p>
-    """
-    return HttpResponse(html, content_type="text/html")
+    """One attempt's report as PDF (cached per scoring version); HTML when WeasyPrint is absent."""
+    from . import pdf_reports
+
+    attempts = pdf_reports.load_attempts([attempt_id])
+    if not attempts:
+        return HttpResponseBadRequest("Attempt not found")
+    attempt = attempts[0]
+    if not pdf_reports.pdf_available() or request.GET.get("format") == "html":
+        return HttpResponse(pdf_reports.render_html(attempt), content_type="text/html")
+
+    path = pdf_reports.report_pdf_path(attempt)
+    # FileResponse builds an escaped (RFC 5987 for non-ASCII) inline Content-Disposition
+    return FileResponse(
+        open(path, "rb"), content_type="application/pdf", filename=pdf_reports.report_filename(attempt),
+    )
 
 
 @admin_only
 def batch_report_pdf(request):
-    if request.method != "POST":
-        return HttpResponseBadRequest("POST required")
+    """
+    ZIP of PDF reports, one per attempt: POSTed attempt_ids[] or, on GET, every
+    attempt matching the reports filters (newest first, up to REPORT_BATCH_LIMIT).
+    PDFs render on a process pool and stream into the ZIP as they finish.
+    """
+    from . import pdf_reports
+
     AttemptModel = _attempt_model()
     if not AttemptModel:
         return HttpResponseBadRequest("Attempt model not available")
-    ids = request.POST.getlist("attempt_ids[]")
-    attempts = AttemptModel.objects.filter(id__in=ids)
-    html = "<h1>Batch Report</h1>" + "".join(
-        [f"<p>{a.user} - {_exam_display(getattr(a, 'exam', None))} - {int(round(float(getattr(a,'progress',0) or 0)))}%</p>" for a in attempts]
-    )
-    return HttpResponse(html, content_type="text/html")
+    if not pdf_reports.pdf_available():
+        return HttpResponse("PDF rendering is not installed on this server (WeasyPrint).", status=503)
+
+    if request.method == "POST":
+        ids = [int(i) for i in request.POST.getlist("attempt_ids[]") if str(i).isdigit()]
+    else:
+        ids = list(
+            _filtered_attempts(AttemptModel, request.GET)
+            .order_by("-started_at", "-id").values_list("id", flat=True)[:REPORT_BATCH_LIMIT]
+        )
+    ids = ids[:REPORT_BATCH_LIMIT]
+    if not ids:
+        return HttpResponseBadRequest("No attempts selected")
+
+    attempts = pdf_reports.load_attempts(ids)
+    response = StreamingHttpResponse(pdf_reports.stream_zip(attempts), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="reports-{timezone.localdate():%Y%m%d}.zip"'
+    return response
 
 
 @admin_only
@@ -595,7 +587,155 @@ def view_attempt_tests(request, attempt_id):
     AttemptModel = _attempt_model()
     if not AttemptModel:
         return HttpResponseBadRequest("Attempt model not available")
-    attempt = get_object_or_404(AttemptModel, pk=attempt_id)
-    # TODO: fetch per-test details from your models (e.g., AttemptItem/Answer)
-    taken_tests = []
-    return render(request, "dashboard/attempt_tests.html", {"attempt": attempt, "taken_tests": taken_tests})
+    from responses.breakdown import attempt_breakdown
+
+    attempt = get_object_or_404(AttemptModel.objects.select_related("examinee", "exam"), pk=attempt_id)
+    taken_tests = attempt_breakdown(attempt)
+    current = next((t for t in taken_tests if t["current"]), None)
+    return render(request, "dashboard/attempt_tests.html", {
+        "attempt": attempt,
+        "examinee": attempt.examinee,
+        "progress": current["progress"] if current else 0,
+        "taken_tests": taken_tests,
+    })
+
+
+# ===========================================================================
+# LIVE MONITOR (SSE)
+# ===========================================================================
+
+LIVE_SNAPSHOT_LIMIT = 500
+LIVE_STREAM_SECONDS = 300   # EventSource reconnects (with Last-Event-ID) after this
+LIVE_HEARTBEAT_SECONDS = 15
+
+
+def _sse(event_id, event_type, payload):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _live_events_sync(broker, last_id, reset=False):
+    """WSGI stream: blocks on the broker condition, one thread per proctor."""
+    deadline = time.monotonic() + LIVE_STREAM_SECONDS
+    yield "retry: 2000\n\n"
+    if reset:
+        yield _sse(last_id, "reset", {})
+    while time.monotonic() < deadline:
+        events = broker.wait(last_id, timeout=LIVE_HEARTBEAT_SECONDS)
+        if not events:
+            yield ": ping\n\n"
+        for event_id, event_type, payload in events:
+            last_id = event_id
+            yield _sse(event_id, event_type, payload)
+
+
+async def _live_events_async(broker, last_id, reset=False):
+    """ASGI stream: polls the in-memory buffer, no thread held between events."""
+    deadline = time.monotonic() + LIVE_STREAM_SECONDS
+    idle = 0.0
+    yield "retry: 2000\n\n"
+    if reset:
+        yield _sse(last_id, "reset", {})
+    while time.monotonic() < deadline:
+        events = broker.events_after(last_id)
+        for event_id, event_type, payload in events:
+            last_id = event_id
+            yield _sse(event_id, event_type, payload)
+        if events:
+            idle = 0.0
+        elif idle >= LIVE_HEARTBEAT_SECONDS:
+            idle = 0.0
+            yield ": ping\n\n"
+        await asyncio.sleep(0.5)
+        idle += 0.5
+
+
+@admin_only
+def live_monitor(request):
+    """
+    Proctor view: one snapshot query for open attempts, then live updates over SSE.
+    """
+    from responses.events import get_broker
+    from responses.models import ExamAttempt, deadline_grace
+
+    # Take the event position first so nothing published during the snapshot is lost.
+    last_id = get_broker().last_id
+    attempts = list(
+        ExamAttempt.objects.filter(status="in_progress")
+        .select_related("examinee", "exam")
+        .annotate(answered=Count("answers"))
+        .order_by("-started_at")[:LIVE_SNAPSHOT_LIMIT]
+    )
+    for a in attempts:
+        a.expires_at = a.deadline + deadline_grace() if a.deadline else None
+    return render(request, "dashboard/live_monitor.html", {"attempts": attempts, "last_id": last_id})
+
+
+@admin_only
+def live_stream(request):
+    """text/event-stream of attempt events (see responses/events.py)."""
+    from responses.events import get_broker
+
+    broker = get_broker()
+    raw_last = request.headers.get("Last-Event-ID") or request.GET.get("last_id") or ""
+    last_id = int(raw_last) if raw_last.isdigit() else broker.last_id
+    # An id from before a broker restart (or another process) would hide every
+    # event until the counter caught up: resume from now and have the client
+    # reload its snapshot, as what it missed is gone.
+    reset = last_id > broker.last_id
+    if reset:
+        last_id = broker.last_id
+
+    if isinstance(request, ASGIRequest):
+        stream = _live_events_async(broker, last_id, reset)
+    else:
+        stream = _live_events_sync(broker, last_id, reset)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ===========================================================================
+# ANALYTICS (pre-aggregated cube)
+# ===========================================================================
+
+def _parse_day(value):
+    from django.utils.dateparse import parse_date
+    try:
+        return parse_date((value or "").strip())
+    except ValueError:
+        return None
+
+
+@admin_only
+def analytics(request):
+    """
+    Demographic breakdown sliced from dashboard.CubeCell only (see dashboard/cube.py);
+    refreshed out of band by `manage.py refresh_cube`.
+    """
+    from exams.models import Exam
+    from .cube import DIMENSIONS, slice_cube
+    from .models import CubeCell
+
+    rows = request.GET.get("rows", "exam")
+    if rows not in DIMENSIONS:
+        rows = "exam"
+    filters = {
+        "exam": request.GET.get("exam", "").strip(),
+        "gender": request.GET.get("gender", "").strip(),
+        "level": request.GET.get("level", "").strip(),
+        "education": request.GET.get("education", "").strip(),
+        "week_from": _parse_day(request.GET.get("week_from")),
+        "week_to": _parse_day(request.GET.get("week_to")),
+    }
+    if filters["exam"] and not filters["exam"].isdigit():
+        filters["exam"] = ""
+
+    return render(request, "dashboard/analytics.html", {
+        "rows": rows,
+        "dimensions": list(DIMENSIONS),
+        "cells": slice_cube(rows, filters),
+        "filters": {k: (v or "") for k, v in filters.items()},
+        "exams": Exam.objects.order_by("title").values("id", "title"),
+        "refreshed_at": CubeCell.objects.order_by("-refreshed_at").values_list("refreshed_at", flat=True).first(),
+    })
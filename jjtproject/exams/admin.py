@@ -21,6 +21,14 @@ from .models import (
     MCQQuestion, MCQChoice, TFChoice,
     TrueFalseQuestion, LikertQuestion, LikertScale, LikertOption
 )
+from django.contrib import messages
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from django.urls import path
+from .catalog import bump_exam_version
+from .itembank import (
+    CONTENT_TYPES, ItemBankError, export_bank, guess_format, import_bank, read_bank, write_bank, xlsx_available,
+)
 
 # ----------------- TRUE/FALSE ------------------
 class TFChoiceInlineFormSet(BaseInlineFormSet):
@@ -85,15 +93,25 @@ class MCQQuestionAdmin(admin.ModelAdmin):
     inlines = [MCQChoiceInline]
 
     def save_formset(self, request, form, formset, change):
+        # One INSERT for the new choices, one UPDATE for the edited ones and one
+        # DELETE for the removed ones, instead of a query (and a cache bump) per row.
         instances = formset.save(commit=False)
         question = form.instance
-        
-        for obj in instances:
-            obj.exam = question.exam
-            obj.question_text = question.question_text
+        new = [obj for obj in instances if obj.pk is None]
+        for obj in new:
             obj.question = question
-            obj.save()
-        formset.save_m2m()
+        MCQChoice.objects.bulk_create(new)
+
+        edited = [obj for obj, _ in formset.changed_objects]
+        fields = sorted({f for _, changed in formset.changed_objects for f in changed} & {'choice_text', 'is_correct'})
+        if edited and fields:
+            MCQChoice.objects.bulk_update(edited, fields)
+
+        if formset.deleted_objects:
+            MCQChoice.objects.filter(pk__in=[obj.pk for obj in formset.deleted_objects]).delete()
+
+        if new or edited or formset.deleted_objects:
+            bump_exam_version(question.exam_id)  # the bulk writes skip exams.signals
 
 
 # ----------------- ESSAY ------------------
@@ -167,13 +185,70 @@ class ExamInline(admin.TabularInline):
 
 
 
+def _export_itembank_action(fmt):
+    @admin.action(description=f"Export selected as item bank ({fmt.upper()})")
+    def export(modeladmin, request, queryset):
+        try:
+            data = write_bank(export_bank(queryset.order_by("id")), fmt)
+        except ItemBankError as e:
+            modeladmin.message_user(request, str(e), messages.ERROR)
+            return None
+        response = HttpResponse(data, content_type=CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="itembank.{fmt}"'
+        return response
+    export.__name__ = f"export_itembank_{fmt}"
+    return export
+
+
+class ItemBankImportForm(forms.Form):
+    file = forms.FileField(help_text="JSON, CSV or XLSX item bank (see exams/itembank.py)")
+    dry_run = forms.BooleanField(required=False, label="Validate only")
+
+
 # ✅ Define the admin class first
 class TestBatteryAdmin(admin.ModelAdmin):
+    change_list_template = "admin/exams/testbattery/change_list.html"
     list_display = ['name']
     readonly_fields = ['exams_in_battery']
     fields = ['name', 'exams_in_battery']
     inlines = [ExamInline]
 
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        for fmt in ("json", "csv", "xlsx"):
+            if fmt == "xlsx" and not xlsx_available():
+                continue
+            action = _export_itembank_action(fmt)
+            actions[action.__name__] = (action, action.__name__, action.short_description)
+        return actions
+
+    def get_urls(self):
+        custom_urls = [
+            path('import-itembank/', self.admin_site.admin_view(self.import_itembank_view), name='exams_testbattery_import_itembank'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_itembank_view(self, request):
+        form = ItemBankImportForm(request.POST or None, request.FILES or None)
+        errors = []
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                tree = read_bank(upload.read(), guess_format(upload.name))
+                stats = import_bank(tree, dry_run=form.cleaned_data["dry_run"])
+            except ItemBankError as e:
+                errors = e.errors
+            else:
+                verb = "Validated" if form.cleaned_data["dry_run"] else "Imported"
+                self.message_user(request, (
+                    f"{verb} {stats['batteries']} battery(ies), {stats['exams']} exam(s), "
+                    f"{stats['questions']} question(s), {stats['choices']} MCQ choice(s)."
+                ), messages.SUCCESS)
+                return redirect("..")
+        return render(request, "admin/exams/testbattery/import_itembank.html", {
+            **self.admin_site.each_context(request), "form": form, "errors": errors, "opts": self.model._meta,
+        })
+
     def exams_in_battery(self, obj):
         exams = Exam.objects.filter(battery=obj)
         if not exams.exists():
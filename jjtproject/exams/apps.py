@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig
 
 
 class ExamsConfig(AppConfig):
+    default = True  # apps.py also holds BundledStaticFilesConfig
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exams'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+class BundledStaticFilesConfig(StaticFilesConfig):
+    # css/ and js/ hold the bundle sources (full Bootstrap, RTL builds, source
+    # maps); collectstatic ships only static/bundles/ (exams/assets.py)
+    ignore_patterns = StaticFilesConfig.ignore_patterns + ["css/*", "js/*"]
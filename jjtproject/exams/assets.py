@@ -0,0 +1,305 @@
+# exams/assets.py
+"""
+Static bundles for the exam page and the dashboard.
+
+`manage.py build_assets` writes one CSS and one JS file per entry in BUNDLES
+into static/bundles/. `collectstatic` then content-hashes them and stores
+.gz/.br copies next to them (exams.storage). The `{% bundle %}` tag in
+exams/templatetags/assets.py picks the built file when ASSET_BUNDLES is on
+(the default when DEBUG is off). Otherwise it links the sources one by one,
+so development needs no build step.
+
+Building a bundle:
+
+  * CSS is purged. A rule is kept only if every class in one of its
+    selectors occurs somewhere in the bundle's `content` files (templates,
+    Python that emits class names) or in its own JS. That drops most of
+    Bootstrap. Classes built at runtime from fragments must be listed in
+    ASSET_SAFELIST. @import/@charset are hoisted, relative url()s are
+    rebased, and everything is re-serialized without comments or whitespace.
+    "/*!" license banners are kept.
+  * JS is concatenated. Files not already minified go through rjsmin when it
+    is installed, and are otherwise kept as they are. sourceMappingURL
+    comments are dropped because the maps are not bundled.
+"""
+import gzip
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip copies are written without it
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # optional: unminified JS sources are bundled as they are
+    rjsmin = None
+
+BUNDLES = {
+    # take_exam_paginated.html: 300 kiosks load this at once
+    "exam": {
+        "css": ["css/bootstrap.min.css", "css/exam_style.css"],
+        "js": ["js/exam_offline.js"],
+        "content": [
+            "exams/templates/exams/take_exam_paginated.html",
+            "exams/templates/exams/_question_blocks.html",
+        ],
+    },
+    # exams/base.html: the dashboard pages and the staff login
+    "dashboard": {
+        "css": ["css/bootstrap.min.css", "css/exam_style.css"],
+        "js": ["js/bootstrap.bundle.min.js"],
+        "content": [
+            "exams/templates/exams/base.html",
+            "dashboard/templates/dashboard/*.html",
+            "accounts/templates/accounts/staff_login.html",
+            "dashboard/*.py",
+        ],
+    },
+}
+BUNDLE_DIR = "bundles"             # under the first STATICFILES_DIRS entry
+COMPRESS_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".xml")
+COMPRESS_MIN_SIZE = 1024           # smaller files gain nothing from a compressed copy
+
+_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+_COMMENT = re.compile(rf"({_STRING})|/\*(!?).*?\*/", re.S)
+_TOKEN = re.compile(rf"{_STRING}|[{{}};]")
+_SPLIT_STRINGS = re.compile(rf"({_STRING})")
+_URL = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+_PARENS = re.compile(r"\([^()]*\)")
+_ATTR = re.compile(r"\[[^\]]*\]")
+_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_WORD = re.compile(r"[\w-]+")
+_GROUPING_RULES = ("@media", "@supports", "@container", "@layer")
+
+
+def bundles_enabled():
+    return getattr(settings, "ASSET_BUNDLES", not settings.DEBUG)
+
+
+def bundle_path(name, kind):
+    return f"{BUNDLE_DIR}/{name}.{kind}"
+
+
+def bundle_sources(name, kind):
+    try:
+        return BUNDLES[name][kind]
+    except KeyError:
+        raise ImproperlyConfigured(f"No {kind} bundle named {name!r} in exams.assets.BUNDLES.")
+
+
+def output_dir():
+    dirs = getattr(settings, "STATICFILES_DIRS", [])
+    if not dirs:
+        raise ImproperlyConfigured("build_assets writes into STATICFILES_DIRS[0]; none is configured.")
+    first = dirs[0][1] if isinstance(dirs[0], (list, tuple)) else dirs[0]
+    return Path(first) / BUNDLE_DIR
+
+
+def read_static(path):
+    found = finders.find(path)
+    if not found:
+        raise ImproperlyConfigured(f"Bundle source {path!r} not found by the staticfiles finders.")
+    return Path(found).read_text(encoding="utf-8")
+
+
+# ---------------------------------------------------------------- CSS purge
+
+def used_tokens(name, js_text=""):
+    """Every word in the bundle's content files and JS, plus ASSET_SAFELIST."""
+    base = Path(settings.BASE_DIR)
+    words = set(_WORD.findall(js_text))
+    for pattern in BUNDLES[name].get("content", []):
+        for path in sorted(base.glob(pattern)):
+            words.update(_WORD.findall(path.read_text(encoding="utf-8")))
+    words.update(getattr(settings, "ASSET_SAFELIST", ()))
+    return words
+
+
+def _squeeze(text, declarations=False):
+    """Collapse whitespace outside strings."""
+    around = r"[{};,:>]" if declarations else r"[{};,>]"
+    parts = _SPLIT_STRINGS.split(text)
+    for i in range(0, len(parts), 2):
+        part = re.sub(r"\s+", " ", parts[i])
+        parts[i] = re.sub(rf"\s*({around})\s*", r"\1", part)
+    return "".join(parts).strip()
+
+
+def _statements(css):
+    """Top-level (prelude, body) pairs; body is None for statements such as @import."""
+    out, depth, start, prelude = [], 0, 0, ""
+    for m in _TOKEN.finditer(css):
+        token = m.group()
+        if token == "{":
+            if depth == 0:
+                prelude, start = css[start:m.start()].strip(), m.end()
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0:
+                out.append((prelude, css[start:m.start()]))
+                start = m.end()
+        elif token == ";" and depth == 0:
+            if css[start:m.start()].strip():
+                out.append((css[start:m.start()].strip(), None))
+            start = m.end()
+    return out
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, c in enumerate(prelude):
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [s.strip() for s in selectors if s.strip()]
+
+
+def _selector_used(selector, used):
+    # classes inside :not()/:is()/:where() and attribute values never exclude a rule
+    bare = _ATTR.sub("", selector)
+    while True:
+        stripped = _PARENS.sub("", bare)
+        if stripped == bare:
+            break
+        bare = stripped
+    return all(c in used for c in _CLASS.findall(bare))
+
+
+def purge_css(css, used):
+    """Serialize `css` (comments already removed) keeping only rules that can match."""
+    out, keyframes = [], []
+    for prelude, body in _statements(css):
+        if body is None:
+            continue  # @import/@charset are hoisted by build_css
+        if prelude.startswith("@"):
+            at = prelude.split(None, 1)[0].split("(")[0].lower()
+            if at in _GROUPING_RULES:
+                inner = purge_css(body, used)
+                if inner:
+                    out.append(f"{_squeeze(prelude)}{{{inner}}}")
+            elif at.endswith("keyframes"):
+                keyframes.append((prelude.split(None, 1)[-1].strip(), f"{_squeeze(prelude)}{{{_squeeze(body, True)}}}"))
+            else:  # @font-face, @page, @property ...
+                out.append(f"{_squeeze(prelude)}{{{_squeeze(body, True)}}}")
+            continue
+        selectors = [s for s in _split_selectors(prelude) if _selector_used(s, used)]
+        if selectors:
+            out.append(f"{','.join(_squeeze(s) for s in selectors)}{{{_squeeze(body, True)}}}")
+    kept = "".join(out)
+    out.extend(rule for name, rule in keyframes if re.search(rf"(?<![\w-]){re.escape(name)}(?![\w-])", kept))
+    return "".join(out)
+
+
+def _rebase_urls(css, source):
+    """Point relative url()s of a source file at the same files from BUNDLE_DIR."""
+    def rebase(m):
+        url = m.group(2)
+        if re.match(r"^(?:[a-z][a-z0-9+.-]*:|/|#)", url, re.I):
+            return m.group()
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source), url))
+        return f'url("{posixpath.relpath(target, BUNDLE_DIR)}")'
+    return _URL.sub(rebase, css)
+
+
+def missing_urls(css):
+    """Relative url()s of a built bundle that no staticfiles finder resolves."""
+    missing = []
+    for m in _URL.finditer(css):
+        url = m.group(2)
+        if re.match(r"^(?:[a-z][a-z0-9+.-]*:|/|#)", url, re.I):
+            continue
+        target = posixpath.normpath(posixpath.join(BUNDLE_DIR, url.split("?")[0].split("#")[0]))
+        if not finders.find(target):
+            missing.append(url)
+    return missing
+
+
+def build_css(name, used):
+    banners, imports, charset, rules = [], [], "", []
+    for source in bundle_sources(name, "css"):
+        def comment(m):
+            if m.group(1):
+                return m.group(1)
+            if m.group(2):
+                banners.append(m.group().strip())
+            return ""
+        css = _rebase_urls(_COMMENT.sub(comment, read_static(source)), source)
+        for prelude, body in _statements(css):
+            if body is None and prelude.lower().startswith("@charset"):
+                charset = charset or _squeeze(prelude) + ";"
+            elif body is None and prelude.lower().startswith("@import"):
+                imports.append(_squeeze(prelude) + ";")
+        rules.append(purge_css(css, used))
+    head = charset + "".join(dict.fromkeys(banners)) + "".join(dict.fromkeys(imports))
+    return head + "\n" + "\n".join(r for r in rules if r) + "\n"
+
+
+# ------------------------------------------------------------------- JS
+
+def minify_js(source, js):
+    js = re.sub(r"^//[#@] sourceMappingURL=.*$", "", js, flags=re.M)
+    if rjsmin is not None and not source.endswith(".min.js"):
+        js = rjsmin.jsmin(js, keep_bang_comments=True)
+    return js.strip()
+
+
+def build_js(name):
+    parts = [minify_js(s, read_static(s)) for s in bundle_sources(name, "js")]
+    return ";\n".join(parts) + ";\n" if parts else ""
+
+
+# ---------------------------------------------------------------- build
+
+def compress(path):
+    """Write path.gz (and path.br with brotli installed) next to a text asset; returns the new paths."""
+    path = Path(path)
+    if path.suffix not in COMPRESS_EXTENSIONS:
+        return []
+    data = path.read_bytes()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+    written = []
+    encoders = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", lambda d: brotli.compress(d, quality=11)))
+    for suffix, encode in encoders:
+        packed = encode(data)
+        if len(packed) < len(data):
+            target = path.with_name(path.name + suffix)
+            target.write_bytes(packed)
+            written.append(target)
+    return written
+
+
+def build_bundle(name):
+    """Write BUNDLE_DIR/<name>.css and .js; returns {kind: (source bytes, bundle bytes)}."""
+    js = build_js(name)
+    built = {"js": js, "css": build_css(name, used_tokens(name, js))}
+    missing = missing_urls(built["css"])
+    if missing:
+        # collectstatic would fail on these later; the page would silently 404
+        raise ImproperlyConfigured(f"{name}.css references missing files: {', '.join(sorted(set(missing)))}")
+    out = output_dir()
+    out.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for kind, text in built.items():
+        if not BUNDLES[name].get(kind):
+            continue
+        source_bytes = sum(len(read_static(s).encode()) for s in bundle_sources(name, kind))
+        data = text.encode()
+        (out / f"{name}.{kind}").write_bytes(data)
+        sizes[kind] = (source_bytes, len(data))
+    return sizes
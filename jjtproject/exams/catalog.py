@@ -0,0 +1,181 @@
+# exams/catalog.py
+"""
+Cached, read-mostly exam metadata used on every exam page load.
+
+Each battery's ordered exam list lives in the cache under a per-battery
+version number. Saving or deleting an Exam (including sort_order edits from
+ExamInline / ExamAdmin.list_editable) bumps that version via exams/signals.py,
+so readers never see a stale order and nothing has to be deleted explicitly.
+Per-exam data (the item registry map) works the same way with an exam version
+bumped by question changes. Likert scales share one registry, bumped by any
+LikertScale / LikertOption change.
+"""
+from django.core.cache import cache
+
+from .models import Exam, Item, LikertOption
+
+CATALOG_TIMEOUT = 60 * 60  # entries expire; version keys never do (see bump_version)
+
+
+def bump_version(key):
+    """
+    Advance a version key atomically: SET NX then INCR on Redis, so concurrent
+    bumps never collapse into one. Version keys carry no timeout, and Redis
+    must not evict them (maxmemory-policy volatile-*, see README), or the count
+    could restart under entries cached at a later version.
+    """
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass  # DummyCache (no REDIS_URL): nothing is cached, so nothing to invalidate
+
+
+def _version_key(battery_id):
+    return f"exams:battery_version:{battery_id}"
+
+
+def battery_version(battery_id):
+    return cache.get_or_set(_version_key(battery_id), 1, None)
+
+
+def bump_battery_version(battery_id):
+    if battery_id:
+        bump_version(_version_key(battery_id))
+
+
+def battery_exams(battery_id):
+    """Ordered Exam rows of a battery (id, title, time limit, sort order), cached."""
+    key = f"exams:battery:{battery_id}"
+    version = battery_version(battery_id)
+    exams = cache.get(key, version=version)
+    if exams is None:
+        exams = list(
+            Exam.objects.filter(battery_id=battery_id)
+            .only("id", "title", "battery_id", "time_limit_minutes", "sort_order")
+            .order_by("sort_order", "id")
+        )
+        cache.set(key, exams, CATALOG_TIMEOUT, version=version)
+    return exams
+
+
+# Used for a scale that has no options yet (the historical hard-coded list).
+DEFAULT_LIKERT_CHOICES = [
+    ("5", "Strongly Agree"),
+    ("4", "Agree"),
+    ("3", "Neutral"),
+    ("2", "Disagree"),
+    ("1", "Strongly Disagree"),
+]
+
+_SCALES_VERSION_KEY = "exams:likert_scales_version"
+
+
+def likert_version():
+    return cache.get_or_set(_SCALES_VERSION_KEY, 1, None)
+
+
+def bump_likert_version():
+    bump_version(_SCALES_VERSION_KEY)
+
+
+def likert_scales():
+    """{scale_id: [(value, label), ...]} for every scale, highest value first; one query per version."""
+    # No per-process memo: a scale edit in one worker must reach all of them
+    # through the shared version key.
+    version = likert_version()
+    scales = cache.get("exams:likert_scales", version=version)
+    if scales is None:
+        scales = {}
+        for scale_id, value, label in (
+            LikertOption.objects.order_by("scale_id", "-value", "id").values_list("scale_id", "value", "label")
+        ):
+            scales.setdefault(scale_id, []).append((str(value), label))
+        cache.set("exams:likert_scales", scales, CATALOG_TIMEOUT, version=version)
+    return scales
+
+
+def scale_choices(scale_id, scales=None):
+    """Options of one scale as (value, label) pairs; the default 5-point list if it has none."""
+    return (scales if scales is not None else likert_scales()).get(scale_id) or DEFAULT_LIKERT_CHOICES
+
+
+def _exam_version_key(exam_id):
+    return f"exams:exam_version:{exam_id}"
+
+
+def exam_version(exam_id):
+    return cache.get_or_set(_exam_version_key(exam_id), 1, None)
+
+
+def bump_exam_version(exam_id):
+    if exam_id:
+        bump_version(_exam_version_key(exam_id))
+
+
+def exam_item_map(exam_id):
+    """{(qtype, question_id): item_id} for one exam, cached per exam version."""
+    key = f"exams:items:{exam_id}"
+    version = exam_version(exam_id)
+    items = cache.get(key, version=version)
+    if items is None:
+        items = {
+            (Item.KIND_TO_QTYPE[kind], source_id): item_id
+            for item_id, kind, source_id in Item.objects.filter(exam_id=exam_id)
+            .values_list("id", "kind", "source_id")
+        }
+        cache.set(key, items, CATALOG_TIMEOUT, version=version)
+    return items
+
+
+def exam_question_positions(exam_id):
+    """{(qtype, question_id): position} for the exam's imported questions, cached per exam version."""
+    key = f"exams:positions:{exam_id}"
+    version = exam_version(exam_id)
+    positions = cache.get(key, version=version)
+    if positions is None:
+        positions = {
+            (Item.KIND_TO_QTYPE[kind], source_id): position
+            for kind, source_id, position in Item.objects.filter(exam_id=exam_id, position__isnull=False)
+            .values_list("kind", "source_id", "position")
+        }
+        cache.set(key, positions, CATALOG_TIMEOUT, version=version)
+    return positions
+
+
+def question_order(positions, qtype, question_id):
+    """Sort key for a question: imported position first, then id."""
+    position = positions.get((qtype, question_id))
+    return (position is None, position or 0, question_id)
+
+
+def resolve_item_id(exam_id, qtype, question_id):
+    """Item id for a (qtype, question id) pair of this exam, or None if there is no such question."""
+    item_id = exam_item_map(exam_id).get((qtype, question_id))
+    if item_id is None:
+        kind = Item.QTYPE_TO_KIND.get(qtype)
+        if kind is None:
+            return None
+        # Questions inserted without signals (raw bulk inserts) get their item lazily.
+        if not Item.source_models()[kind].objects.filter(pk=question_id, exam_id=exam_id).exists():
+            return None
+        item, created = Item.objects.get_or_create(
+            kind=kind, source_id=question_id, defaults={"exam_id": exam_id}
+        )
+        if created:
+            bump_exam_version(exam_id)
+        item_id = item.id
+    return item_id
+
+
+def exam_question_count(exam_id):
+    """Live questions of an exam, all kinds (the item map also keeps deleted ones), cached."""
+    key = f"exams:question_count:{exam_id}"
+    version = exam_version(exam_id)
+    total = cache.get(key, version=version)
+    if total is None:
+        total = sum(
+            model.objects.filter(exam_id=exam_id).count() for model in Item.source_models().values()
+        )
+        cache.set(key, total, CATALOG_TIMEOUT, version=version)
+    return total
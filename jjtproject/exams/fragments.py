@@ -0,0 +1,55 @@
+# exams/fragments.py
+"""
+Pre-rendered question markup for the exam page.
+
+The question blocks of an exam are the same HTML for every examinee. They are
+rendered once from exams/_question_blocks.html and cached under the exam
+version, the Likert registry version and FRAGMENT_VERSION. Question and
+choice edits bump the exam version (exams/signals.py). The only per-examinee
+part is which answers are already filled in. That goes to the page as a small
+{question id: value} JSON overlay, which the page script applies on load.
+"""
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .catalog import CATALOG_TIMEOUT, exam_version, likert_version
+
+FRAGMENT_TEMPLATE = "exams/_question_blocks.html"
+FRAGMENT_VERSION = 3  # bump when _question_blocks.html changes
+
+
+def render_question_blocks(questions):
+    """Render the shared markup (uncached); MCQ choices are fetched in one query."""
+    prefetch_related_objects([q for q in questions if q.qtype == "mcqquestion"], "choices")
+    return render_to_string(FRAGMENT_TEMPLATE, {"questions": questions})
+
+
+def fragment_key(exam_id):
+    return f"exams:question_blocks:{exam_id}"
+
+
+def fragment_version(exam_id):
+    return f"{FRAGMENT_VERSION}.{exam_version(exam_id)}.{likert_version()}"
+
+
+def question_blocks(exam, questions):
+    """Cached question markup for `exam` (the list from views._collect_questions)."""
+    key = fragment_key(exam.id)
+    version = fragment_version(exam.id)
+    html = cache.get(key, version=version)
+    if html is None:
+        html = render_question_blocks(questions)
+        cache.set(key, html, CATALOG_TIMEOUT, version=version)
+    return mark_safe(html)
+
+
+def answer_overlay(session, questions):
+    """{question id: saved value} from the session, for the page script to pre-fill."""
+    overlay = {}
+    for q in questions:
+        value = session.get(f"answer_{q.id}")
+        if value not in (None, ""):
+            overlay[str(q.id)] = str(value)
+    return overlay
@@ -0,0 +1,105 @@
+# exams/images.py
+"""
+Resized derivatives of EssayQuestion.image.
+
+A full-resolution scan is often several MB, and the exam page would send it
+to every examinee. On upload (exams/signals.py) the image is decoded once
+and re-encoded at DERIVATIVE_WIDTHS as WebP and as JPEG for older
+browsers. Images narrower than a width are not upscaled to it. The files are
+content-addressed, named after a digest of the original
+(question_images/derived/<digest>-<width>.webp). A URL therefore never
+changes content and can be cached for good (exams.storage.serve_media).
+
+EssayQuestion.image_variants records what was built, so rendering the page
+touches neither the storage nor Pillow:
+
+    {"source": "<image name>", "digest": "...", "width": 2480, "height": 3508,
+     "widths": [480, 960, 1440], "webp": [...names], "jpeg": [...names]}
+
+`picture_sources` turns that into the src/srcset the template needs.
+`manage.py build_image_derivatives` backfills images uploaded before this
+existed.
+"""
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+DERIVED_DIR = "question_images/derived"
+DERIVATIVE_WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 78
+JPEG_QUALITY = 82
+SIZES = "(max-width: 900px) 100vw, 860px"   # the exam container is 900px wide
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == "webp":
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        if img.mode != "RGB":  # JPEG has no alpha: flatten onto white
+            flat = Image.new("RGB", img.size, "white")
+            flat.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+            img = flat
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def build_derivatives(field, storage=default_storage):
+    """Write the WebP/JPEG derivatives of an image field; returns the image_variants dict."""
+    field.open("rb")
+    try:
+        data = field.read()
+    finally:
+        field.close()
+    digest = hashlib.sha1(data).hexdigest()[:16]
+
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))  # scans from phones carry a rotation
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+    width, height = img.size
+
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width]
+    if min(width, DERIVATIVE_WIDTHS[-1]) not in widths:
+        widths.append(min(width, DERIVATIVE_WIDTHS[-1]))
+    variants = {"source": field.name, "digest": digest, "width": width, "height": height,
+                "widths": widths, "webp": [], "jpeg": []}
+    for w in widths:
+        resized = img if w == width else img.resize((w, round(height * w / width)), Image.LANCZOS)
+        for fmt, ext in (("webp", "webp"), ("jpeg", "jpg")):
+            name = f"{DERIVED_DIR}/{digest}-{w}.{ext}"
+            if not storage.exists(name):  # same original, same bytes: nothing to redo
+                name = storage.save(name, ContentFile(_encode(resized, fmt)))
+            variants[fmt].append(name)
+    return variants
+
+
+def delete_derivatives(variants, keep=(), storage=default_storage):
+    """Remove derivative files no longer referenced (other questions may share a digest)."""
+    for name in set(variants.get("webp", []) + variants.get("jpeg", [])) - set(keep):
+        storage.delete(name)
+
+
+def picture_sources(question, storage=default_storage):
+    """src/srcset/size of an essay question's image for the template, or None without an image."""
+    if not question.image:
+        return None
+    v = question.image_variants or {}
+    if v.get("source") != question.image.name or not v.get("widths"):
+        # derivatives not built (yet): the original is still better than no image
+        return {"src": question.image.url, "webp_srcset": "", "jpeg_srcset": "", "width": None, "height": None}
+
+    def srcset(names):
+        return ", ".join(f"{storage.url(n)} {w}w" for n, w in zip(names, v["widths"]))
+
+    top = v["widths"][-1]
+    return {
+        "src": storage.url(v["jpeg"][min(1, len(v["jpeg"]) - 1)]),  # ~960px for browsers without srcset
+        "webp_srcset": srcset(v["webp"]),
+        "jpeg_srcset": srcset(v["jpeg"]),
+        "width": top,
+        "height": round(v["height"] * top / v["width"]),
+        "sizes": SIZES,
+    }
@@ -0,0 +1,493 @@
+# exams/itembank.py
+"""
+Bulk import/export of whole TestBattery trees ("item banks").
+
+Canonical form is a JSON document:
+
+    {"format": "jjt-itembank", "version": 1,
+     "likert_scales": [{"name": "5-point", "description": "",
+                        "options": [{"label": "Agree", "value": 5}, ...]}],
+     "batteries": [{"name": "...", "exams": [{"title": "...", "time_limit_minutes": 30,
+        "sort_order": 1, "questions": [
+            {"type": "mcq", "text": "...", "choices": [{"text": "...", "correct": true}, ...]},
+            {"type": "truefalse", "text": "...", "answer": true},
+            {"type": "likert", "text": "...", "scale": "5-point"},
+            {"type": "essay", "text": "...", "explanation": ""}]}]}]}
+
+CSV and XLSX hold the same tree flattened to one row per question, with the
+columns in FLAT_COLUMNS. MCQ choices are "|"-separated and correct ones carry
+a leading "*". Likert scales are referenced by name. They must already exist
+or be defined in a JSON import, and an existing scale of the same name is
+reused. Essay images are not part of a bank.
+
+`import_bank` first validates the whole document in memory. Nothing is
+written unless every row is valid, and ItemBankError lists all problems at
+once. It then inserts everything inside one transaction with chunked
+bulk_create: batteries, exams, each question table, choices and the Item
+registry rows that signals would otherwise add one at a time. Query count
+depends on the number of chunks, not items. A 5,000-item bank is a few dozen
+INSERTs. Each Item records the question's place in the file, which the exam
+page sorts by. `export_bank` reads a set of batteries back with one query per
+table, in that same order.
+
+XLSX needs openpyxl (optional).
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from .catalog import bump_battery_version, bump_likert_version, question_order
+from .models import (
+    EssayQuestion, Exam, Item, LikertOption, LikertQuestion, LikertScale, MCQChoice, MCQQuestion,
+    TestBattery, TFChoice, TrueFalseQuestion,
+)
+
+try:
+    import openpyxl
+except ImportError:  # optional: JSON and CSV work without it
+    openpyxl = None
+
+FORMAT = "jjt-itembank"
+VERSION = 1
+BATCH_SIZE = 1000
+FORMATS = ("json", "csv", "xlsx")
+QUESTION_TYPES = ("mcq", "truefalse", "likert", "essay")
+FLAT_COLUMNS = [
+    "battery", "exam", "time_limit_minutes", "sort_order",
+    "type", "text", "choices", "answer", "scale", "explanation",
+]
+# question type -> (model, Item kind, text field)
+QUESTION_MODELS = {
+    "mcq": (MCQQuestion, Item.MCQ, "question_text"),
+    "truefalse": (TrueFalseQuestion, Item.TRUEFALSE, "question_text"),
+    "likert": (LikertQuestion, Item.LIKERT, "text"),
+    "essay": (EssayQuestion, Item.ESSAY, "text"),
+}
+MAX_ERRORS = 50
+
+
+class ItemBankError(ValueError):
+    """Every validation problem of a bank, as "where: what" strings."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        more = f" (+{len(errors) - MAX_ERRORS} more)" if len(errors) > MAX_ERRORS else ""
+        super().__init__("; ".join(errors[:MAX_ERRORS]) + more)
+
+
+def xlsx_available():
+    return openpyxl is not None
+
+
+def guess_format(filename):
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return ext if ext in FORMATS else "json"
+
+
+# ------------------------------------------------------------------ reading
+
+def _bool(value):
+    text = str(value).strip().lower()
+    if text in ("true", "t", "1", "yes", "y"):
+        return True
+    if text in ("false", "f", "0", "no", "n"):
+        return False
+    return None
+
+
+def _int_or_none(value):
+    if value in (None, ""):
+        return None
+    return int(float(value))  # XLSX cells come back as floats
+
+
+def _parse_choices(cell):
+    choices = []
+    for part in str(cell or "").split("|"):
+        part = part.strip()
+        if part:
+            correct = part.startswith("*")
+            choices.append({"text": part[1:].strip() if correct else part, "correct": correct})
+    return choices
+
+
+def _tree_from_rows(rows):
+    """Rebuild the JSON tree from flat rows ({column: value}); row numbers go into _where."""
+    batteries = {}
+    for number, row in rows:
+        row = {k: ("" if row.get(k) is None else row.get(k)) for k in FLAT_COLUMNS}
+        battery = batteries.setdefault(str(row["battery"]).strip(), {"name": str(row["battery"]).strip(), "exams": {}})
+        title = str(row["exam"]).strip()
+        exam = battery["exams"].setdefault(title, {
+            "title": title, "time_limit_minutes": row["time_limit_minutes"],
+            "sort_order": row["sort_order"], "questions": [],
+        })
+        q = {"type": str(row["type"]).strip().lower(), "text": str(row["text"]), "_where": f"row {number}"}
+        if q["type"] == "mcq":
+            q["choices"] = _parse_choices(row["choices"])
+        elif q["type"] == "truefalse":
+            q["answer"] = row["answer"]
+        elif q["type"] == "likert":
+            q["scale"] = str(row["scale"]).strip()
+        elif q["type"] == "essay":
+            q["explanation"] = str(row["explanation"])
+        exam["questions"].append(q)
+    return {
+        "format": FORMAT, "version": VERSION, "likert_scales": [],
+        "batteries": [{**b, "exams": list(b["exams"].values())} for b in batteries.values()],
+    }
+
+
+def read_bank(data, fmt):
+    """Document tree from raw bytes in `fmt` (json, csv or xlsx); raises ItemBankError."""
+    if fmt == "json":
+        try:
+            tree = json.loads(data.decode("utf-8-sig") if isinstance(data, bytes) else data)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ItemBankError([f"file: not valid JSON ({e})"])
+        if not isinstance(tree, dict) or tree.get("format") != FORMAT:
+            raise ItemBankError([f'file: not a {FORMAT} document (missing "format": "{FORMAT}")'])
+        return tree
+    if fmt == "csv":
+        text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+        reader = csv.DictReader(io.StringIO(text))
+        missing = set(FLAT_COLUMNS) - set(reader.fieldnames or [])
+        if missing:
+            raise ItemBankError([f"header: missing column(s) {', '.join(sorted(missing))}"])
+        return _tree_from_rows((n, row) for n, row in enumerate(reader, start=2))
+    if fmt == "xlsx":
+        if openpyxl is None:
+            raise ItemBankError(["file: XLSX needs openpyxl (pip install openpyxl)"])
+        sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True).worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(c or "").strip() for c in next(rows, [])]
+        missing = set(FLAT_COLUMNS) - set(header)
+        if missing:
+            raise ItemBankError([f"header: missing column(s) {', '.join(sorted(missing))}"])
+        return _tree_from_rows(
+            (n, dict(zip(header, values))) for n, values in enumerate(rows, start=2) if any(v not in (None, "") for v in values)
+        )
+    raise ItemBankError([f"file: unknown format {fmt!r} (use one of {', '.join(FORMATS)})"])
+
+
+# --------------------------------------------------------------- validation
+
+def _check_len(errors, where, label, value, limit):
+    if len(value) > limit:
+        errors.append(f"{where}: {label} longer than {limit} characters")
+
+
+def _objects(errors, where, value):
+    """(index, entry) for the object entries of a list field; anything else is an error."""
+    if value in (None, ""):
+        return []
+    if not isinstance(value, list):
+        errors.append(f"{where}: must be a list")
+        return []
+    entries = []
+    for i, entry in enumerate(value):
+        if isinstance(entry, dict):
+            entries.append((i, entry))
+        else:
+            errors.append(f"{where}[{i}]: must be an object")
+    return entries
+
+
+def validate_bank(tree):
+    """
+    Normalized (scales, batteries) from a document tree; raises ItemBankError
+    with every problem found. Touches the database once, for the scale names.
+    """
+    errors = []
+    scales = {}
+    for i, s in _objects(errors, "likert_scales", tree.get("likert_scales")):
+        where = f"likert_scales[{i}]"
+        name = str(s.get("name") or "").strip()
+        if not name:
+            errors.append(f"{where}: name is required")
+            continue
+        _check_len(errors, where, "name", name, 100)
+        options = []
+        for j, o in _objects(errors, f"{where}.options", s.get("options")):
+            try:
+                options.append((str(o["label"]).strip()[:100], int(o["value"])))
+            except (KeyError, TypeError, ValueError):
+                errors.append(f"{where}.options[{j}]: needs a label and an integer value")
+        if not options:
+            errors.append(f"{where}: at least one option is required")
+        scales[name] = {"name": name, "description": str(s.get("description") or ""), "options": options}
+
+    known_scales = set(scales) | set(LikertScale.objects.values_list("name", flat=True))
+    batteries = []
+    raw_batteries = tree.get("batteries")
+    if not isinstance(raw_batteries, list) or not raw_batteries:
+        errors.append("batteries: at least one battery is required")
+        raw_batteries = []
+
+    for bi, b in _objects(errors, "batteries", raw_batteries):
+        bwhere = f"batteries[{bi}]"
+        name = str(b.get("name") or "").strip()
+        if not name:
+            errors.append(f"{bwhere}: name is required")
+        _check_len(errors, bwhere, "name", name, 200)
+        exams = []
+        for ei, e in _objects(errors, f"{bwhere}.exams", b.get("exams")):
+            ewhere = f"{bwhere}.exams[{ei}]"
+            title = str(e.get("title") or "").strip()
+            if not title:
+                errors.append(f"{ewhere}: title is required")
+            _check_len(errors, ewhere, "title", title, 200)
+            try:
+                time_limit = _int_or_none(e.get("time_limit_minutes"))
+                sort_order = _int_or_none(e.get("sort_order"))
+            except (TypeError, ValueError):
+                errors.append(f"{ewhere}: time_limit_minutes and sort_order must be integers")
+                time_limit = sort_order = None
+            if sort_order is not None and sort_order < 0:
+                errors.append(f"{ewhere}: sort_order must not be negative")
+            questions = []
+            for qi, q in _objects(errors, f"{ewhere}.questions", e.get("questions")):
+                where = q.get("_where") or f"{ewhere}.questions[{qi}]"
+                qtype = str(q.get("type") or "").strip().lower()
+                text = str(q.get("text") or "").strip()
+                if qtype not in QUESTION_TYPES:
+                    errors.append(f"{where}: type must be one of {', '.join(QUESTION_TYPES)}")
+                    continue
+                if not text:
+                    errors.append(f"{where}: text is required")
+                item = {"type": qtype, "text": text}
+                if qtype == "mcq":
+                    choices = [
+                        (str(c.get("text") or "").strip(), _bool(c.get("correct", False)) is True)
+                        for _, c in _objects(errors, f"{where}.choices", q.get("choices"))
+                    ]
+                    if not choices or any(not t for t, _ in choices):
+                        errors.append(f"{where}: MCQ needs at least one choice, none of them empty")
+                    elif not any(correct for _, correct in choices):
+                        errors.append(f"{where}: at least one choice must be marked correct")
+                    for t, _ in choices:
+                        _check_len(errors, where, "choice text", t, 200)
+                    item["choices"] = choices
+                elif qtype == "truefalse":
+                    answer = q.get("answer")
+                    item["answer"] = None if answer in (None, "") else _bool(answer)
+                    if answer not in (None, "") and item["answer"] is None:
+                        errors.append(f"{where}: answer must be true or false")
+                elif qtype == "likert":
+                    scale = str(q.get("scale") or "").strip()
+                    if scale not in known_scales:
+                        errors.append(f"{where}: unknown Likert scale {scale!r}")
+                    item["scale"] = scale
+                else:
+                    item["explanation"] = str(q.get("explanation") or "")
+                questions.append(item)
+            exams.append({"title": title, "time_limit_minutes": time_limit,
+                          "sort_order": ei if sort_order is None else sort_order, "questions": questions})
+        batteries.append({"name": name, "exams": exams})
+
+    if errors:
+        raise ItemBankError(errors)
+    return scales, batteries
+
+
+# ------------------------------------------------------------------- import
+
+def import_bank(tree, dry_run=False):
+    """
+    Validate, then create every battery in `tree` in one transaction. Returns
+    {"batteries": n, "exams": n, "questions": n, "choices": n, "scales": n}.
+    Raises ItemBankError without writing anything if the bank is invalid.
+    """
+    scales, batteries = validate_bank(tree)
+    stats = {
+        "batteries": len(batteries),
+        "exams": sum(len(b["exams"]) for b in batteries),
+        "questions": sum(len(e["questions"]) for b in batteries for e in b["exams"]),
+        "choices": sum(len(q.get("choices", ())) for b in batteries for e in b["exams"] for q in e["questions"]),
+        "scales": 0,
+    }
+    if dry_run:
+        return stats
+    if not connection.features.can_return_rows_from_bulk_insert:
+        raise ImproperlyConfigured("Item bank import needs a database that returns ids from bulk inserts.")
+
+    with transaction.atomic():
+        scale_ids = dict(LikertScale.objects.filter(name__in=list(scales) + [
+            q["scale"] for b in batteries for e in b["exams"] for q in e["questions"] if q["type"] == "likert"
+        ]).values_list("name", "id"))
+        new_scales = [s for name, s in scales.items() if name not in scale_ids]
+        if new_scales:
+            created = LikertScale.objects.bulk_create(
+                [LikertScale(name=s["name"], description=s["description"]) for s in new_scales], batch_size=BATCH_SIZE
+            )
+            LikertOption.objects.bulk_create([
+                LikertOption(scale=scale, label=label, value=value)
+                for scale, s in zip(created, new_scales) for label, value in s["options"]
+            ], batch_size=BATCH_SIZE)
+            scale_ids.update((s.name, s.id) for s in created)
+            stats["scales"] = len(created)
+
+        battery_objs = TestBattery.objects.bulk_create(
+            [TestBattery(name=b["name"]) for b in batteries], batch_size=BATCH_SIZE
+        )
+        exam_rows = [(battery, e) for battery, b in zip(battery_objs, batteries) for e in b["exams"]]
+        exam_objs = Exam.objects.bulk_create([
+            Exam(battery=battery, title=e["title"], time_limit_minutes=e["time_limit_minutes"], sort_order=e["sort_order"])
+            for battery, e in exam_rows
+        ], batch_size=BATCH_SIZE)
+
+        by_type = defaultdict(list)  # type -> [(exam, position, question dict)]
+        for exam, (_, e) in zip(exam_objs, exam_rows):
+            for position, q in enumerate(e["questions"]):
+                by_type[q["type"]].append((exam, position, q))
+
+        created = {}
+        for qtype, (model, _kind, text_field) in QUESTION_MODELS.items():
+            objs = []
+            for exam, _position, q in by_type[qtype]:
+                fields = {"exam": exam, text_field: q["text"]}
+                if qtype == "likert":
+                    fields["scale_id"] = scale_ids[q["scale"]]
+                elif qtype == "essay":
+                    fields["explanation"] = q["explanation"]
+                objs.append(model(**fields))
+            created[qtype] = model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+        MCQChoice.objects.bulk_create([
+            MCQChoice(question=question, choice_text=text, is_correct=correct)
+            for question, (_, _, q) in zip(created["mcq"], by_type["mcq"]) for text, correct in q["choices"]
+        ], batch_size=BATCH_SIZE)
+        TFChoice.objects.bulk_create([
+            TFChoice(question=question, choice_text=label, is_correct=q["answer"] is value)
+            for question, (_, _, q) in zip(created["truefalse"], by_type["truefalse"])
+            for label, value in (("True", True), ("False", False))
+        ], batch_size=BATCH_SIZE)
+
+        # bulk_create skips the post_save signal that registers each question. As
+        # there, an orphaned Item left by a deleted question with a reused pk is
+        # taken over. The position keeps the file's question order across types.
+        Item.objects.bulk_create([
+            Item(exam_id=question.exam_id, kind=kind, source_id=question.pk, position=position)
+            for qtype, (_model, kind, _text) in QUESTION_MODELS.items()
+            for question, (_, position, _) in zip(created[qtype], by_type[qtype])
+        ], batch_size=BATCH_SIZE, update_conflicts=True, unique_fields=["kind", "source_id"],
+            update_fields=["exam", "position"])
+
+        battery_ids = [b.id for b in battery_objs]
+        transaction.on_commit(lambda: [bump_battery_version(i) for i in battery_ids])
+        if new_scales:
+            transaction.on_commit(bump_likert_version)
+    return stats
+
+
+# ------------------------------------------------------------------- export
+
+def export_bank(batteries):
+    """Document tree for a TestBattery queryset or list, one query per table."""
+    batteries = list(batteries)
+    exams = list(Exam.objects.filter(battery__in=batteries).order_by("battery_id", "sort_order", "id"))
+    exam_ids = [e.id for e in exams]
+
+    questions = defaultdict(list)  # exam_id -> [(id, question dict)]
+    mcq_choices = defaultdict(list)
+    for c in MCQChoice.objects.filter(question__exam_id__in=exam_ids).order_by("id"):
+        mcq_choices[c.question_id].append({"text": c.choice_text, "correct": c.is_correct})
+    tf_answers = {}
+    for question_id, label in TFChoice.objects.filter(
+        question__exam_id__in=exam_ids, is_correct=True
+    ).values_list("question_id", "choice_text"):
+        tf_answers[question_id] = label == "True"
+
+    positions = {
+        (kind, source_id): position
+        for kind, source_id, position in Item.objects.filter(exam_id__in=exam_ids, position__isnull=False)
+        .values_list("kind", "source_id", "position")
+    }
+
+    scale_ids = set()
+    for qtype, (model, kind, text_field) in QUESTION_MODELS.items():
+        for q in model.objects.filter(exam_id__in=exam_ids).order_by("id"):
+            item = {"type": qtype, "text": getattr(q, text_field)}
+            if qtype == "mcq":
+                item["choices"] = mcq_choices.get(q.id, [])
+            elif qtype == "truefalse":
+                item["answer"] = tf_answers.get(q.id)
+            elif qtype == "likert":
+                item["scale"] = q.scale_id
+                scale_ids.add(q.scale_id)
+            else:
+                item["explanation"] = q.explanation
+            questions[q.exam_id].append((question_order(positions, kind, q.id), item))
+
+    options = defaultdict(list)
+    for o in LikertOption.objects.filter(scale_id__in=scale_ids).order_by("-value", "id"):
+        options[o.scale_id].append({"label": o.label, "value": o.value})
+    scales = {s.id: s for s in LikertScale.objects.filter(id__in=scale_ids)}
+    for items in questions.values():
+        for _, item in items:
+            if item["type"] == "likert":
+                item["scale"] = scales[item["scale"]].name
+
+    by_battery = defaultdict(list)
+    for e in exams:
+        by_battery[e.battery_id].append({
+            "title": e.title, "time_limit_minutes": e.time_limit_minutes, "sort_order": e.sort_order,
+            # the exam page's order: imported position, then id across types
+            "questions": [item for _, item in sorted(questions[e.id], key=lambda pair: pair[0])],
+        })
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "likert_scales": [
+            {"name": s.name, "description": s.description, "options": options[s.id]}
+            for s in sorted(scales.values(), key=lambda s: s.name)
+        ],
+        "batteries": [{"name": b.name, "exams": by_battery[b.id]} for b in batteries],
+    }
+
+
+def _flat_rows(tree):
+    for b in tree["batteries"]:
+        for e in b["exams"]:
+            for q in e["questions"]:
+                yield [
+                    b["name"], e["title"], e["time_limit_minutes"], e["sort_order"], q["type"], q["text"],
+                    "|".join(("*" if c["correct"] else "") + c["text"] for c in q.get("choices", [])),
+                    "" if q.get("answer") is None else str(q["answer"]).lower(),
+                    q.get("scale", ""), q.get("explanation", ""),
+                ]
+
+
+def write_bank(tree, fmt):
+    """Serialize a document tree to bytes in `fmt`."""
+    if fmt == "json":
+        return json.dumps(tree, ensure_ascii=False, indent=2).encode("utf-8")
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(FLAT_COLUMNS)
+        writer.writerows(_flat_rows(tree))
+        return buf.getvalue().encode("utf-8-sig")  # BOM so Excel reads UTF-8
+    if fmt == "xlsx":
+        if openpyxl is None:
+            raise ItemBankError(["file: XLSX needs openpyxl (pip install openpyxl)"])
+        book = openpyxl.Workbook(write_only=True)
+        sheet = book.create_sheet("items")
+        sheet.append(FLAT_COLUMNS)
+        for row in _flat_rows(tree):
+            sheet.append(row)
+        buf = io.BytesIO()
+        book.save(buf)
+        return buf.getvalue()
+    raise ItemBankError([f"file: unknown format {fmt!r} (use one of {', '.join(FORMATS)})"])
+
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
@@ -0,0 +1,123 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from accounts.models import ExamineeAccount
+from exams.fragments import (
+    answer_overlay, fragment_key, fragment_version, question_blocks, render_question_blocks,
+)
+from exams.models import (
+    EssayQuestion, Exam, LikertOption, LikertQuestion, LikertScale, MCQChoice, MCQQuestion,
+    TestBattery, TrueFalseQuestion,
+)
+from exams.views import _collect_questions
+
+BENCH_BATTERY = "__render_benchmark__"
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the exam page for one large exam: question markup rendered per request "
+        "(cache cold, what every request used to pay) versus the cached fragment plus "
+        "the per-examinee answer overlay."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=200, help="Questions on the page")
+        parser.add_argument("--runs", type=int, default=20, help="Timed renders per variant")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark fixtures and exit")
+
+    def handle(self, *args, **opts):
+        if opts["cleanup"]:
+            TestBattery.objects.filter(name=BENCH_BATTERY).delete()
+            LikertScale.objects.filter(name=BENCH_BATTERY).delete()
+            self.stdout.write("Benchmark fixtures removed.")
+            return
+
+        exam, examinee = self._fixtures(opts["items"])
+        questions = _collect_questions(exam)
+        session = {f"answer_{q.id}": "1" for q in questions[::2]}  # half answered
+
+        def cold_fragment():
+            render_question_blocks(questions)
+
+        def warm_fragment():
+            question_blocks(exam, questions)
+            answer_overlay(session, questions)
+
+        client = Client(HTTP_HOST="localhost")
+        s = client.session
+        s["examinee_id"] = examinee.id
+        s["battery_id"] = exam.battery_id
+        s.update(session)
+        s.save()
+
+        def cold_page():
+            cache.delete(fragment_key(exam.id), version=fragment_version(exam.id))
+            client.get("/exams/?exam=0")
+
+        def warm_page():
+            client.get("/exams/?exam=0")
+
+        client.get("/exams/?exam=0")  # open the attempt, warm the catalog
+        rows = [
+            ("fragment, rendered", self._time(cold_fragment, opts["runs"])),
+            ("fragment, cached", self._time(warm_fragment, opts["runs"])),
+            ("page, cache cold", self._time(cold_page, opts["runs"])),
+            ("page, cache warm", self._time(warm_page, opts["runs"])),
+        ]
+        self.stdout.write(f"questions       {len(questions)}")
+        for label, ms in rows:
+            self.stdout.write(f"{label:<18} median {ms:8.2f} ms")
+        self.stdout.write(f"fragment speedup  {rows[0][1] / rows[1][1]:.1f}x")
+        self.stdout.write(f"page speedup      {rows[2][1] / rows[3][1]:.1f}x")
+
+    @staticmethod
+    def _time(fn, runs):
+        samples = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(samples)
+
+    def _fixtures(self, items):
+        """One exam with `items` questions across all four types (reused between runs)."""
+        battery, _ = TestBattery.objects.get_or_create(name=BENCH_BATTERY)
+        exam, _ = Exam.objects.get_or_create(battery=battery, title="Render benchmark")
+        scale, created = LikertScale.objects.get_or_create(name=BENCH_BATTERY)
+        if created:
+            for value in range(1, 8):
+                LikertOption.objects.create(scale=scale, value=value, label=f"Point {value}")
+
+        have = sum(
+            model.objects.filter(exam=exam).count()
+            for model in (LikertQuestion, MCQQuestion, TrueFalseQuestion, EssayQuestion)
+        )
+        for n in range(have, items):
+            kind = n % 4
+            if kind == 0:
+                LikertQuestion.objects.create(exam=exam, text=f"Statement {n + 1}", scale=scale)
+            elif kind == 1:
+                q = MCQQuestion.objects.create(exam=exam, question_text=f"Question {n + 1}")
+                MCQChoice.objects.bulk_create(
+                    [MCQChoice(question=q, choice_text=f"Option {c + 1}") for c in range(4)]
+                )
+            elif kind == 2:
+                TrueFalseQuestion.objects.create(exam=exam, question_text=f"Claim {n + 1}")
+            else:
+                EssayQuestion.objects.create(exam=exam, text=f"Prompt {n + 1}")
+
+        today = date.today()
+        examinee, _ = ExamineeAccount.objects.get_or_create(
+            username=f"bench_render_{battery.id}",
+            defaults=dict(
+                password="!", test_battery=battery, first_name="Bench", last_name="Render", gender="Male",
+                expiration_from=today, expiration_to=today + timedelta(days=1),
+            ),
+        )
+        return exam, examinee
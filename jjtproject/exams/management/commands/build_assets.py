@@ -0,0 +1,48 @@
+import gzip
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.assets import BUNDLES, brotli, build_bundle, output_dir, rjsmin
+
+
+def _kb(n):
+    return f"{n / 1024:.1f} KB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the purged, minified CSS/JS bundles of exams.assets.BUNDLES into "
+        "static/bundles/. Run before collectstatic, which hashes them and writes "
+        "their .gz/.br copies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("bundles", nargs="*", help="Bundle names (default: all)")
+
+    def handle(self, *args, **opts):
+        names = opts["bundles"] or list(BUNDLES)
+        unknown = set(names) - set(BUNDLES)
+        if unknown:
+            raise CommandError(f"Unknown bundle(s): {', '.join(sorted(unknown))}")
+        if rjsmin is None:
+            self.stderr.write("rjsmin is not installed: unminified JS sources are bundled as they are.")
+        if brotli is None:
+            self.stderr.write("brotli is not installed: collectstatic will write gzip copies only.")
+
+        try:
+            out = output_dir()
+            built = {name: build_bundle(name) for name in names}
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        for name in names:
+            for kind, (source_bytes, bundle_bytes) in built[name].items():
+                data = (out / f"{name}.{kind}").read_bytes()
+                line = (
+                    f"{name}.{kind}: {_kb(source_bytes)} sources -> {_kb(bundle_bytes)}, "
+                    f"gzip {_kb(len(gzip.compress(data, 9)))}"
+                )
+                if brotli is not None:
+                    line += f", brotli {_kb(len(brotli.compress(data, quality=11)))}"
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"Bundles written to {out}. Now run collectstatic."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from exams.catalog import bump_exam_version
+from exams.images import build_derivatives
+from exams.models import EssayQuestion
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP/JPEG derivatives of essay question images that do "
+        "not have them yet (uploads from before exams/images.py), or of all images "
+        "with --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild every image")
+
+    def handle(self, *args, **opts):
+        built = failed = 0
+        exams = set()
+        for q in EssayQuestion.objects.exclude(image="").exclude(image__isnull=True).iterator():
+            if not opts["force"] and (q.image_variants or {}).get("source") == q.image.name:
+                continue
+            try:
+                variants = build_derivatives(q.image)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f"Question {q.pk} ({q.image.name}): {e}")
+                continue
+            EssayQuestion.objects.filter(pk=q.pk).update(image_variants=variants)
+            exams.add(q.exam_id)
+            built += 1
+        for exam_id in exams:
+            bump_exam_version(exam_id)
+        self.stdout.write(f"{built} image(s) processed, {failed} failed.")
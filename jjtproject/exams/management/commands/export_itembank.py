@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.itembank import ItemBankError, export_bank, guess_format, write_bank
+from exams.models import TestBattery
+
+
+class Command(BaseCommand):
+    help = "Export test batteries (all, or --battery ID ...) as an item bank file: JSON, CSV or XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--battery", type=int, action="append", dest="batteries", help="Battery id (repeatable)")
+        parser.add_argument("-o", "--output", help="File to write (default: stdout, JSON/CSV only)")
+        parser.add_argument("--format", choices=["json", "csv", "xlsx"], help="Default: from --output's extension")
+
+    def handle(self, *args, **opts):
+        batteries = TestBattery.objects.order_by("id")
+        if opts["batteries"]:
+            batteries = batteries.filter(id__in=opts["batteries"])
+        fmt = opts["format"] or (guess_format(opts["output"]) if opts["output"] else "json")
+        if fmt == "xlsx" and not opts["output"]:
+            raise CommandError("XLSX needs --output.")
+        try:
+            data = write_bank(export_bank(batteries), fmt)
+        except ItemBankError as e:
+            raise CommandError(str(e))
+        if opts["output"]:
+            Path(opts["output"]).write_bytes(data)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {opts['output']} ({len(data)} bytes)."))
+        else:
+            sys.stdout.buffer.write(data)
@@ -0,0 +1,43 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from exams.itembank import ItemBankError, guess_format, import_bank, read_bank
+
+
+class Command(BaseCommand):
+    help = (
+        "Import whole test batteries from an item bank file (JSON, CSV or XLSX; "
+        "see exams/itembank.py). The file is validated in full before anything "
+        "is written, then loaded in one transaction with chunked bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["json", "csv", "xlsx"], help="Default: from the file extension")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report, write nothing")
+
+    def handle(self, *args, **opts):
+        path = Path(opts["path"])
+        if not path.is_file():
+            raise CommandError(f"No such file: {path}")
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                stats = import_bank(read_bank(path.read_bytes(), opts["format"] or guess_format(path.name)),
+                                    dry_run=opts["dry_run"])
+        except ItemBankError as e:
+            for error in e.errors:
+                self.stderr.write(error)
+            raise CommandError(f"{len(e.errors)} problem(s); nothing was imported.")
+
+        verb = "Validated" if opts["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['batteries']} battery(ies), {stats['exams']} exam(s), "
+            f"{stats['questions']} question(s), {stats['choices']} MCQ choice(s), "
+            f"{stats['scales']} new Likert scale(s) in {time.perf_counter() - started:.2f}s "
+            f"({len(queries)} queries)."
+        ))
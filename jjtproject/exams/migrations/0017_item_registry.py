@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# (kind code, question model) — matches exams.models.Item
+ITEM_SOURCES = [
+    (1, 'LikertQuestion'),
+    (2, 'MCQQuestion'),
+    (3, 'EssayQuestion'),
+    (4, 'TrueFalseQuestion'),
+]
+
+
+def register_existing_questions(apps, schema_editor):
+    Item = apps.get_model('exams', 'Item')
+    for kind, model_name in ITEM_SOURCES:
+        Question = apps.get_model('exams', model_name)
+        Item.objects.bulk_create(
+            [
+                Item(exam_id=exam_id, kind=kind, source_id=pk)
+                for pk, exam_id in Question.objects.values_list('id', 'exam_id').iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0016_alter_exam_options_exam_sort_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Item',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Likert'), (2, 'MCQ'), (3, 'Essay'), (4, 'True/False')])),
+                ('source_id', models.PositiveIntegerField()),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='exams.exam')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam', 'kind'], name='exams_item_exam_id_772f81_idx')],
+                'unique_together': {('kind', 'source_id')},
+            },
+        ),
+        migrations.RunPython(register_existing_questions, migrations.RunPython.noop),
+    ]
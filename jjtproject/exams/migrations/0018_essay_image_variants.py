@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='essayquestion',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
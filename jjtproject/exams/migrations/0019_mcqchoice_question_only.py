@@ -0,0 +1,64 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def attach_orphan_choices(apps, schema_editor):
+    """
+    Choices saved before MCQChoice.question existed only carry copies of their
+    exam and question text. Attach them to the matching question, creating it
+    when there is none, so nothing is lost when the copies are dropped.
+    """
+    MCQChoice = apps.get_model('exams', 'MCQChoice')
+    MCQQuestion = apps.get_model('exams', 'MCQQuestion')
+    questions = {}
+    for choice in MCQChoice.objects.filter(question__isnull=True).order_by('id'):
+        key = (choice.exam_id, choice.question_text)
+        if key not in questions:
+            questions[key] = (
+                MCQQuestion.objects.filter(exam_id=choice.exam_id, question_text=choice.question_text).order_by('id').first()
+                or MCQQuestion.objects.create(exam_id=choice.exam_id, question_text=choice.question_text)
+            )
+        choice.question = questions[key]
+        choice.save(update_fields=['question'])
+
+
+def copy_question_fields(apps, schema_editor):
+    MCQChoice = apps.get_model('exams', 'MCQChoice')
+    MCQQuestion = apps.get_model('exams', 'MCQQuestion')
+    for question in MCQQuestion.objects.all():
+        MCQChoice.objects.filter(question=question).update(exam_id=question.exam_id, question_text=question.question_text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0018_essay_image_variants'),
+    ]
+
+    operations = [
+        # Relaxed first so that migrating back can re-add and refill them.
+        migrations.AlterField(
+            model_name='mcqchoice',
+            name='exam',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='exams.exam'),
+        ),
+        migrations.AlterField(
+            model_name='mcqchoice',
+            name='question_text',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(attach_orphan_choices, copy_question_fields),
+        migrations.AlterField(
+            model_name='mcqchoice',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='choices', to='exams.mcqquestion'),
+        ),
+        migrations.RemoveField(
+            model_name='mcqchoice',
+            name='exam',
+        ),
+        migrations.RemoveField(
+            model_name='mcqchoice',
+            name='question_text',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0019_mcqchoice_question_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
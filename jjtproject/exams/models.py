@@ -36,7 +36,8 @@ class EssayQuestion(models.Model):
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
     text = models.TextField()
     image = models.ImageField(upload_to='question_images/', null=True, blank=True)
-        
+    # resized WebP/JPEG copies of `image`, built on upload (exams/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     explanation = models.TextField(blank=True, help_text="Optional explanation for evaluators or students.")  # ✅ New field
 
     def __str__(self):
@@ -58,16 +59,13 @@ class MCQQuestion(models.Model):
 
 
 class MCQChoice(models.Model):
-    exam = models.ForeignKey('Exam', on_delete=models.CASCADE)
-    question_text = models.TextField()
+    # the exam and question text are read through `question`, never copied here
     choice_text = models.CharField(max_length=200)
     is_correct = models.BooleanField(default=False)
     question = models.ForeignKey(
         'MCQQuestion',
         on_delete=models.CASCADE,
         related_name='choices',  # ✅ Add this line
-        null=True,
-        blank=True
     )
 
     def __str__(self):
@@ -115,3 +113,60 @@ class LikertQuestion(models.Model):
 
 
 
+class Item(models.Model):
+    """
+    Registry row for every question, whatever its type table.
+
+    Answers point here (one small FK) instead of carrying a qtype string plus
+    the question's PK in its own table. Kept in sync by exams/signals.py; items
+    are not deleted with their question so old answers keep their key.
+    """
+    LIKERT = 1
+    MCQ = 2
+    ESSAY = 3
+    TRUEFALSE = 4
+    KIND_CHOICES = [
+        (LIKERT, "Likert"),
+        (MCQ, "MCQ"),
+        (ESSAY, "Essay"),
+        (TRUEFALSE, "True/False"),
+    ]
+    # Legacy qtype strings (question model names) used by forms, templates and the JSON API
+    QTYPE_TO_KIND = {
+        "likertquestion": LIKERT,
+        "mcqquestion": MCQ,
+        "essayquestion": ESSAY,
+        "truefalsequestion": TRUEFALSE,
+    }
+    KIND_TO_QTYPE = {v: k for k, v in QTYPE_TO_KIND.items()}
+
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="items")
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    source_id = models.PositiveIntegerField()  # PK in the question table for `kind`
+    # Place in the exam as given by an item-bank import (exams/itembank.py). The
+    # question tables have separate id sequences, so id order cannot keep a
+    # mixed-type file order. Questions without a position follow, by id.
+    position = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["exam", "kind"]),
+        ]
+        unique_together = (("kind", "source_id"),)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.source_id}"
+
+    @property
+    def qtype(self):
+        return self.KIND_TO_QTYPE[self.kind]
+
+    @classmethod
+    def source_models(cls):
+        """{kind: question model}"""
+        return {
+            cls.LIKERT: LikertQuestion,
+            cls.MCQ: MCQQuestion,
+            cls.ESSAY: EssayQuestion,
+            cls.TRUEFALSE: TrueFalseQuestion,
+        }
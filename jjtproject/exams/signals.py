@@ -0,0 +1,112 @@
+# exams/signals.py
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from PIL import Image
+
+from .catalog import bump_battery_version, bump_exam_version, bump_likert_version
+from .images import build_derivatives, delete_derivatives
+from .models import EssayQuestion, Exam, Item, LikertOption, LikertScale, MCQChoice, MCQQuestion
+
+log = logging.getLogger(__name__)
+
+QUESTION_KINDS = {model: kind for kind, model in Item.source_models().items()}
+
+
+@receiver(pre_save, sender=Exam)
+def _remember_old_battery(sender, instance, **kwargs):
+    # An exam moved to another battery must also drop out of the old list.
+    instance._old_battery_id = None
+    if instance.pk:
+        instance._old_battery_id = (
+            Exam.objects.filter(pk=instance.pk).values_list("battery_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Exam)
+def _exam_saved(sender, instance, **kwargs):
+    bump_battery_version(instance.battery_id)
+    old = getattr(instance, "_old_battery_id", None)
+    if old and old != instance.battery_id:
+        bump_battery_version(old)
+
+
+@receiver(post_delete, sender=Exam)
+def _exam_deleted(sender, instance, **kwargs):
+    bump_battery_version(instance.battery_id)
+
+
+def _question_saved(sender, instance, **kwargs):
+    item, created = Item.objects.get_or_create(
+        kind=QUESTION_KINDS[sender], source_id=instance.pk, defaults={"exam_id": instance.exam_id}
+    )
+    if not created and item.exam_id != instance.exam_id:
+        bump_exam_version(item.exam_id)
+        item.exam_id = instance.exam_id
+        item.position = None  # its imported place was in the old exam
+        item.save(update_fields=["exam", "position"])
+    bump_exam_version(instance.exam_id)
+
+
+def _question_deleted(sender, instance, **kwargs):
+    # The Item row stays so answers to the deleted question keep their key.
+    bump_exam_version(instance.exam_id)
+
+
+for _model in QUESTION_KINDS:
+    post_save.connect(_question_saved, sender=_model, dispatch_uid=f"item_registry_save_{_model.__name__}")
+    post_delete.connect(_question_deleted, sender=_model, dispatch_uid=f"item_registry_delete_{_model.__name__}")
+
+
+@receiver(post_save, sender=MCQChoice)
+@receiver(post_delete, sender=MCQChoice)
+def _choice_changed(sender, instance, **kwargs):
+    # Choices are part of the cached question markup (exams/fragments.py).
+    # A cascade from a deleted question finds nothing here; the question's own
+    # delete signal bumps the exam then.
+    bump_exam_version(
+        MCQQuestion.objects.filter(pk=instance.question_id).values_list("exam_id", flat=True).first()
+    )
+
+
+def _likert_changed(sender, instance, **kwargs):
+    bump_likert_version()
+
+
+for _model in (LikertScale, LikertOption):
+    post_save.connect(_likert_changed, sender=_model, dispatch_uid=f"likert_save_{_model.__name__}")
+    post_delete.connect(_likert_changed, sender=_model, dispatch_uid=f"likert_delete_{_model.__name__}")
+
+
+def _drop_derivatives(variants, pk, keep=()):
+    # derivatives are content-addressed: another question may use the same image
+    digest = variants.get("digest")
+    if digest and not EssayQuestion.objects.filter(image_variants__digest=digest).exclude(pk=pk).exists():
+        delete_derivatives(variants, keep=keep)
+
+
+@receiver(post_save, sender=EssayQuestion)
+def _essay_image_saved(sender, instance, **kwargs):
+    # Registered after _question_saved, so the bump below follows its bump.
+    old = instance.image_variants or {}
+    name = instance.image.name if instance.image else ""
+    if old.get("source", "") == name:
+        return
+    variants = {}
+    if name:
+        try:
+            variants = build_derivatives(instance.image)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            log.exception("Could not build derivatives of %s; the original will be served", name)
+    EssayQuestion.objects.filter(pk=instance.pk).update(image_variants=variants)
+    instance.image_variants = variants
+    if old:
+        _drop_derivatives(old, instance.pk, keep=variants.get("webp", []) + variants.get("jpeg", []))
+    bump_exam_version(instance.exam_id)  # the cached question markup holds the srcset
+
+
+@receiver(post_delete, sender=EssayQuestion)
+def _essay_image_deleted(sender, instance, **kwargs):
+    if instance.image_variants:
+        _drop_derivatives(instance.image_variants, instance.pk)
@@ -0,0 +1,107 @@
+# exams/storage.py
+"""
+Static file storage, and fallback views for static and media files.
+
+CompressedManifestStaticFilesStorage is Django's manifest storage: collectstatic
+writes content-hashed copies such as bundles/exam.3f2a9c1e.css, and
+`{% static %}` links to them (or to the plain name, for files never collected). This subclass also writes .gz/.br copies of
+every hashed text file. A web server can then send those directly
+(nginx: gzip_static / brotli_static) and cache them for a year, because a
+hashed name never changes content.
+
+`serve` does the same from Django, for installs with no web server in front
+of it. It is mounted when SERVE_STATIC is on. `serve_media` serves uploads
+the same way, with year-long caching for the content-addressed image
+derivatives (exams/images.py). It is mounted in DEBUG or with SERVE_MEDIA.
+Both send ETags, so a revalidation is a 304.
+"""
+import mimetypes
+import os
+import posixpath
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from .assets import compress
+from .images import DERIVED_DIR
+
+FAR_FUTURE = "public, max-age=31536000, immutable"
+SHORT = "public, max-age=300"
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # A page must not 500 because collectstatic has not run (tests, a fresh
+    # checkout): unknown names are linked unhashed. Broken bundles fail in
+    # build_assets and collectstatic instead.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:  # not in the manifest nor in STATIC_ROOT
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            compress(self.path(name))
+
+
+@lru_cache(maxsize=1)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+def _serve(request, root, path, cache_control):
+    """
+    A file under `root`, precompressed if the client accepts it, with an ETag and
+    Last-Modified so a revalidation costs a 304. cache_control(name) picks the header.
+    """
+    name = posixpath.normpath(path).lstrip("/")
+    try:
+        full = safe_join(root, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full):
+        raise Http404
+
+    accepted = request.headers.get("Accept-Encoding", "")
+    encoding = None
+    for token, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if token in accepted and os.path.isfile(full + suffix):
+            full, encoding = full + suffix, token
+            break
+
+    stat = os.stat(full)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Last-Modified": http_date(stat.st_mtime), "Vary": "Accept-Encoding",
+               "Cache-Control": cache_control(name)}
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = FileResponse(open(full, "rb"), content_type=mimetypes.guess_type(name)[0] or "application/octet-stream")
+        if encoding:
+            response["Content-Encoding"] = encoding
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+@require_GET
+def serve(request, path):
+    """STATIC_ROOT; hashed names are cached for a year."""
+    return _serve(request, settings.STATIC_ROOT, path, lambda name: FAR_FUTURE if name in _hashed_names() else SHORT)
+
+
+@require_GET
+def serve_media(request, path):
+    """MEDIA_ROOT; image derivatives are content-addressed and cached for a year."""
+    return _serve(request, settings.MEDIA_ROOT, path, lambda name: FAR_FUTURE if name.startswith(DERIVED_DIR + "/") else SHORT)
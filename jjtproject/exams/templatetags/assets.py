@@ -0,0 +1,21 @@
+# exams/templatetags/assets.py
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from exams.assets import bundle_path, bundle_sources, bundles_enabled
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name, kind, defer=False):
+    """
+    <link>/<script> tags for a bundle in exams.assets.BUNDLES: the built,
+    hashed file when ASSET_BUNDLES is on, its sources one by one otherwise.
+    """
+    paths = [bundle_path(name, kind)] if bundles_enabled() else bundle_sources(name, kind)
+    if kind == "css":
+        return format_html_join("\n", '<link rel="stylesheet" href="{}" />', ((static(p),) for p in paths))
+    tag = '<script src="{}" defer></script>' if defer else '<script src="{}"></script>'
+    return format_html_join("\n", tag, ((static(p),) for p in paths))
@@ -1,3 +1,139 @@
-from django.test import TestCase
+import tempfile
+from datetime import date
 
-# Create your tests here.
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import ExamineeAccount
+
+from exams.catalog import bump_exam_version, exam_item_map, exam_version
+from exams.itembank import FORMAT, ItemBankError, export_bank, import_bank
+from exams.models import Exam, MCQQuestion, TestBattery
+from exams.views import _collect_questions
+from responses.models import ExamAttempt
+
+
+class BundleWithoutCollectstaticTests(SimpleTestCase):
+    """Pages must render (unhashed links) before build_assets/collectstatic have run."""
+
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        settings = override_settings(STATIC_ROOT=static_root.name, DEBUG=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def render(self, source):
+        return Template("{% load assets %}" + source).render(Context())
+
+    @override_settings(ASSET_BUNDLES=True)
+    def test_built_bundle_links_plain_name(self):
+        self.assertIn('href="/static/bundles/exam.css"', self.render("{% bundle 'exam' 'css' %}"))
+
+    @override_settings(ASSET_BUNDLES=False)
+    def test_sources_link_plain_names(self):
+        self.assertIn('src="/static/js/exam_offline.js"', self.render("{% bundle 'exam' 'js' %}"))
+
+
+def bank(*batteries, **extra):
+    return {"format": FORMAT, "version": 1, "batteries": list(batteries), **extra}
+
+
+class ItemBankTests(TestCase):
+    def test_non_object_entries_are_reported_not_raised(self):
+        tree = bank(
+            "battery",
+            {"name": "B", "exams": [7, {"title": "E", "questions": [
+                "q", {"type": "mcq", "text": "Q?", "choices": ["a", {"text": "b", "correct": True}]},
+            ]}]},
+            likert_scales=[None, {"name": "S", "options": "abc"}],
+        )
+        with self.assertRaises(ItemBankError) as ctx:
+            import_bank(tree)
+        self.assertEqual(ctx.exception.errors, [
+            "likert_scales[0]: must be an object",
+            "likert_scales[1].options: must be a list",
+            "likert_scales[1]: at least one option is required",
+            "batteries[0]: must be an object",
+            "batteries[1].exams[0]: must be an object",
+            "batteries[1].exams[1].questions[0]: must be an object",
+            "batteries[1].exams[1].questions[1].choices[0]: must be an object",
+        ])
+        self.assertFalse(TestBattery.objects.exists())
+
+    def test_round_trip_keeps_question_order_across_types(self):
+        questions = [
+            {"type": "essay", "text": "Why?", "explanation": ""},
+            {"type": "mcq", "text": "Pick", "choices": [{"text": "a", "correct": False}, {"text": "b", "correct": True}]},
+            {"type": "truefalse", "text": "Sky is blue", "answer": True},
+            {"type": "mcq", "text": "Pick again", "choices": [{"text": "c", "correct": True}]},
+            {"type": "essay", "text": "How?", "explanation": "x"},
+        ]
+        tree = bank({"name": "B", "exams": [{"title": "E", "time_limit_minutes": 10, "sort_order": 1,
+                                             "questions": questions}]})
+        stats = import_bank(tree)
+        self.assertEqual((stats["questions"], stats["choices"]), (5, 3))
+
+        battery = TestBattery.objects.get(name="B")
+        exported = export_bank([battery])["batteries"][0]["exams"][0]
+        self.assertEqual(exported["questions"], questions)
+        page = _collect_questions(Exam.objects.get(battery=battery))
+        self.assertEqual([q.text for q in page], [q["text"] for q in questions])
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "exams-tests"}}
+
+
+@override_settings(CACHES=LOCMEM)
+class VersionBumpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.exam = Exam.objects.create(battery=TestBattery.objects.create(name="B"), title="E")
+
+    def test_bumps_count_up_from_a_missing_key(self):
+        bump_exam_version(self.exam.pk)  # no key yet: added at 1, then incremented
+        bump_exam_version(self.exam.pk)
+        self.assertEqual(exam_version(self.exam.pk), 3)
+
+    def test_question_save_invalidates_the_cached_item_map(self):
+        self.assertEqual(exam_item_map(self.exam.pk), {})
+        question = MCQQuestion.objects.create(exam=self.exam, question_text="Q?")
+        self.assertEqual(list(exam_item_map(self.exam.pk)), [("mcqquestion", question.pk)])
+
+
+class ExamPageAttemptTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="B")
+        self.exam = Exam.objects.create(battery=battery, title="E", time_limit_minutes=30)
+        MCQQuestion.objects.create(exam=self.exam, question_text="Q?")
+        self.examinee = ExamineeAccount.objects.create(
+            username="examinee", password="x", test_battery=battery,
+            expiration_from=date(2026, 1, 1), expiration_to=date(2099, 12, 31),
+        )
+
+    def open_page(self):
+        client = Client()  # a fresh session: logging in again
+        session = client.session
+        session.update({"examinee_id": self.examinee.pk, "battery_id": self.exam.battery_id})
+        session.save()
+        self.assertEqual(client.get(reverse("list_exams")).status_code, 200)
+        return client
+
+    def test_logging_in_again_resumes_the_open_attempt(self):
+        self.open_page()
+        first = ExamAttempt.objects.get()
+        self.open_page()
+        self.assertEqual(list(ExamAttempt.objects.values_list("id", "deadline")), [(first.id, first.deadline)])
+
+    def test_closed_attempt_is_not_resumed(self):
+        client = self.open_page()
+        first = ExamAttempt.objects.get()
+        client.post(reverse("list_exams"), {"auto_submit": "1"})
+        first.refresh_from_db()
+        self.assertEqual(first.status, "submitted")
+        self.assertIsNotNone(first.duration_seconds)
+
+        self.open_page()
+        self.assertEqual(ExamAttempt.objects.exclude(pk=first.pk).get().attempt_number, 2)
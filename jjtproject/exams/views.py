@@ -1,7 +1,7 @@
 # exams/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
@@ -9,15 +9,23 @@ from django.db.models import Max
 
 from accounts.models import ExamineeAccount
 from .models import Exam, MCQQuestion, LikertQuestion, EssayQuestion, TrueFalseQuestion
+from .catalog import (
+    battery_exams, exam_item_map, exam_question_positions, likert_scales, question_order, resolve_item_id,
+    scale_choices,
+)
+from .fragments import answer_overlay, question_blocks
+from .images import picture_sources
 
 # ⬇️ responses models
-from responses.models import ExamAttempt, Answer
+from responses.models import BatterySitting, ExamAttempt
+from responses.events import publish
+from responses.writes import write_answer
 
 import json
 
 
 def _collect_questions(current_exam):
-    """Gather all question types for the current exam and normalize .qtype and .text."""
+    """Gather all question types for the current exam and normalize .qtype and .text (+ Likert options)."""
     questions = []
     for model, qtype in [
         (LikertQuestion, "likertquestion"),
@@ -39,29 +47,67 @@ def _collect_questions(current_exam):
             else:
                 q.text = "Untitled"
         questions += qs
-    questions.sort(key=lambda q: q.id)
+    positions = exam_question_positions(current_exam.id)
+    questions.sort(key=lambda q: question_order(positions, q.qtype, q.id))
+
+    items = exam_item_map(current_exam.id)
+    scales = likert_scales()  # every scale's options, cached; no per-question queries
+    for q in questions:
+        q.item_id = items.get((q.qtype, q.id)) or resolve_item_id(current_exam.id, q.qtype, q.id)
+        if q.qtype == "likertquestion":
+            q.likert_choices = scale_choices(q.scale_id, scales)
+        elif q.qtype == "essayquestion":
+            q.picture = picture_sources(q)  # derivative srcset; no storage access
     return questions
 
 
-def _get_or_start_attempt(request, examinee, exam):
-    """Reuse or start an attempt for (examinee, exam). Persist id in session."""
+def _session_battery_id(request, examinee_id):
+    """Battery of the logged-in examinee, cached in the session at login."""
+    battery_id = request.session.get("battery_id")
+    if battery_id is None:
+        # Sessions opened before the battery was cached: look it up once.
+        battery_id = (
+            ExamineeAccount.objects.filter(id=examinee_id)
+            .values_list("test_battery_id", flat=True).first()
+        )
+        if battery_id is None:
+            raise Http404("Examinee not found")
+        request.session["battery_id"] = battery_id
+    return battery_id
+
+
+def _get_or_start_attempt(request, examinee_id, exam):
+    """Reuse or start an attempt for (examinee, exam) in the open battery sitting. Persist id in session."""
     key = f"attempt_exam_{exam.id}"
     attempt_id = request.session.get(key)
     attempt = None
     if attempt_id:
-        attempt = ExamAttempt.objects.filter(id=attempt_id, examinee=examinee, exam=exam).first()
+        attempt = ExamAttempt.objects.filter(id=attempt_id, examinee_id=examinee_id, exam=exam).first()
+
+    if not attempt:
+        # A new session (logging in again) resumes the open attempt and keeps its deadline
+        attempt = (
+            ExamAttempt.objects.filter(examinee_id=examinee_id, exam=exam, status="in_progress")
+            .order_by("-attempt_number", "-id").first()
+        )
+        if attempt:
+            request.session[key] = attempt.id
+            request.session.modified = True
 
     if not attempt:
         last_num = (
-            ExamAttempt.objects.filter(examinee=examinee, exam=exam)
+            ExamAttempt.objects.filter(examinee_id=examinee_id, exam=exam)
             .aggregate(Max("attempt_number"))["attempt_number__max"] or 0
         )
+        started_at = timezone.now()
         attempt = ExamAttempt.objects.create(
-            examinee=examinee,
+            examinee_id=examinee_id,
             exam=exam,
+            sitting=BatterySitting.open_for(examinee_id, exam.battery_id),
             attempt_number=last_num + 1,
             status="in_progress",
-            started_at=timezone.now(),
+            started_at=started_at,
+            deadline=ExamAttempt.compute_deadline(exam, started_at),
         )
         request.session[key] = attempt.id
         request.session.modified = True
@@ -69,10 +115,10 @@ def _get_or_start_attempt(request, examinee, exam):
     return attempt
 
 
-def _save_answers_for_exam(*, request, examinee, exam, questions, attempt):
+def _save_answers_for_exam(*, request, examinee_id, exam, questions, attempt):
     """
     Upsert each answered question from THIS POST (this page) into responses.Answer.
-    Unique key is (attempt, qtype, question_id).
+    Unique key is (attempt, item).
     """
     with transaction.atomic():
         for q in questions:
@@ -91,50 +137,31 @@ def _save_answers_for_exam(*, request, examinee, exam, questions, attempt):
                 except ValueError:
                     mcq_choice_id = None
             elif q.qtype == "likertquestion":
-                try:
-                    likert_value = int(raw)
-                except ValueError:
-                    likert_value = None
+                # only values on the question's own scale
+                likert_value = int(raw) if raw in {v for v, _ in q.likert_choices} else None
             elif q.qtype == "truefalsequestion":
                 truefalse_value = (raw == "True")
             elif q.qtype == "essayquestion":
                 essay_text = raw
 
-            Answer.objects.update_or_create(
-                attempt=attempt,
-                qtype=q.qtype,
-                question_id=q.id,
-                defaults={
-                    "examinee": examinee,
-                    "exam": exam,
-                    "mcq_choice_id": mcq_choice_id,
-                    "likert_value": likert_value,
-                    "truefalse_value": truefalse_value,
-                    "essay_text": essay_text,
-                    "raw_value": raw,
-                },
-            )
-
-
-def _finalize_attempt(attempt):
-    """Mark attempt as submitted and stamp duration."""
-    if attempt.status != "submitted":
-        attempt.status = "submitted"
-        attempt.submitted_at = timezone.now()
-        if attempt.started_at:
-            attempt.duration_seconds = int((attempt.submitted_at - attempt.started_at).total_seconds())
-        attempt.save(update_fields=["status", "submitted_at", "duration_seconds"])
+            # conditional write: a page re-posting answers it already saved writes nothing
+            write_answer(attempt, exam.id, q.item_id, q.qtype, raw, values={
+                "mcq_choice_id": mcq_choice_id,
+                "likert_value": likert_value,
+                "truefalse_value": truefalse_value,
+                "essay_text": essay_text,
+            })
 
 
 def list_exams_by_battery(request):
-    # 1) Check examinee
+    # 1) Check examinee (identity + battery come from the session, no queries)
     examinee_id = request.session.get("examinee_id")
     if not examinee_id:
         return redirect("examinee_login")
-    examinee = get_object_or_404(ExamineeAccount, id=examinee_id)
+    battery_id = _session_battery_id(request, examinee_id)
 
-    # 2) Locate current exam in battery
-    exams = list(Exam.objects.filter(battery=examinee.test_battery).order_by("sort_order"))
+    # 2) Locate current exam in battery (cached per battery version)
+    exams = battery_exams(battery_id)
     if not exams:
         return render(request, "exams/no_exams.html")
 
@@ -144,19 +171,17 @@ def list_exams_by_battery(request):
 
     current_exam = exams[exam_index]
 
-    # 3) Choices + questions
-    LIKERT_CHOICES = [
-        ("5", "Strongly Agree"),
-        ("4", "Agree"),
-        ("3", "Neutral"),
-        ("2", "Disagree"),
-        ("1", "Strongly Disagree"),
-    ]
+    # 3) Questions (Likert options come from each question's scale)
     questions = _collect_questions(current_exam)
 
+    # The attempt (and its server-side deadline) starts when the page is first shown
+    attempt = _get_or_start_attempt(request, examinee_id, current_exam)
+
     # 4) POST: accept page answers, gate on unanswered, then persist and advance
     if request.method == "POST":
-        auto_submit = request.POST.get("auto_submit") == "1"
+        # Past the deadline the page is closed no matter what the browser timer said
+        time_up = attempt.status == "in_progress" and attempt.is_past_deadline()
+        auto_submit = request.POST.get("auto_submit") == "1" or time_up
         unanswered = []
 
         # Keep answers in session for re-render retention if warning
@@ -180,31 +205,38 @@ def list_exams_by_battery(request):
                 "exams/take_exam_paginated.html",
                 {
                     "questions": questions,
+                    "question_blocks": question_blocks(current_exam, questions),
+                    "answer_overlay": answer_overlay(request.session, questions),
                     "current_exam": current_exam,
                     "exam_index": exam_index + 1,
                     "total_exams": len(exams),
                     "has_next": exam_index + 1 < len(exams),
                     "warning": warning_msg,
                     "progress_percent": int(((exam_index + 1) / len(exams)) * 100),
-                    "likert_choices": LIKERT_CHOICES,
+                    "seconds_left": attempt.seconds_left(),
+                    "attempt_id": attempt.id,
                 },
             )
 
         # ✅ Allowed to proceed (all answered OR auto-submit): persist this page
-        attempt = _get_or_start_attempt(request, examinee, current_exam)
-        _save_answers_for_exam(
-            request=request,
-            examinee=examinee,
-            exam=current_exam,
-            questions=questions,
-            attempt=attempt,
-        )
+        if time_up:
+            attempt.expire()
+        elif attempt.is_open:
+            _save_answers_for_exam(
+                request=request,
+                examinee_id=examinee_id,
+                exam=current_exam,
+                questions=questions,
+                attempt=attempt,
+            )
+            attempt.finalize()
+
+        publish("page_submitted", attempt=attempt.id, examinee=examinee_id, exam=current_exam.id)
 
-        # Move to next exam or finalize
+        # Move to next exam or finish
         if exam_index + 1 < len(exams):
             return redirect(f"{request.path}?exam={exam_index + 1}")
         else:
-            _finalize_attempt(attempt)
             return redirect("exam_complete")
 
     # 5) GET: initial render / re-render after warning
@@ -213,13 +245,16 @@ def list_exams_by_battery(request):
         "exams/take_exam_paginated.html",
         {
             "questions": questions,
+            "question_blocks": question_blocks(current_exam, questions),
+            "answer_overlay": answer_overlay(request.session, questions),
             "current_exam": current_exam,
             "exam_index": exam_index + 1,
             "total_exams": len(exams),
             "has_next": exam_index + 1 < len(exams),
             "warning": "",
             "progress_percent": int(((exam_index + 1) / len(exams)) * 100),
-            "likert_choices": LIKERT_CHOICES,
+            "seconds_left": attempt.seconds_left(),
+            "attempt_id": attempt.id,
         },
     )
 
@@ -240,5 +275,19 @@ def save_essay_answer(request):
     return JsonResponse({"error": "Invalid request"}, status=400)
 
 
+@csrf_exempt
+async def save_essay_answer_async(request):
+    """ASGI twin of save_essay_answer; same payload and responses."""
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            qid = data.get("question_id")
+            await request.session.aset(f"answer_{qid}", data.get("answer"))
+            return JsonResponse({"status": "saved"})
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"error": "Invalid request"}, status=400)
+
+
 def exam_complete(request):
     return render(request, "exams/exam_complete.html")
@@ -0,0 +1,9 @@
+# jjtproject/csvstream.py
+"""Helpers for streaming CSV responses (StreamingHttpResponse) row by row."""
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: hands each encoded line back instead of storing it."""
+
+    def write(self, value):
+        return value
@@ -38,7 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'exams.apps.BundledStaticFilesConfig',  # django.contrib.staticfiles
     'accounts',
     'exams',
     'responses',
@@ -87,6 +87,29 @@ DATABASES = {
 }
 
 
+# Cache
+# Catalog, fragment and breakdown entries are invalidated by bumping version
+# keys (exams/catalog.bump_version), which needs one cache shared by every
+# worker, with atomic increments and no eviction of keys without a timeout:
+# Redis (pip install redis) with maxmemory-policy volatile-lru. Without
+# REDIS_URL caching is off: a database cache would cost the same query it
+# saves, its incr is not atomic and culling drops version keys. Never LocMemCache.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -105,6 +128,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'accounts.hashers.ExamineePBKDF2PasswordHasher',
+]
+
+# Examinee logins arrive in bursts (~300 in the first minute of a session).
+# ~50 ms per verify at 100k keeps a storm around 15 CPU-seconds; see
+# `manage.py benchmark_examinee_login` before changing it.
+EXAMINEE_PASSWORD_ITERATIONS = 100_000
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -125,12 +162,22 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [ BASE_DIR / "static" ]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Content-hashed names plus .gz/.br copies (collectstatic); see exams/storage.py
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "exams.storage.CompressedManifestStaticFilesStorage"},
+}
+ASSET_BUNDLES = not DEBUG   # link the built bundles (manage.py build_assets), not their sources
+ASSET_SAFELIST = []         # CSS classes only ever assembled at runtime, kept by the purge
+SERVE_STATIC = False        # let Django serve STATIC_ROOT when no web server sits in front
+
 
 
 
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+SERVE_MEDIA = False         # serve MEDIA_ROOT from Django outside DEBUG (exams.storage.serve_media)
 
 
 # Default primary key field type
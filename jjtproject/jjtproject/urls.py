@@ -15,11 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 
 
 from django.conf import settings
-from django.conf.urls.static import static
 
 
 urlpatterns = [
@@ -36,5 +35,10 @@ urlpatterns = [
     
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.DEBUG or settings.SERVE_MEDIA:
+    from exams.storage import serve_media
+    urlpatterns += [re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.*)$", serve_media)]
+
+if settings.SERVE_STATIC:
+    from exams.storage import serve as serve_static
+    urlpatterns += [re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<path>.*)$", serve_static)]
\ No newline at end of file
@@ -4,7 +4,7 @@ from django.contrib.admin.sites import NotRegistered, AlreadyRegistered, site
 from django.http import HttpResponse
 import csv
 
-from .models import ExamAttempt, Answer
+from .models import BatterySitting, ExamAttempt, Answer, ExportWatermark, NormTable, PackedResponses
 
 
 @admin.action(description="Export selected answers to CSV")
@@ -14,10 +14,10 @@ def export_answers_csv(modeladmin, request, queryset):
     writer = csv.writer(response)
     writer.writerow([
         "ID","Attempt ID","Attempt #","Attempt Status","Exam","Examinee",
-        "QType","Question ID","MCQ Choice ID","Likert Value","True/False",
+        "Item ID","QType","Question ID","MCQ Choice ID","Likert Value","True/False",
         "Essay Text","Raw Value","Created At","Updated At",
     ])
-    for a in queryset.select_related("attempt","exam","examinee"):
+    for a in queryset.select_related("attempt","exam","examinee","item"):
         writer.writerow([
             a.id,
             a.attempt_id,
@@ -25,6 +25,7 @@ def export_answers_csv(modeladmin, request, queryset):
             getattr(a.attempt, "status", ""),
             getattr(a.exam, "title", str(a.exam)),
             str(a.examinee),
+            a.item_id,
             a.qtype,
             a.question_id,
             a.mcq_choice_id or "",
@@ -45,6 +46,9 @@ class AnswerInline(admin.TabularInline):
         "truefalse_value","short_essay","raw_value","created_at",
     )
     readonly_fields = fields
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("item")
     can_delete = False
     show_change_link = True
 
@@ -54,22 +58,50 @@ class AnswerInline(admin.TabularInline):
     short_essay.short_description = "Essay (preview)"
 
 
+class ExamAttemptInline(admin.TabularInline):
+    model = ExamAttempt
+    extra = 0
+    fields = ("exam","attempt_number","status","started_at","submitted_at","duration_seconds","raw_score")
+    readonly_fields = fields
+    can_delete = False
+    show_change_link = True
+
+
+class BatterySittingAdmin(admin.ModelAdmin):
+    list_display = (
+        "id","examinee","battery","sitting_number","status","started_at","completed_at",
+        "exams_submitted","exams_total","items_answered","items_total","progress",
+    )
+    list_filter = ("status","battery")
+    search_fields = ("examinee__id","examinee__first_name","examinee__last_name","battery__name")
+    list_select_related = ("examinee","battery")
+    date_hierarchy = "started_at"
+    inlines = [ExamAttemptInline]
+    readonly_fields = (
+        "started_at","last_activity_at","completed_at","exams_total","exams_submitted","exams_closed",
+        "items_total","items_answered","progress","duration_seconds",
+    )
+
+
 class ExamAttemptAdmin(admin.ModelAdmin):
     list_display = (
-        "id","examinee","exam","attempt_number","status",
-        "started_at","submitted_at","duration_seconds",
+        "id","examinee","exam","sitting","attempt_number","status",
+        "started_at","submitted_at","duration_seconds","raw_score","scaled_score","stanine",
     )
     list_filter = ("status","exam")
     search_fields = ("examinee__id","examinee__first_name","examinee__last_name","exam__title")
     date_hierarchy = "started_at"
     inlines = [AnswerInline]
-    readonly_fields = ("started_at","submitted_at")
+    readonly_fields = ("started_at","submitted_at","norm_table")
+    raw_id_fields = ("sitting",)
 
 
 class AnswerAdmin(admin.ModelAdmin):
     list_display = ("id","attempt","exam","examinee","qtype","question_id","display_answer","created_at")
-    list_filter = ("qtype","exam","attempt__status")
-    search_fields = ("exam__title","examinee__first_name","examinee__last_name","examinee__id","question_id","raw_value")
+    list_filter = ("item__kind","exam","attempt__status")
+    search_fields = ("exam__title","examinee__first_name","examinee__last_name","examinee__id","item__source_id","raw_value")
+    list_select_related = ("attempt","exam","examinee","item")
+    raw_id_fields = ("item",)
     date_hierarchy = "created_at"
     actions = [export_answers_csv]
 
@@ -89,15 +121,40 @@ class AnswerAdmin(admin.ModelAdmin):
     display_answer.short_description = "Answer"
 
 
+class ExportWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("consumer","last_updated_at","last_id","rows_exported","last_run_at")
+    readonly_fields = ("last_run_at",)
+
+
+class PackedResponsesAdmin(admin.ModelAdmin):
+    list_display = ("attempt","exam","layout","size","packed_at")
+    list_filter = ("exam",)
+    list_select_related = ("attempt__examinee","attempt__exam","exam","layout")
+    readonly_fields = ("attempt","exam","layout","size","packed_at")
+    exclude = ("data",)
+
+    def size(self, obj):
+        return f"{len(obj.data)} bytes"
+
+
+class NormTableAdmin(admin.ModelAdmin):
+    list_display = ("exam","version","gender","level","highest_education_level","sample_size","mean","sd","is_active","built_at")
+    list_filter = ("is_active","exam")
+    exclude = ("points","cum_counts")
+    readonly_fields = ("exam","version","gender","level","highest_education_level","sample_size","mean","sd","built_at")
+
+
 # Unregister if already registered (safe on reload)
-for m in (Answer, ExamAttempt):
+for m in (Answer, BatterySitting, ExamAttempt, ExportWatermark, NormTable, PackedResponses):
     try:
         site.unregister(m)
     except NotRegistered:
         pass
 
 # Register (ignore double-register)
-for model, admin_cls in ((ExamAttempt, ExamAttemptAdmin), (Answer, AnswerAdmin)):
+for model, admin_cls in ((BatterySitting, BatterySittingAdmin), (ExamAttempt, ExamAttemptAdmin), (Answer, AnswerAdmin),
+                          (ExportWatermark, ExportWatermarkAdmin), (NormTable, NormTableAdmin),
+                          (PackedResponses, PackedResponsesAdmin)):
     try:
         site.register(model, admin_cls)
     except AlreadyRegistered:
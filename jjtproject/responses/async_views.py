@@ -0,0 +1,144 @@
+# responses/async_views.py
+"""
+Async (ASGI) twins of the answer-ingestion endpoints in responses/views.py.
+
+Under an ASGI server these coroutines give up the event loop while they wait
+on the database, so thousands of mostly-idle examinee connections (autosave
+every few seconds) can be served by a handful of workers. Request and response
+formats are identical to the sync views; under WSGI the sync views remain the
+better choice. See `manage.py benchmark_answer_ingest`.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+
+from exams.catalog import resolve_item_id
+from exams.models import Exam
+from .models import ExamAttempt
+from .sync import apply_batch, parse_batch
+from .views import REQUIRED_ANSWER_FIELDS, parse_seq
+from .writes import idempotency_key, remember, replayed, save_answer_result
+
+
+@csrf_exempt
+async def start_attempt(request, exam_id):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    examinee_id = await request.session.aget("examinee_id")
+    if not examinee_id:
+        return HttpResponseBadRequest("No examinee in session")
+
+    exam = await aget_object_or_404(Exam, id=exam_id)
+    attempt = await ExamAttempt.astart_or_get(examinee_id, exam)
+    # store in session for current exam flow
+    await request.session.aset(f"attempt_exam_{exam.id}", attempt.id)
+
+    return JsonResponse({"attempt_id": attempt.id})
+
+
+@csrf_exempt
+async def save_answer(request):
+    """Same body and responses as views.save_answer."""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    if not all(k in data for k in REQUIRED_ANSWER_FIELDS):
+        return HttpResponseBadRequest("Missing fields")
+    try:
+        seq = parse_seq(data)
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid seq")
+
+    # the attempt must belong to the exam named in the body, as in sync_answers
+    attempt = await aget_object_or_404(ExamAttempt, id=data["attempt_id"], exam_id=data["exam_id"])
+
+    examinee_id = await request.session.aget("examinee_id")
+    if not examinee_id or attempt.examinee_id != examinee_id:
+        return HttpResponseBadRequest("Invalid examinee context")
+
+    key = idempotency_key(request, data)
+    done = await sync_to_async(replayed)(attempt.id, key)
+    if done is not None:
+        return JsonResponse(done)
+
+    if not attempt.is_open:
+        await attempt.aexpire()
+        return JsonResponse({"status": attempt.status, "error": "Attempt is closed"}, status=409)
+
+    qtype = data["qtype"]
+    raw = str(data["value"])
+
+    try:
+        # normally a cache hit; only unseen questions touch the database
+        item_id = await sync_to_async(resolve_item_id)(attempt.exam_id, qtype, int(data["question_id"]))
+    except (TypeError, ValueError):
+        item_id = None
+    if item_id is None:
+        return HttpResponseBadRequest("Unknown question")
+
+    # the conditional write and the idempotency record share one transaction on a worker thread
+    result, _replayed = await sync_to_async(remember)(
+        attempt.id, key, lambda: save_answer_result(attempt, attempt.exam_id, item_id, qtype, raw, seq)
+    )
+    return JsonResponse(result)
+
+
+@csrf_exempt
+async def sync_answers(request):
+    """Same body and responses as views.sync_answers."""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+    try:
+        batch_id, attempt_id, exam_id, entries = parse_batch(data)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    attempt = await aget_object_or_404(ExamAttempt, id=attempt_id, exam_id=exam_id)
+    examinee_id = await request.session.aget("examinee_id")
+    if not examinee_id or attempt.examinee_id != examinee_id:
+        return HttpResponseBadRequest("Invalid examinee context")
+
+    done = await sync_to_async(replayed)(attempt.id, batch_id)
+    if done is not None:
+        return JsonResponse({**done, "replayed": True})
+
+    if not attempt.is_open:
+        await attempt.aexpire()
+        return JsonResponse({"status": attempt.status, "error": "Attempt is closed"}, status=409)
+
+    # one transaction for the whole batch and its idempotency record, on a worker thread
+    result, again = await sync_to_async(remember)(
+        attempt.id, batch_id, lambda: apply_batch(attempt, exam_id, entries, batch_id)
+    )
+    return JsonResponse({**result, "replayed": True} if again else result)
+
+
+@csrf_exempt
+async def submit_attempt(request, attempt_id):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    attempt = await aget_object_or_404(ExamAttempt, id=attempt_id)
+
+    examinee_id = await request.session.aget("examinee_id")
+    if not examinee_id or examinee_id != attempt.examinee_id:
+        return HttpResponseBadRequest("Invalid examinee context")
+
+    if attempt.is_past_deadline():
+        await attempt.aexpire()
+    else:
+        await attempt.afinalize()
+    return JsonResponse({"status": attempt.status, "attempt_id": attempt.id})
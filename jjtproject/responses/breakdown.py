@@ -0,0 +1,135 @@
+# responses/breakdown.py
+"""
+Per-attempt test breakdown: one row per exam of the examinee's battery.
+
+Each row has the attempt shown for that exam, answered/total items, scores,
+duration and status. The viewed attempt represents its own exam. Every other
+exam is represented by the examinee's latest attempt at it. A breakdown costs
+two queries: the examinee's attempts at the battery's exams, and one grouped
+Answer count over the chosen attempts, plus one for pruned packed vectors
+(packing.answered_counts). Exam order and question totals come
+from the cached catalog (exams.catalog).
+
+Results are cached under a per-examinee version. signals.py bumps it whenever
+one of the examinee's attempts or answers changes. apply_norms rescoring
+bypasses signals, so it bumps a global scores version instead.
+`ExamAttempt.expire_overdue` is a bulk UPDATE too. That one is not tracked:
+an in-progress attempt past its deadline is reported as expired at read time.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+from exams.catalog import CATALOG_TIMEOUT, battery_exams, battery_version, bump_version, exam_question_count
+
+from .models import ExamAttempt, deadline_grace
+from .packing import answered_counts
+
+_SCORES_KEY = "responses:scores_version"
+
+
+def _examinee_key(examinee_id):
+    return f"responses:examinee_version:{examinee_id}"
+
+
+def bump_examinee_version(examinee_id):
+    if examinee_id:
+        bump_version(_examinee_key(examinee_id))
+
+
+def bump_scores_version():
+    bump_version(_SCORES_KEY)
+
+
+def _version(attempt, battery_id):
+    versions = cache.get_many([_examinee_key(attempt.examinee_id), _SCORES_KEY])
+    return "{}.{}.{}".format(
+        versions.get(_examinee_key(attempt.examinee_id), 1),
+        versions.get(_SCORES_KEY, 1),
+        battery_version(battery_id),
+    )
+
+
+def _build(attempt, exams):
+    exam_ids = [e.id for e in exams]
+    chosen = {attempt.exam_id: attempt}
+    latest = (
+        ExamAttempt.objects.filter(examinee_id=attempt.examinee_id, exam_id__in=exam_ids)
+        .exclude(exam_id=attempt.exam_id)
+        .only("id", "exam_id", "status", "started_at", "submitted_at", "deadline",
+              "duration_seconds", "raw_score", "scaled_score", "stanine")
+        .order_by("exam_id", "-started_at", "-id")
+    )
+    for a in latest:
+        chosen.setdefault(a.exam_id, a)
+
+    answered = answered_counts(a.id for a in chosen.values())
+
+    rows = []
+    for exam in exams:
+        a = chosen.get(exam.id)
+        row = {
+            "exam_id": exam.id,
+            "name": exam.title,
+            "attempt_id": None,
+            "answered": 0,
+            "status": "not_started",
+            "deadline": None,
+            "submitted_at": None,
+            "duration_seconds": None,
+            "raw_score": None,
+            "percentile": None,
+            "stanine": None,
+            "current": exam.id == attempt.exam_id,
+        }
+        if a is not None:
+            row.update(
+                attempt_id=a.id,
+                answered=answered.get(a.id, 0),
+                status=a.status,
+                deadline=a.deadline,
+                submitted_at=a.submitted_at,
+                duration_seconds=a.duration_seconds,
+                raw_score=a.raw_score,
+                percentile=a.scaled_score,
+                stanine=a.stanine,
+            )
+        rows.append(row)
+    return rows
+
+
+def _finish(row, now):
+    # Evaluated per read: totals follow question edits, statuses follow the clock.
+    row = dict(row)
+    deadline = row.pop("deadline")
+    if row["status"] == "in_progress" and deadline and now > deadline + deadline_grace():
+        row["status"] = "expired"
+    row["total"] = total = exam_question_count(row["exam_id"])
+    if total:
+        row["answered"] = min(row["answered"], total)  # answers to since-deleted questions
+    if row["status"] == "submitted":
+        row["progress"] = 100
+    else:
+        row["progress"] = round(row["answered"] * 100 / total) if total else 0
+    row["minutes"] = round(row["duration_seconds"] / 60, 1) if row["duration_seconds"] else None
+    row["status_label"] = STATUS_LABELS.get(row["status"], row["status"])
+    return row
+
+
+STATUS_LABELS = dict(ExamAttempt.STATUS_CHOICES, not_started="Not started")
+
+
+def attempt_breakdown(attempt):
+    """Breakdown rows (dicts) for every exam in the examinee's battery, in battery order."""
+    battery_id = attempt.examinee.test_battery_id
+    exams = battery_exams(battery_id) if battery_id else []
+    if attempt.exam_id not in {e.id for e in exams}:
+        exams = [*exams, attempt.exam]  # exam since moved out of the battery
+
+    key = f"responses:breakdown:{attempt.id}"
+    version = _version(attempt, battery_id)
+    rows = cache.get(key, version=version)
+    if rows is None:
+        rows = _build(attempt, exams)
+        cache.set(key, rows, CATALOG_TIMEOUT, version=version)
+    now = timezone.now()
+    return [_finish(r, now) for r in rows]
@@ -0,0 +1,80 @@
+# responses/events.py
+"""
+Attempt event bus for the proctor live monitor.
+
+Answer-save paths publish small events (started, page_submitted, answer_added,
+submitted, expired); every proctor's SSE stream reads the same shared buffer,
+so one event is stored once no matter how many proctors are watching.
+
+LocalBroker keeps the buffer in process memory. It is the stand-in for a
+shared broker: with several server processes each one only sees its own
+events, so point LIVE_EVENTS_BROKER at a class with the same interface
+(publish / events_after / wait / last_id) backed by Redis or similar.
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class LocalBroker:
+    """In-process ring buffer of (id, type, payload) events with blocking waits."""
+
+    # Events reach only streams served by this process. Brokers that other
+    # processes read should set this to True (see broker_is_shared).
+    shared = False
+
+    def __init__(self, maxlen=2000):
+        self._events = deque(maxlen=maxlen)
+        self._last_id = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, event_type, payload):
+        with self._cond:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, payload))
+            self._cond.notify_all()
+            return self._last_id
+
+    def events_after(self, last_id):
+        """Buffered events newer than last_id (oldest first)."""
+        if last_id >= self._last_id:
+            return []
+        with self._cond:
+            return [e for e in self._events if e[0] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block until something newer than last_id arrives (or timeout); sync streams only."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_id > last_id, timeout=timeout)
+        return self.events_after(last_id)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "LIVE_EVENTS_BROKER", "responses.events.LocalBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def broker_is_shared():
+    """Whether events published here reach streams in other processes (cron jobs, other workers)."""
+    return getattr(get_broker(), "shared", True)
+
+
+def publish(event_type, **payload):
+    """Publish once the surrounding transaction commits (immediately in autocommit)."""
+    transaction.on_commit(lambda: get_broker().publish(event_type, payload))
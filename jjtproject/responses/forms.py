@@ -5,11 +5,11 @@ from .models import Answer, ExamAttempt
 class AnswerForm(forms.ModelForm):
     class Meta:
         model = Answer
-        fields = ["attempt", "examinee", "exam", "question_id", "qtype",
+        fields = ["attempt", "examinee", "exam", "item",
                   "mcq_choice_id", "likert_value", "truefalse_value", "essay_text", "raw_value"]
 
 class ExamAttemptForm(forms.ModelForm):
     class Meta:
         model = ExamAttempt
         fields = ["examinee", "exam", "attempt_number", "status", "started_at", "submitted_at",
-                  "raw_score", "scaled_score", "duration_seconds", "metadata"]
+                  "raw_score", "scaled_score", "stanine", "duration_seconds", "metadata"]
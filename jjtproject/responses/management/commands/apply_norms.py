@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from responses.models import NormTable
+from responses.norms import apply_norms
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill scaled_score (percentile rank), stanine and norm_table for scored attempts "
+        "from the exam's active norm tables (or --norm-version)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exam", type=int, action="append", help="Exam id (repeatable; default all exams with norms)")
+        # not --version: BaseCommand already defines it (the Django version)
+        parser.add_argument(
+            "--norm-version", dest="norm_version", type=int, help="Norm version to use instead of the active one",
+        )
+        parser.add_argument("--missing-only", action="store_true", help="Skip attempts that already have a norm table")
+
+    def handle(self, *args, **opts):
+        exam_ids = opts["exam"] or list(
+            NormTable.objects.filter(is_active=True).order_by().values_list("exam_id", flat=True).distinct()
+        )
+        for exam_id in exam_ids:
+            scored = apply_norms(exam_id, version=opts["norm_version"], missing_only=opts["missing_only"])
+            self.stdout.write(f"exam {exam_id}: {scored} attempt(s) scored")
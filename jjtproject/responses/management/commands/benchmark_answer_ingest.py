@@ -0,0 +1,155 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+
+from accounts.models import ExamineeAccount
+from exams.models import Exam, TestBattery, TrueFalseQuestion
+from responses.models import ExamAttempt
+
+BENCH_BATTERY = "__ingest_benchmark__"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test answer autosave against a running server: N simulated examinees "
+        "hold keep-alive connections and post answers with think time. Run it once "
+        "against the WSGI deployment (--path sync) and once against ASGI (--path async) "
+        "to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+        parser.add_argument("--path", choices=["sync", "async"], default="async")
+        parser.add_argument("--examinees", type=int, default=500, help="Concurrent connections")
+        parser.add_argument("--saves", type=int, default=10, help="Autosaves per examinee")
+        parser.add_argument("--think", type=float, default=2.0, help="Mean seconds between saves")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the benchmark fixtures and exit")
+
+    def handle(self, *args, **opts):
+        if opts["cleanup"]:
+            TestBattery.objects.filter(name=BENCH_BATTERY).delete()
+            self.stdout.write("Benchmark fixtures removed.")
+            return
+
+        clients, question_ids = self._fixtures(opts["examinees"], opts["saves"])
+        endpoint = "/responses/async/save/" if opts["path"] == "async" else "/responses/save/"
+        url = urlsplit(opts["url"])
+
+        started = time.perf_counter()
+        results = asyncio.run(self._run(url, endpoint, clients, question_ids, opts["think"]))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(lat for ok, lat in results if ok)
+        errors = sum(1 for ok, _ in results if not ok)
+        self.stdout.write(f"endpoint        {endpoint}")
+        self.stdout.write(f"connections     {len(clients)}")
+        self.stdout.write(f"requests        {len(results)} ({errors} failed)")
+        self.stdout.write(f"wall time       {elapsed:.1f}s  -> {len(latencies) / elapsed:.1f} saves/s")
+        if latencies:
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f"latency ms      p50 {statistics.median(latencies) * 1000:.1f}  "
+                f"p95 {p95 * 1000:.1f}  max {latencies[-1] * 1000:.1f}"
+            )
+
+    def _fixtures(self, count, saves):
+        """One examinee, session and open attempt per simulated connection (reused between runs)."""
+        battery, _ = TestBattery.objects.get_or_create(name=BENCH_BATTERY)
+        exam, _ = Exam.objects.get_or_create(battery=battery, title="Ingest benchmark")
+        today = date.today()
+
+        # one question per autosave; saving them registers their items
+        have = TrueFalseQuestion.objects.filter(exam=exam).count()
+        for n in range(have, saves):
+            TrueFalseQuestion.objects.create(exam=exam, question_text=f"Statement {n + 1}")
+        question_ids = list(
+            TrueFalseQuestion.objects.filter(exam=exam).order_by("id").values_list("id", flat=True)[:saves]
+        )
+
+        existing = ExamineeAccount.objects.filter(test_battery=battery).count()
+        ExamineeAccount.objects.bulk_create([
+            ExamineeAccount(
+                username=f"bench_{battery.id}_{i}", password="!", test_battery=battery,
+                expiration_from=today, expiration_to=today + timedelta(days=1),
+                first_name="Bench", last_name=str(i), gender="Male",
+            )
+            for i in range(existing, count)
+        ])
+
+        clients = []
+        for examinee in ExamineeAccount.objects.filter(test_battery=battery).order_by("id")[:count]:
+            attempt = (
+                ExamAttempt.objects.filter(examinee=examinee, exam=exam, status="in_progress").first()
+                or ExamAttempt.start_or_get(examinee, exam)
+            )
+            session = SessionStore()
+            session["examinee_id"] = examinee.id
+            session.create()
+            clients.append((session.session_key, attempt.id, exam.id))
+        return clients, question_ids
+
+    async def _run(self, url, endpoint, clients, question_ids, think):
+        tasks = [
+            self._examinee(url, endpoint, key, attempt_id, exam_id, question_ids, think)
+            for key, attempt_id, exam_id in clients
+        ]
+        results = []
+        for chunk in await asyncio.gather(*tasks):
+            results.extend(chunk)
+        return results
+
+    async def _examinee(self, url, endpoint, session_key, attempt_id, exam_id, question_ids, think):
+        host, port = url.hostname, url.port or 80
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session_key}"
+        reader = writer = None
+        results = []
+        await asyncio.sleep(random.uniform(0, think))  # spread the first wave
+        for question_id in question_ids:
+            body = json.dumps({
+                "attempt_id": attempt_id, "exam_id": exam_id, "question_id": question_id,
+                "qtype": "truefalsequestion", "value": random.choice(["True", "False"]),
+            }).encode()
+            request = (
+                f"POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: keep-alive\r\n\r\n"
+            ).encode() + body
+            t0 = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await self._read_response(reader)
+                results.append((status == 200, time.perf_counter() - t0))
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                results.append((False, time.perf_counter() - t0))
+                reader = writer = None
+            await asyncio.sleep(random.expovariate(1 / think) if think else 0)
+        if writer is not None:
+            writer.close()
+        return results
+
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip().lower()
+        await reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers.get("connection") != "close"
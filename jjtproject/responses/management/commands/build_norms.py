@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from responses.models import ExamAttempt
+from responses.norms import apply_norms, build_norms, min_sample
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a new norm table version per exam (one table per demographic group) "
+        "from submitted attempts' raw scores, activate it, and optionally rescore."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exam", type=int, action="append", help="Exam id (repeatable; default all scored exams)")
+        parser.add_argument("--since", help="Only use attempts submitted on/after YYYY-MM-DD")
+        parser.add_argument("--min-sample", type=int, default=None, help=f"Smallest group with its own table (default {min_sample()})")
+        parser.add_argument("--no-activate", action="store_true", help="Build the version without switching lookups to it")
+        parser.add_argument("--apply", action="store_true", help="Rescore the exam's attempts with the new version")
+
+    def handle(self, *args, **opts):
+        exam_ids = opts["exam"] or list(
+            ExamAttempt.objects.filter(raw_score__isnull=False)
+            .order_by().values_list("exam_id", flat=True).distinct()
+        )
+        since = parse_date(opts["since"]) if opts["since"] else None
+        for exam_id in exam_ids:
+            tables = build_norms(
+                exam_id, since=since, activate=not opts["no_activate"], minimum=opts["min_sample"]
+            )
+            if not tables:
+                self.stdout.write(f"exam {exam_id}: no scored attempts, skipped")
+                continue
+            self.stdout.write(
+                f"exam {exam_id}: version {tables[0].version}, {len(tables)} table(s), "
+                f"n={max(t.sample_size for t in tables)}"
+            )
+            if opts["apply"]:
+                scored = apply_norms(exam_id, version=tables[0].version)
+                self.stdout.write(f"exam {exam_id}: {scored} attempt(s) rescored")
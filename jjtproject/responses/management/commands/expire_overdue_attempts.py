@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from responses.events import broker_is_shared
+from responses.models import ExamAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark in-progress attempts past their deadline (plus grace) as expired. "
+        "Meant to run every minute or so from cron; each run is a single UPDATE "
+        "on the (status, deadline) index."
+    )
+
+    def handle(self, *args, **opts):
+        if not broker_is_shared():
+            self.stderr.write(self.style.WARNING(
+                "LIVE_EVENTS_BROKER is the in-process LocalBroker: no 'expired' events are "
+                "published from here. The live monitor marks overdue attempts from their deadline."
+            ))
+        expired = ExamAttempt.expire_overdue()
+        self.stdout.write(f"{expired} attempt(s) expired.")
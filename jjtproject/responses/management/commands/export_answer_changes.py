@@ -0,0 +1,37 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from responses.changefeed import ChangeFeed, iter_csv, reset_watermark
+
+
+class Command(BaseCommand):
+    help = "Export Answer rows changed since the consumer's last run as CSV and advance its watermark."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consumer", required=True, help="Watermark name, e.g. hr_warehouse")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--peek", action="store_true", help="Export without advancing the watermark")
+        parser.add_argument("--reset", action="store_true", help="Start over from the first answer")
+
+    def handle(self, *args, **opts):
+        consumer = opts["consumer"]
+        if opts["reset"]:
+            reset_watermark(consumer)
+
+        feed = ChangeFeed(consumer)
+        if opts["output"]:
+            out = open(opts["output"], "w", newline="", encoding="utf-8")
+        else:
+            out = sys.stdout
+        try:
+            for line in iter_csv(feed, commit=False):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        # Only move the watermark once every row has been written out.
+        if not opts["peek"]:
+            feed.commit()
+        self.stderr.write(f"{consumer}: {feed.count} changed answer(s) exported.")
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from responses.models import ExamAttempt, PackedResponses
+from responses.packing import pack_attempt, prune_answers
+
+
+class Command(BaseCommand):
+    help = (
+        "Write packed response vectors for closed attempts that don't have one yet "
+        "(attempts closed before packed storage was enabled, or expired by the sweeper). "
+        "With --prune, delete the Likert/MCQ/TF Answer rows already covered by a packed vector."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exam", type=int, help="Limit to one exam id")
+        parser.add_argument(
+            "--repack", action="store_true",
+            help="Rebuild existing vectors too (never pruned ones: their Answer rows are gone)",
+        )
+        parser.add_argument("--prune", action="store_true", help="Delete packed Answer rows afterwards")
+        parser.add_argument(
+            "--keep-days", type=int, default=90,
+            help="With --prune, keep audit rows of attempts packed within this many days",
+        )
+
+    def handle(self, *args, **opts):
+        attempts = ExamAttempt.objects.filter(status__in=("submitted", "expired"))
+        if opts["exam"]:
+            attempts = attempts.filter(exam_id=opts["exam"])
+        if opts["repack"]:
+            skipped = attempts.filter(packed__pruned_at__isnull=False).count()
+            attempts = attempts.exclude(packed__pruned_at__isnull=False)
+        else:
+            skipped = 0
+            attempts = attempts.filter(packed__isnull=True)
+
+        packed = 0
+        for attempt_id in attempts.order_by("id").values_list("id", flat=True).iterator():
+            pack_attempt(attempt_id)
+            packed += 1
+        self.stdout.write(f"{packed} attempt(s) packed.")
+        if skipped:
+            self.stdout.write(f"{skipped} pruned attempt(s) kept as they are.")
+
+        if opts["prune"]:
+            cutoff = timezone.now() - timedelta(days=opts["keep_days"])
+            vectors = PackedResponses.objects.filter(packed_at__lt=cutoff)
+            if opts["exam"]:
+                vectors = vectors.filter(exam_id=opts["exam"])
+            deleted = prune_answers(vectors)
+            self.stdout.write(f"{deleted} answer row(s) pruned.")
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from responses.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete idempotency keys older than --hours (default 48). Clients only "
+        "retry for minutes, so old keys are dead weight; one DELETE on the "
+        "created_at index. Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=48)
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(hours=opts["hours"])
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(f"{deleted} idempotency key(s) deleted.")
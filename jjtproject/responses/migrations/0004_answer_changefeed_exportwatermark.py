@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_alter_examineeaccount_birthdate'),
+        ('exams', '0016_alter_exam_options_exam_sort_order'),
+        ('responses', '0003_alter_answer_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('rows_exported', models.PositiveBigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['updated_at', 'id'], name='responses_a_updated_4bffce_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:02
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+
+
+def backfill_deadlines(apps, schema_editor):
+    Exam = apps.get_model('exams', 'Exam')
+    ExamAttempt = apps.get_model('responses', 'ExamAttempt')
+    for exam_id, minutes in Exam.objects.filter(time_limit_minutes__gt=0).values_list('id', 'time_limit_minutes'):
+        ExamAttempt.objects.filter(exam_id=exam_id, deadline__isnull=True).update(
+            deadline=ExpressionWrapper(
+                F('started_at') + timedelta(minutes=minutes), output_field=models.DateTimeField()
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_hash_examinee_passwords'),
+        ('exams', '0016_alter_exam_options_exam_sort_order'),
+        ('responses', '0004_answer_changefeed_exportwatermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['status', 'deadline'], name='responses_e_status_ecd174_idx'),
+        ),
+    ]
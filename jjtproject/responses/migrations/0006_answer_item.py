@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:08
+
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+QTYPE_TO_KIND = {
+    'likertquestion': 1,
+    'mcqquestion': 2,
+    'essayquestion': 3,
+    'truefalsequestion': 4,
+}
+
+log = logging.getLogger(__name__)
+
+
+def link_answers_to_items(apps, schema_editor):
+    Answer = apps.get_model('responses', 'Answer')
+    Item = apps.get_model('exams', 'Item')
+
+    # Answers whose question has since been deleted still need a registry row.
+    known = set(Item.objects.values_list('kind', 'source_id'))
+    missing = {}
+    for qtype, question_id, exam_id in Answer.objects.values_list('qtype', 'question_id', 'exam_id').distinct():
+        kind = QTYPE_TO_KIND.get(qtype)
+        if kind and (kind, question_id) not in known:
+            missing[(kind, question_id)] = exam_id
+    Item.objects.bulk_create(
+        [Item(kind=k, source_id=q, exam_id=e) for (k, q), e in missing.items()],
+        batch_size=1000,
+    )
+
+    for qtype, kind in QTYPE_TO_KIND.items():
+        Answer.objects.filter(qtype=qtype).update(
+            item_id=Subquery(
+                Item.objects.filter(kind=kind, source_id=OuterRef('question_id')).values('id')[:1]
+            )
+        )
+
+    # save_answer used to accept any qtype. Such rows point at no question table,
+    # so they can't be scored and would break the NOT NULL in 0007: log and drop them.
+    unlinked = Answer.objects.filter(item__isnull=True)
+    for answer_id, attempt_id, qtype, question_id, raw in unlinked.values_list(
+        'id', 'attempt_id', 'qtype', 'question_id', 'raw_value'
+    ):
+        log.warning(
+            "Deleting answer %s (attempt %s): unknown qtype %r for question %s, raw value %r",
+            answer_id, attempt_id, qtype, question_id, raw,
+        )
+    unlinked.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+        ('responses', '0005_examattempt_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='item',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='exams.item'),
+        ),
+        migrations.RunPython(link_answers_to_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+        ('responses', '0006_answer_item'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='responses_a_attempt_c6c0ab_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='responses_a_qtype_1719f4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='responses_a_attempt_d1cba1_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='answer',
+            unique_together={('attempt', 'item')},
+        ),
+        migrations.AlterField(
+            model_name='answer',
+            name='item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='exams.item'),
+        ),
+        migrations.RemoveField(
+            model_name='answer',
+            name='qtype',
+        ),
+        migrations.RemoveField(
+            model_name='answer',
+            name='question_id',
+        ),
+    ]
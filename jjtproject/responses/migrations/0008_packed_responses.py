@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+        ('responses', '0007_answer_keyed_by_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40)),
+                ('item_ids', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_layouts', to='exams.exam')),
+            ],
+            options={
+                'unique_together': {('exam', 'digest')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PackedResponses',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='packed', serialize=False, to='responses.examattempt')),
+                ('data', models.BinaryField()),
+                ('packed_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='packed_responses', to='exams.exam')),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='vectors', to='responses.responselayout')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam', 'layout'], name='responses_p_exam_id_b06517_idx')],
+            },
+        ),
+    ]
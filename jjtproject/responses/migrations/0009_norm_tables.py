@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_item_registry'),
+        ('responses', '0008_packed_responses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='stanine',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='NormTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('gender', models.CharField(blank=True, max_length=10)),
+                ('level', models.CharField(blank=True, max_length=50)),
+                ('highest_education_level', models.CharField(blank=True, max_length=50)),
+                ('sample_size', models.PositiveIntegerField()),
+                ('mean', models.FloatField()),
+                ('sd', models.FloatField()),
+                ('points', models.BinaryField()),
+                ('cum_counts', models.BinaryField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('built_at', models.DateTimeField(auto_now_add=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='norm_tables', to='exams.exam')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='norm_table',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scored_attempts', to='responses.normtable'),
+        ),
+        migrations.AddIndex(
+            model_name='normtable',
+            index=models.Index(fields=['exam', 'is_active'], name='responses_n_exam_id_b90d2e_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='normtable',
+            unique_together={('exam', 'version', 'gender', 'level', 'highest_education_level')},
+        ),
+    ]
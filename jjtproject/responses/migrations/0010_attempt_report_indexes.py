@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_hash_examinee_passwords'),
+        ('exams', '0017_item_registry'),
+        ('responses', '0009_norm_tables'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['started_at', 'id'], name='responses_e_started_09722e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['submitted_at', 'id'], name='responses_e_submitt_0eef7d_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+QUESTION_MODELS = ('LikertQuestion', 'MCQQuestion', 'EssayQuestion', 'TrueFalseQuestion')
+
+
+def group_attempts_into_sittings(apps, schema_editor):
+    """Attempt #n of each exam in a battery becomes part of sitting #n of that battery."""
+    ExamAttempt = apps.get_model('responses', 'ExamAttempt')
+    Answer = apps.get_model('responses', 'Answer')
+    BatterySitting = apps.get_model('responses', 'BatterySitting')
+    Exam = apps.get_model('exams', 'Exam')
+
+    exams_per_battery = defaultdict(list)
+    for exam_id, battery_id in Exam.objects.values_list('id', 'battery_id'):
+        exams_per_battery[battery_id].append(exam_id)
+    questions_per_exam = defaultdict(int)
+    for name in QUESTION_MODELS:
+        model = apps.get_model('exams', name)
+        for row in model.objects.values('exam_id').annotate(n=Count('id')):
+            questions_per_exam[row['exam_id']] += row['n']
+    answered = dict(Answer.objects.values('attempt_id').annotate(n=Count('id')).values_list('attempt_id', 'n'))
+
+    groups = defaultdict(list)
+    for a in ExamAttempt.objects.filter(sitting__isnull=True).select_related('exam').order_by('id'):
+        groups[(a.examinee_id, a.exam.battery_id, a.attempt_number)].append(a)
+
+    for (examinee_id, battery_id, number), attempts in groups.items():
+        exam_ids = exams_per_battery[battery_id]
+        submitted = [a for a in attempts if a.status == 'submitted']
+        closed = [a for a in attempts if a.status in ('submitted', 'expired')]
+        items_total = sum(questions_per_exam[e] for e in exam_ids)
+        items_answered = sum(answered.get(a.id, 0) for a in attempts)
+        done = len(closed) >= len(exam_ids) > 0
+        durations = [a.duration_seconds for a in attempts if a.duration_seconds is not None]
+        finished = [a.submitted_at for a in attempts if a.submitted_at]
+        sitting = BatterySitting.objects.create(
+            examinee_id=examinee_id,
+            battery_id=battery_id,
+            sitting_number=number,
+            status='completed' if done else 'in_progress',
+            started_at=min(a.started_at for a in attempts),
+            last_activity_at=max(finished + [a.started_at for a in attempts]),
+            completed_at=max(finished, default=None) if done else None,
+            exams_total=len(exam_ids),
+            exams_submitted=len(submitted),
+            exams_closed=len(closed),
+            items_total=items_total,
+            items_answered=items_answered,
+            progress=min(100.0, items_answered * 100 / max(items_total, 1)),
+            duration_seconds=sum(durations) if durations else None,
+        )
+        ExamAttempt.objects.filter(id__in=[a.id for a in attempts]).update(sitting=sitting)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_examinee_search_index'),
+        ('exams', '0017_item_registry'),
+        ('responses', '0010_attempt_report_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatterySitting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sitting_number', models.PositiveIntegerField(default=1)),
+                ('status', models.CharField(choices=[('in_progress', 'In progress'), ('completed', 'Completed'), ('abandoned', 'Abandoned')], default='in_progress', max_length=16)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_activity_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('exams_total', models.PositiveSmallIntegerField(default=0)),
+                ('exams_submitted', models.PositiveSmallIntegerField(default=0)),
+                ('exams_closed', models.PositiveSmallIntegerField(default=0)),
+                ('items_total', models.PositiveIntegerField(default=0)),
+                ('items_answered', models.PositiveIntegerField(default=0)),
+                ('progress', models.FloatField(default=0)),
+                ('duration_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('battery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sittings', to='exams.testbattery')),
+                ('examinee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sittings', to='accounts.examineeaccount')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='sitting',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempts', to='responses.batterysitting'),
+        ),
+        migrations.AddIndex(
+            model_name='batterysitting',
+            index=models.Index(fields=['started_at', 'id'], name='responses_b_started_0f9172_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='batterysitting',
+            index=models.Index(fields=['examinee', 'battery', 'status'], name='responses_b_examine_169444_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='batterysitting',
+            unique_together={('examinee', 'battery', 'sitting_number')},
+        ),
+        migrations.RunPython(group_attempts_into_sittings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('responses', '0011_battery_sitting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='client_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
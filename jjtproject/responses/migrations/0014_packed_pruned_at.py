@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('responses', '0013_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='packedresponses',
+            name='pruned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+import hashlib
+import struct
+
+from django.db import migrations, models
+
+MCQ = 2  # exams.Item.MCQ
+
+
+def pin_current_choices(apps, schema_editor):
+    # Existing vectors were encoded against the choices as they are now (the
+    # best record there is); pin those and fold them into the digest the way
+    # responses.packing.compile_layout does.
+    ResponseLayout = apps.get_model("responses", "ResponseLayout")
+    Item = apps.get_model("exams", "Item")
+    MCQChoice = apps.get_model("exams", "MCQChoice")
+    for layout in ResponseLayout.objects.all():
+        data = bytes(layout.item_ids)
+        item_ids = struct.unpack(f"<{len(data) // 4}I", data)
+        source = dict(Item.objects.filter(id__in=item_ids, kind=MCQ).values_list("id", "source_id"))
+        by_question = {}
+        for question_id, choice_id in (
+            MCQChoice.objects.filter(question_id__in=list(source.values()))
+            .order_by("question_id", "id").values_list("question_id", "id")
+        ):
+            by_question.setdefault(question_id, []).append(choice_id)
+        out = []
+        for item_id in item_ids:
+            ids = by_question.get(source.get(item_id), [])
+            out.append(len(ids))
+            out.extend(ids)
+        layout.choice_ids = struct.pack(f"<{len(out)}I", *out)
+        layout.digest = hashlib.sha1(data + layout.choice_ids).hexdigest()
+        layout.save(update_fields=["choice_ids", "digest"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('responses', '0014_packed_pruned_at'),
+        ('exams', '0019_mcqchoice_question_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responselayout',
+            name='choice_ids',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(pin_current_choices, migrations.RunPython.noop),
+    ]
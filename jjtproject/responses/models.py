@@ -1,8 +1,89 @@
-from django.db import models
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.db.models import Max
 from accounts.models import ExamineeAccount
-from exams.models import Exam
+from exams.models import Exam, Item, TestBattery
+
+
+def deadline_grace():
+    """Slack after the deadline for the browser's auto-submit to arrive."""
+    return timedelta(seconds=getattr(settings, "EXAM_DEADLINE_GRACE_SECONDS", 30))
+
+
+class BatterySitting(models.Model):
+    """
+    One sitting of a whole battery: the parent of the per-exam ExamAttempt rows
+    an examinee produces in one go. Progress across the battery is kept
+    denormalized here (see responses/sittings.py), so dashboards and exports
+    read one row per sitting instead of aggregating attempts.
+    """
+    STATUS_CHOICES = [
+        ("in_progress", "In progress"),
+        ("completed", "Completed"),   # every exam submitted or expired
+        ("abandoned", "Abandoned"),
+    ]
+
+    examinee = models.ForeignKey(ExamineeAccount, on_delete=models.CASCADE, related_name="sittings")
+    battery = models.ForeignKey(TestBattery, on_delete=models.CASCADE, related_name="sittings")
+    sitting_number = models.PositiveIntegerField(default=1)
+
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="in_progress")
+    started_at = models.DateTimeField(default=timezone.now)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    # Denormalized progress (totals are snapshotted when the sitting opens)
+    exams_total = models.PositiveSmallIntegerField(default=0)
+    exams_submitted = models.PositiveSmallIntegerField(default=0)
+    exams_closed = models.PositiveSmallIntegerField(default=0)   # submitted + expired
+    items_total = models.PositiveIntegerField(default=0)
+    items_answered = models.PositiveIntegerField(default=0)
+    progress = models.FloatField(default=0)                       # percent of items answered
+    duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["started_at", "id"]),
+            models.Index(fields=["examinee", "battery", "status"]),
+        ]
+        unique_together = (("examinee", "battery", "sitting_number"),)
+
+    def __str__(self):
+        return f"Sitting #{self.sitting_number} — {self.examinee} — {self.battery}"
+
+    @classmethod
+    def open_for(cls, examinee_id, battery_id):
+        """The examinee's in-progress sitting of this battery, or a new one."""
+        sitting = (
+            cls.objects.filter(examinee_id=examinee_id, battery_id=battery_id, status="in_progress")
+            .order_by("-sitting_number").first()
+        )
+        if sitting:
+            return sitting
+
+        from exams.catalog import battery_exams, exam_question_count
+
+        exams = battery_exams(battery_id)
+        last_num = cls.objects.filter(examinee_id=examinee_id, battery_id=battery_id).aggregate(
+            Max("sitting_number")
+        )["sitting_number__max"] or 0
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    examinee_id=examinee_id,
+                    battery_id=battery_id,
+                    sitting_number=last_num + 1,
+                    exams_total=len(exams),
+                    items_total=sum(exam_question_count(e.id) for e in exams),
+                )
+        except IntegrityError:
+            # A concurrent request opened it first.
+            return cls.objects.get(examinee_id=examinee_id, battery_id=battery_id, sitting_number=last_num + 1)
 
 
 class ExamAttempt(models.Model):
@@ -17,6 +98,9 @@ class ExamAttempt(models.Model):
         ExamineeAccount, on_delete=models.CASCADE, related_name="exam_attempts"
     )
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="attempts")
+    sitting = models.ForeignKey(
+        BatterySitting, on_delete=models.SET_NULL, null=True, blank=True, related_name="attempts"
+    )
 
     # If you allow multiple tries per exam, increment attempt_number per examinee+exam
     attempt_number = models.PositiveIntegerField(default=1)
@@ -25,9 +109,16 @@ class ExamAttempt(models.Model):
     started_at = models.DateTimeField(default=timezone.now)
     submitted_at = models.DateTimeField(null=True, blank=True)
 
+    # Server-side end of the time limit (started_at + exam.time_limit_minutes); null = untimed
+    deadline = models.DateTimeField(null=True, blank=True)
+
     # Optional scoring fields (fill later during scoring)
     raw_score = models.FloatField(null=True, blank=True)
-    scaled_score = models.FloatField(null=True, blank=True)
+    scaled_score = models.FloatField(null=True, blank=True)  # percentile rank from the norm table
+    stanine = models.PositiveSmallIntegerField(null=True, blank=True)
+    norm_table = models.ForeignKey(
+        "NormTable", on_delete=models.SET_NULL, null=True, blank=True, related_name="scored_attempts"
+    )
 
     # Cached duration in seconds (set when submitted)
     duration_seconds = models.PositiveIntegerField(null=True, blank=True)
@@ -39,6 +130,9 @@ class ExamAttempt(models.Model):
         indexes = [
             models.Index(fields=["examinee", "exam"]),
             models.Index(fields=["exam", "status"]),
+            models.Index(fields=["status", "deadline"]),  # expiry sweeper
+            models.Index(fields=["started_at", "id"]),     # reports keyset order
+            models.Index(fields=["submitted_at", "id"]),
         ]
         unique_together = (("examinee", "exam", "attempt_number"),)
 
@@ -49,48 +143,133 @@ class ExamAttempt(models.Model):
     def is_submitted(self):
         return self.status == "submitted"
 
+    @property
+    def is_open(self):
+        """Still accepting answers: in progress and not past deadline (+ grace)."""
+        return self.status == "in_progress" and not self.is_past_deadline()
+
+    def is_past_deadline(self, now=None):
+        if not self.deadline:
+            return False
+        return (now or timezone.now()) > self.deadline + deadline_grace()
+
+    def seconds_left(self, now=None):
+        """Seconds until the deadline for the client countdown (None if untimed)."""
+        if not self.deadline:
+            return None
+        return max(0, int((self.deadline - (now or timezone.now())).total_seconds()))
+
+    @staticmethod
+    def compute_deadline(exam: Exam, started_at):
+        if exam.time_limit_minutes and exam.time_limit_minutes > 0:
+            return started_at + timedelta(minutes=exam.time_limit_minutes)
+        return None
+
     @classmethod
     def start_or_get(cls, examinee: ExamineeAccount, exam: Exam):
         """Convenience helper to start a new attempt if none is in session."""
         last_num = cls.objects.filter(examinee=examinee, exam=exam).aggregate(
             Max("attempt_number")
         )["attempt_number__max"] or 0
+        started_at = timezone.now()
         return cls.objects.create(
             examinee=examinee,
             exam=exam,
+            sitting=BatterySitting.open_for(examinee.id, exam.battery_id),
             attempt_number=last_num + 1,
             status="in_progress",
-            started_at=timezone.now(),
+            started_at=started_at,
+            deadline=cls.compute_deadline(exam, started_at),
         )
 
+    @classmethod
+    async def astart_or_get(cls, examinee_id, exam: Exam):
+        """Async twin of start_or_get() for the ASGI endpoints."""
+        agg = await cls.objects.filter(examinee_id=examinee_id, exam=exam).aaggregate(
+            Max("attempt_number")
+        )
+        started_at = timezone.now()
+        sitting = await sync_to_async(BatterySitting.open_for)(examinee_id, exam.battery_id)
+        return await cls.objects.acreate(
+            examinee_id=examinee_id,
+            exam=exam,
+            sitting=sitting,
+            attempt_number=(agg["attempt_number__max"] or 0) + 1,
+            status="in_progress",
+            started_at=started_at,
+            deadline=cls.compute_deadline(exam, started_at),
+        )
+
+    @classmethod
+    def expire_overdue(cls, now=None):
+        """
+        Flip every in-progress attempt past its deadline to expired in one UPDATE.
+
+        Usually runs in its own process (cron), so "expired" events are only
+        published to a shared broker; with LocalBroker no proctor stream would
+        see them and the live monitor goes by each attempt's deadline instead.
+        """
+        from .events import broker_is_shared, publish
+        from .sittings import refresh_sittings
+
+        cutoff = (now or timezone.now()) - deadline_grace()
+        with transaction.atomic():
+            rows = list(
+                cls.objects.select_for_update()
+                .filter(status="in_progress", deadline__lt=cutoff)
+                .values_list("id", "examinee_id", "exam_id", "sitting_id")
+            )
+            expired = cls.objects.filter(id__in=[r[0] for r in rows]).update(status="expired")
+            # The UPDATE sends no signals: do what signals.py does for a single expiry.
+            if broker_is_shared():
+                for attempt_id, examinee_id, exam_id, _ in rows:
+                    publish("expired", attempt=attempt_id, examinee=examinee_id, exam=exam_id)
+            refresh_sittings({r[3] for r in rows if r[3]})
+        return expired
+
+    def _mark_expired(self):
+        if self.status != "in_progress":
+            return False
+        self.status = "expired"
+        return True
+
+    def _mark_submitted(self):
+        if self.status in ("submitted", "expired"):
+            return False
+        self.status = "submitted"
+        self.submitted_at = timezone.now()
+        if self.started_at:
+            self.duration_seconds = int((self.submitted_at - self.started_at).total_seconds())
+        return True
+
+    def expire(self):
+        if self._mark_expired():
+            self.save(update_fields=["status"])
+
+    async def aexpire(self):
+        if self._mark_expired():
+            await self.asave(update_fields=["status"])
+
     def finalize(self):
-        if not self.is_submitted:
-            self.status = "submitted"
-            self.submitted_at = timezone.now()
-            if self.started_at:
-                self.duration_seconds = int((self.submitted_at - self.started_at).total_seconds())
+        if self._mark_submitted():
             self.save(update_fields=["status", "submitted_at", "duration_seconds"])
 
+    async def afinalize(self):
+        if self._mark_submitted():
+            await self.asave(update_fields=["status", "submitted_at", "duration_seconds"])
+
 
 class Answer(models.Model):
     """
     Unified answer model for all question types.
-    We store the question's integer ID (from its source table) and a qtype string.
-    Values are kept both in normalized fields and raw_value for safety.
+    Each row points at the question's exams.Item registry entry (a small FK that
+    joins back to the question); values are kept both in normalized fields and
+    raw_value for safety.
     """
-    QTYPE_CHOICES = [
-        ("mcqquestion", "MCQ"),
-        ("likertquestion", "Likert"),
-        ("truefalsequestion", "True/False"),
-        ("essayquestion", "Essay"),
-    ]
-
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name="answers")
     examinee = models.ForeignKey(ExamineeAccount, on_delete=models.CASCADE, related_name="answers")
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="answers")
-
-    question_id = models.IntegerField()                 # ID from the source question table
-    qtype = models.CharField(max_length=32, choices=QTYPE_CHOICES)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="answers")
 
     # Normalized slots (use the one that applies; others stay null)
     mcq_choice_id = models.IntegerField(null=True, blank=True)     # choice PK for MCQ
@@ -101,22 +280,145 @@ class Answer(models.Model):
     # Always keep the raw submission string for auditing/debug (what the user sent)
     raw_value = models.TextField()
 
+    # Highest client sequence number applied; writes carrying a lower one are ignored
+    client_seq = models.PositiveBigIntegerField(default=0)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["examinee", "exam"]),
+            models.Index(fields=["updated_at", "id"]),  # change feed order
+        ]
+        unique_together = (
+            ("attempt", "item"),  # one answer per item per attempt (also the attempt lookup index)
+        )
+
+    def __str__(self):
+        return f"Answer {self.item} by {self.examinee}"
+
+    # Legacy accessors (need `item` loaded; use select_related("item") in lists)
+    @property
+    def qtype(self):
+        return self.item.qtype
+
+    @property
+    def question_id(self):
+        return self.item.source_id
+
 
+class IdempotencyKey(models.Model):
+    """
+    A client-chosen key for one answer write (or sync batch) and the response it
+    got. A retry with the same key is answered from here without writing again.
+    """
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=64)
+    response = models.JSONField(null=True, blank=True)   # null while the first request is running
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # pruning
 
     class Meta:
-            indexes = [
-                models.Index(fields=["attempt", "question_id"]),
-                models.Index(fields=["examinee", "exam"]),
-                models.Index(fields=["qtype"]),
-                models.Index(fields=["attempt", "qtype", "question_id"]),
-            ]
-            unique_together = (
-                ("attempt", "qtype", "question_id"),  # <-- THIS must be present
-            )        
+        unique_together = (("attempt", "key"),)
+
+    def __str__(self):
+        return f"{self.key} — attempt {self.attempt_id}"
+
+
+class ExportWatermark(models.Model):
+    """
+    Per-consumer position in the Answer change feed (see responses/changefeed.py).
+    The (last_updated_at, last_id) pair is the last row the consumer received.
+    """
+    consumer = models.CharField(max_length=100, unique=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    rows_exported = models.PositiveBigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.consumer} @ {self.last_updated_at or 'start'}"
+
+
+class ResponseLayout(models.Model):
+    """
+    Compiled order of an exam's fixed-format items (Likert/MCQ/TF): position i of
+    every PackedResponses vector built with this layout answers item_ids[i].
+    choice_ids pins what an MCQ byte means: code n is the n-th choice id listed
+    for that position. A new layout is compiled only when the exam's item set
+    or an MCQ's choice set changes, so editing choices never reinterprets
+    vectors already stored.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="response_layouts")
+    digest = models.CharField(max_length=40)         # sha1 of item_ids + choice_ids
+    item_ids = models.BinaryField()                  # little-endian uint32 per position
+    choice_ids = models.BinaryField(default=b"")     # per position: uint32 count, then that many choice ids
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (("exam", "digest"),)
+
+    def __str__(self):
+        return f"Layout {self.id} — {self.exam} ({len(self)} items)"
+
+    def __len__(self):
+        return len(self.item_ids) // 4
+
+
+class PackedResponses(models.Model):
+    """
+    One attempt's fixed-format responses, one byte per item in layout order
+    (encoding in responses/packing.py). Written when the attempt closes.
+    Once pruned_at is set its Likert/MCQ/TF Answer rows are gone and this is
+    the only copy of them, so it is never rebuilt.
+    """
+    attempt = models.OneToOneField(
+        ExamAttempt, on_delete=models.CASCADE, primary_key=True, related_name="packed"
+    )
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="packed_responses")
+    layout = models.ForeignKey(ResponseLayout, on_delete=models.PROTECT, related_name="vectors")
+    data = models.BinaryField()
+    packed_at = models.DateTimeField(auto_now=True)
+    pruned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["exam", "layout"]),  # whole-exam matrix reads
+        ]
+
+    def __str__(self):
+        return f"Packed {self.attempt_id} ({len(self.data)} bytes)"
+
+
+class NormTable(models.Model):
+    """
+    Raw-score distribution of one exam for one demographic group, as sorted
+    distinct raw scores plus cumulative counts (see responses/norms.py).
+    A blank group field means "any". Each build of an exam's norms is a new
+    version; only the active version is used for lookups.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="norm_tables")
+    version = models.PositiveIntegerField()
+    gender = models.CharField(max_length=10, blank=True)
+    level = models.CharField(max_length=50, blank=True)
+    highest_education_level = models.CharField(max_length=50, blank=True)
+
+    sample_size = models.PositiveIntegerField()
+    mean = models.FloatField()
+    sd = models.FloatField()
+    points = models.BinaryField()       # little-endian float64, sorted distinct raw scores
+    cum_counts = models.BinaryField()   # little-endian uint32, attempts scoring <= points[i]
+
+    is_active = models.BooleanField(default=False)
+    built_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["exam", "is_active"]),
+        ]
+        unique_together = (("exam", "version", "gender", "level", "highest_education_level"),)
 
     def __str__(self):
-        return f"Answer q{self.question_id} ({self.qtype}) by {self.examinee}"
+        group = " / ".join(v for v in (self.gender, self.level, self.highest_education_level) if v) or "All"
+        return f"{self.exam} v{self.version} — {group} (n={self.sample_size})"
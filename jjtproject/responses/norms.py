@@ -0,0 +1,197 @@
+# responses/norms.py
+"""
+Norm tables: raw score -> percentile rank and stanine.
+
+`build_norms` turns an exam's historical ExamAttempt.raw_score values into one
+NormTable per demographic group (gender, level, highest education, and every
+coarser combination down to "All"). A table stores the sorted distinct raw
+scores and cumulative counts, so a lookup is two binary searches and a whole
+cohort is scored with a single np.searchsorted per table.
+
+Percentiles use the mid-rank definition: the share of the norm group scoring
+below the raw score plus half the share scoring exactly that score.
+Stanines use the standard 4-7-12-17-20-17-12-7-4 percent bands.
+"""
+import itertools
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Max
+
+from .breakdown import bump_scores_version
+from .models import ExamAttempt, NormTable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GROUP_FIELDS = ("gender", "level", "highest_education_level")
+
+# Most specific group first; on ties gender outranks level outranks education.
+FALLBACK_ORDER = sorted(
+    itertools.product((True, False), repeat=len(GROUP_FIELDS)),
+    key=lambda mask: -sum(mask),
+)
+
+STANINE_CUTS = (4, 11, 23, 40, 60, 77, 89, 96)  # upper percentile of stanines 1..8
+
+
+def min_sample():
+    """Smallest group that gets its own table (the "All" table is always built)."""
+    return getattr(settings, "NORMS_MIN_SAMPLE", 30)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured("NumPy is required for norm tables (pip install numpy).")
+
+
+def _group_key(values, mask):
+    return tuple(v if use else "" for v, use in zip(values, mask))
+
+
+# ----------------------------
+# Building
+# ----------------------------
+
+def build_norms(exam_id, since=None, activate=True, minimum=None):
+    """Build a new norm version for one exam from submitted, scored attempts. Returns the tables."""
+    _require_numpy()
+    minimum = min_sample() if minimum is None else minimum
+
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, status="submitted", raw_score__isnull=False)
+    if since:
+        attempts = attempts.filter(submitted_at__gte=since)
+    rows = list(attempts.values_list("raw_score", *(f"examinee__{f}" for f in GROUP_FIELDS)))
+    if not rows:
+        return []
+
+    scores = np.fromiter((r[0] for r in rows), dtype=np.float64, count=len(rows))
+    members = defaultdict(list)
+    for i, row in enumerate(rows):
+        values = row[1:]
+        for mask in FALLBACK_ORDER:
+            if all(values[j] for j, use in enumerate(mask) if use):  # unknown demographics only count upward
+                members[_group_key(values, mask)].append(i)
+
+    version = (
+        NormTable.objects.filter(exam_id=exam_id).aggregate(Max("version"))["version__max"] or 0
+    ) + 1
+    all_key = ("",) * len(GROUP_FIELDS)
+    tables = []
+    for key, idx in members.items():
+        if len(idx) < minimum and key != all_key:
+            continue
+        group_scores = scores[idx]
+        points, counts = np.unique(group_scores, return_counts=True)
+        tables.append(NormTable(
+            exam_id=exam_id,
+            version=version,
+            **dict(zip(GROUP_FIELDS, key)),
+            sample_size=len(idx),
+            mean=float(group_scores.mean()),
+            sd=float(group_scores.std(ddof=1)) if len(idx) > 1 else 0.0,
+            points=points.astype("<f8").tobytes(),
+            cum_counts=np.cumsum(counts).astype("<u4").tobytes(),
+            is_active=activate,
+        ))
+
+    with transaction.atomic():
+        if activate:
+            NormTable.objects.filter(exam_id=exam_id, is_active=True).update(is_active=False)
+        NormTable.objects.bulk_create(tables)
+    return tables
+
+
+# ----------------------------
+# Lookup
+# ----------------------------
+
+class Norms:
+    """The tables of one exam version (default: active), decoded once and reused for many lookups."""
+
+    def __init__(self, exam_id, version=None):
+        _require_numpy()
+        tables = NormTable.objects.filter(exam_id=exam_id)
+        tables = tables.filter(version=version) if version else tables.filter(is_active=True)
+        self.tables = {
+            tuple(getattr(t, f) for f in GROUP_FIELDS): t for t in tables
+        }
+        self._arrays = {}
+
+    def table_for(self, *values):
+        """Most specific table covering (gender, level, highest_education_level), or None."""
+        values = tuple(v or "" for v in values)
+        for mask in FALLBACK_ORDER:
+            if all(values[j] for j, use in enumerate(mask) if use):
+                table = self.tables.get(_group_key(values, mask))
+                if table is not None:
+                    return table
+        return None
+
+    def _decoded(self, table):
+        if table.id not in self._arrays:
+            self._arrays[table.id] = (
+                np.frombuffer(table.points, dtype="<f8"),
+                np.frombuffer(table.cum_counts, dtype="<u4"),
+            )
+        return self._arrays[table.id]
+
+    def percentiles(self, table, raw_scores):
+        """Mid-rank percentile (0-100) of each raw score against one table."""
+        points, cum = self._decoded(table)
+        raw = np.asarray(raw_scores, dtype=np.float64)
+        cum0 = np.concatenate(([0], cum))  # cum0[i] = attempts below points[i]
+        below = cum0[np.searchsorted(points, raw, side="left")]
+        upto = cum0[np.searchsorted(points, raw, side="right")]
+        return (below + upto) * (50.0 / table.sample_size)
+
+    @staticmethod
+    def stanines(percentiles):
+        return np.searchsorted(STANINE_CUTS, percentiles, side="right") + 1
+
+    def lookup(self, raw_score, *values):
+        """(percentile, stanine, table) for one score, or (None, None, None) without a table."""
+        table = self.table_for(*values)
+        if table is None:
+            return None, None, None
+        pct = self.percentiles(table, [raw_score])
+        return round(float(pct[0]), 1), int(self.stanines(pct)[0]), table
+
+
+def apply_norms(exam_id, version=None, missing_only=False, batch_size=2000):
+    """Fill scaled_score (percentile), stanine and norm_table for an exam's scored attempts."""
+    norms = Norms(exam_id, version)
+    if not norms.tables:
+        return 0
+
+    attempts = ExamAttempt.objects.filter(exam_id=exam_id, raw_score__isnull=False)
+    if missing_only:
+        attempts = attempts.filter(norm_table__isnull=True)
+
+    by_table = defaultdict(lambda: ([], []))
+    for attempt_id, raw, *values in attempts.values_list(
+        "id", "raw_score", *(f"examinee__{f}" for f in GROUP_FIELDS)
+    ):
+        table = norms.table_for(*values)
+        if table is not None:
+            ids, scores = by_table[table]
+            ids.append(attempt_id)
+            scores.append(raw)
+
+    updated = []
+    for table, (ids, scores) in by_table.items():
+        pct = np.round(norms.percentiles(table, scores), 1)
+        stanines = norms.stanines(pct)
+        updated += [
+            ExamAttempt(id=i, scaled_score=float(p), stanine=int(s), norm_table_id=table.id)
+            for i, p, s in zip(ids, pct, stanines)
+        ]
+    ExamAttempt.objects.bulk_update(
+        updated, ["scaled_score", "stanine", "norm_table"], batch_size=batch_size
+    )
+    bump_scores_version()  # bulk_update sends no signals
+    return len(updated)
@@ -0,0 +1,279 @@
+# responses/packing.py
+"""
+Packed response vectors for fixed-format items.
+
+Likert, MCQ and true/false responses each fit in a byte, but Answer spends a
+full row (timestamps, raw_value, indexes) on every one. With packed storage on
+(settings.RESPONSES_PACKED_STORAGE), closing an attempt also writes all of its
+fixed-format responses as one byte string in the exam's compiled item order
+(ResponseLayout). Scoring and analytics then read an exam as a NumPy uint8
+matrix, and Answer becomes an audit log that `manage.py pack_responses --prune`
+can trim (`prune_answers` keeps any answer its vector could not encode). A pruned vector (pruned_at set) is never rebuilt, and code that
+counts an attempt's answers goes through `answered_counts`, which reads the
+vector of a pruned attempt.
+
+Byte codes per position:
+    0           unanswered (or a value that does not fit the code)
+    Likert      the scale value, 1..255
+    MCQ         1-based position of the choice among the question's choices (by id)
+                when the layout was compiled, as pinned in ResponseLayout.choice_ids
+    True/False  1 = True, 2 = False
+
+Writing needs only the standard library; NumPy is required for decoding.
+"""
+import hashlib
+import itertools
+import struct
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from exams.models import Item, MCQChoice
+from .models import Answer, ExamAttempt, PackedResponses, ResponseLayout
+
+try:
+    import numpy as np
+except ImportError:  # packing still works; decoding needs NumPy
+    np = None
+
+PACKED_KINDS = (Item.LIKERT, Item.MCQ, Item.TRUEFALSE)
+UNANSWERED = 0
+TF_TRUE, TF_FALSE = 1, 2
+
+
+def packing_enabled():
+    return getattr(settings, "RESPONSES_PACKED_STORAGE", False)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured("NumPy is required to decode packed responses (pip install numpy).")
+
+
+def _current_choices(item_ids):
+    """Current choice ids (by id) of each MCQ item given, per item position; () for the rest."""
+    source = dict(Item.objects.filter(id__in=item_ids, kind=Item.MCQ).values_list("id", "source_id"))
+    by_question = {}
+    for question_id, choice_id in (
+        MCQChoice.objects.filter(question_id__in=list(source.values()))
+        .order_by("question_id", "id")
+        .values_list("question_id", "id")
+    ):
+        by_question.setdefault(question_id, []).append(choice_id)
+    return [tuple(by_question.get(source.get(item_id), ())) for item_id in item_ids]
+
+
+def pack_choices(choices):
+    """ResponseLayout.choice_ids blob for a per-position list of choice id tuples."""
+    out = []
+    for ids in choices:
+        out.append(len(ids))
+        out.extend(ids)
+    return struct.pack(f"<{len(out)}I", *out)
+
+
+def compile_layout(exam_id):
+    """The exam's current ResponseLayout (created if its items or MCQ choices changed)."""
+    item_ids = list(
+        Item.objects.filter(exam_id=exam_id, kind__in=PACKED_KINDS)
+        # same order the exam page shows questions in
+        .order_by(F("position").asc(nulls_last=True), "source_id", "kind")
+        .values_list("id", flat=True)
+    )
+    blob = struct.pack(f"<{len(item_ids)}I", *item_ids)
+    choice_blob = pack_choices(_current_choices(item_ids))
+    layout, _ = ResponseLayout.objects.get_or_create(
+        exam_id=exam_id,
+        digest=hashlib.sha1(blob + choice_blob).hexdigest(),
+        defaults={"item_ids": blob, "choice_ids": choice_blob},
+    )
+    return layout
+
+
+def layout_item_ids(layout):
+    data = bytes(layout.item_ids)
+    return struct.unpack(f"<{len(data) // 4}I", data)
+
+
+def layout_choices(layout):
+    """Choice ids pinned for each layout position (empty for Likert/TF), in code order."""
+    data = bytes(layout.choice_ids)
+    values = struct.unpack(f"<{len(data) // 4}I", data)
+    choices, i = [], 0
+    while i < len(values):
+        n = values[i]
+        choices.append(values[i + 1:i + 1 + n])
+        i += 1 + n
+    return choices
+
+
+def _choice_codes(layout):
+    """{choice id: MCQ byte code} under a layout."""
+    return {
+        choice_id: n
+        for ids in layout_choices(layout) for n, choice_id in enumerate(ids, start=1) if n < 256
+    }
+
+
+def encode(kind, likert_value, mcq_choice_id, truefalse_value, choice_codes):
+    """Byte code for one response (see module docstring)."""
+    if kind == Item.LIKERT:
+        return likert_value if likert_value is not None and 0 < likert_value < 256 else UNANSWERED
+    if kind == Item.MCQ:
+        return choice_codes.get(mcq_choice_id, UNANSWERED) if mcq_choice_id is not None else UNANSWERED
+    if kind == Item.TRUEFALSE and truefalse_value is not None:
+        return TF_TRUE if truefalse_value else TF_FALSE
+    return UNANSWERED
+
+
+class AlreadyPruned(Exception):
+    """The attempt's Answer rows were pruned; its packed vector can't be rebuilt from them."""
+
+
+def pack_attempt(attempt_id):
+    """Build (or rebuild) the packed vector of one attempt from its Answer rows."""
+    if PackedResponses.objects.filter(attempt_id=attempt_id, pruned_at__isnull=False).exists():
+        raise AlreadyPruned(attempt_id)
+    attempt = ExamAttempt.objects.only("id", "exam_id").get(id=attempt_id)
+    layout = compile_layout(attempt.exam_id)
+    item_ids = layout_item_ids(layout)
+    position = {item_id: i for i, item_id in enumerate(item_ids)}
+    choices = _choice_codes(layout)
+
+    data = bytearray(len(item_ids))
+    for item_id, kind, likert, choice, tf in (
+        Answer.objects.filter(attempt_id=attempt_id, item_id__in=item_ids)
+        .values_list("item_id", "item__kind", "likert_value", "mcq_choice_id", "truefalse_value")
+    ):
+        data[position[item_id]] = encode(kind, likert, choice, tf, choices)
+
+    packed, _ = PackedResponses.objects.update_or_create(
+        attempt_id=attempt_id,
+        defaults={"exam_id": attempt.exam_id, "layout": layout, "data": bytes(data)},
+    )
+    return packed
+
+
+def prune_answers(vectors, chunk_size=1000):
+    """
+    Mark a PackedResponses queryset pruned and delete the Likert/MCQ/TF Answer
+    rows it holds; returns the number deleted. An answer whose byte is 0 while
+    its raw_value is not blank (a value the code can't hold, a choice the
+    layout doesn't know, an item outside the layout) is not in the vector and
+    is kept.
+    """
+    deleted = 0
+    positions = {}  # layout id -> {item id: position}
+    with transaction.atomic():
+        # Marked first: from here on the vector is the record and is never rebuilt.
+        vectors.filter(pruned_at__isnull=True).update(pruned_at=timezone.now())
+        rows = vectors.values_list("attempt_id", "layout_id", "data").iterator(chunk_size=chunk_size)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            by_attempt = {}
+            for attempt_id, layout_id, data in chunk:
+                if layout_id not in positions:
+                    item_ids = layout_item_ids(ResponseLayout.objects.only("item_ids").get(id=layout_id))
+                    positions[layout_id] = {item_id: i for i, item_id in enumerate(item_ids)}
+                by_attempt[attempt_id] = (positions[layout_id], bytes(data))
+            doomed = []
+            for answer_id, attempt_id, item_id, raw_value in Answer.objects.filter(
+                attempt_id__in=list(by_attempt), item__kind__in=PACKED_KINDS
+            ).values_list("id", "attempt_id", "item_id", "raw_value"):
+                position, data = by_attempt[attempt_id]
+                i = position.get(item_id)
+                if (i is not None and data[i] != UNANSWERED) or not (raw_value or "").strip():
+                    doomed.append(answer_id)
+            if doomed:
+                deleted += Answer.objects.filter(id__in=doomed).delete()[0]
+    return deleted
+
+
+def answered_counts(attempt_ids):
+    """
+    {attempt id: items answered}: the attempt's Answer rows, plus the non-blank
+    bytes of its packed vector once those rows have been pruned.
+    """
+    attempt_ids = list(attempt_ids)
+    counts = dict(
+        Answer.objects.filter(attempt_id__in=attempt_ids)
+        .values("attempt_id").annotate(n=Count("id")).values_list("attempt_id", "n")
+    )
+    for attempt_id, data in PackedResponses.objects.filter(
+        attempt_id__in=attempt_ids, pruned_at__isnull=False
+    ).values_list("attempt_id", "data"):
+        data = bytes(data)
+        counts[attempt_id] = counts.get(attempt_id, 0) + len(data) - data.count(UNANSWERED)
+    return counts
+
+
+def pack_on_close(attempt):
+    """Called when an attempt is submitted/expired; packs after commit so answers are final."""
+    if packing_enabled():
+        transaction.on_commit(lambda: _pack_closed(attempt.id))
+
+
+def _pack_closed(attempt_id):
+    try:
+        pack_attempt(attempt_id)
+    except AlreadyPruned:
+        pass  # closed again after pruning: the stored vector is the record
+
+
+# ----------------------------
+# Decoding (NumPy)
+# ----------------------------
+
+def vector(packed):
+    """One attempt's responses as a read-only uint8 array over the stored bytes (no copy)."""
+    _require_numpy()
+    return np.frombuffer(packed.data, dtype=np.uint8)
+
+
+def exam_matrix(exam_id, layout=None):
+    """
+    (attempt_ids, layout, matrix) for every packed attempt of an exam under one
+    layout (default: the most recent one used). matrix has one uint8 row per
+    attempt and one column per layout position.
+    """
+    _require_numpy()
+    if layout is None:
+        layout = (
+            ResponseLayout.objects.filter(exam_id=exam_id, vectors__isnull=False)
+            .order_by("-id").first()
+        )
+        if layout is None:
+            return [], None, np.zeros((0, 0), dtype=np.uint8)
+
+    attempt_ids, blobs = [], []
+    for attempt_id, data in (
+        PackedResponses.objects.filter(exam_id=exam_id, layout=layout)
+        .order_by("attempt_id").values_list("attempt_id", "data").iterator(chunk_size=5000)
+    ):
+        attempt_ids.append(attempt_id)
+        blobs.append(data)
+    width = len(layout)
+    matrix = np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(len(blobs), width)
+    return attempt_ids, layout, matrix
+
+
+def layout_kinds(layout):
+    """Item kind per layout position (for masking Likert/MCQ/TF columns)."""
+    _require_numpy()
+    item_ids = layout_item_ids(layout)
+    kinds = dict(Item.objects.filter(id__in=item_ids).values_list("id", "kind"))
+    return np.array([kinds[i] for i in item_ids], dtype=np.uint8)
+
+
+def mcq_key(layout):
+    """Correct-choice code per layout position (0 where there is none or not an MCQ)."""
+    _require_numpy()
+    codes = _choice_codes(layout)
+    correct = set(MCQChoice.objects.filter(id__in=list(codes), is_correct=True).values_list("id", flat=True))
+    key = np.zeros(len(layout), dtype=np.uint8)
+    for i, ids in enumerate(layout_choices(layout)):
+        code = next((codes[c] for c in ids if c in correct), UNANSWERED)
+        key[i] = code
+    return key
@@ -0,0 +1,51 @@
+# responses/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .breakdown import bump_examinee_version
+from .events import publish
+from .models import Answer, ExamAttempt, deadline_grace
+from .packing import pack_on_close
+from .sittings import note_answer, refresh_sittings
+
+
+@receiver(post_save, sender=ExamAttempt)
+def _attempt_saved(sender, instance, created, update_fields=None, **kwargs):
+    bump_examinee_version(instance.examinee_id)
+    if created:
+        # Only use related rows that are already loaded; publishing must not query.
+        examinee = instance.examinee if ExamAttempt.examinee.is_cached(instance) else None
+        exam = instance.exam if ExamAttempt.exam.is_cached(instance) else None
+        publish(
+            "started",
+            attempt=instance.id,
+            examinee=instance.examinee_id,
+            exam=instance.exam_id,
+            examinee_name=f"{examinee.first_name} {examinee.last_name}".strip() if examinee else "",
+            exam_title=exam.title if exam else "",
+            started_at=instance.started_at.isoformat(),
+            # the live monitor flips the row itself; the sweeper may not reach its broker
+            expires_at=(instance.deadline + deadline_grace()).isoformat() if instance.deadline else None,
+        )
+    elif update_fields and "status" in update_fields and instance.status in ("submitted", "expired"):
+        publish(instance.status, attempt=instance.id, examinee=instance.examinee_id, exam=instance.exam_id)
+        pack_on_close(instance)
+        if instance.sitting_id:
+            refresh_sittings([instance.sitting_id])
+
+
+@receiver(post_save, sender=Answer)
+def _answer_saved(sender, instance, created, **kwargs):
+    # Re-answers don't change the count; only new rows do.
+    if created:
+        bump_examinee_version(instance.examinee_id)
+        note_answer(instance.attempt_id)
+        publish("answer_added", attempt=instance.attempt_id, exam=instance.exam_id)
+
+
+@receiver(post_delete, sender=ExamAttempt)
+@receiver(post_delete, sender=Answer)
+def _attempt_or_answer_deleted(sender, instance, **kwargs):
+    bump_examinee_version(instance.examinee_id)
+    if sender is ExamAttempt and instance.sitting_id:
+        refresh_sittings([instance.sitting_id])
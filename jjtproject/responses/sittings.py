@@ -0,0 +1,84 @@
+# responses/sittings.py
+"""
+Denormalized battery progress on BatterySitting.
+
+Two write paths keep the counters current:
+
+  * `note_answer` runs for every new Answer (signals.py). It is one UPDATE
+    that bumps items_answered / progress / last_activity_at through the
+    attempt's sitting, with no reads.
+  * `refresh_sittings` recomputes a sitting from its attempts. It runs when
+    an attempt closes or is deleted, and after ExamAttempt.expire_overdue.
+    It costs two queries for any number of sittings, plus one for pruned
+    packed vectors (packing.answered_counts). Only the latest attempt
+    per exam counts, so a retaken exam is not counted twice.
+
+A sitting whose exams are all submitted or expired becomes "completed", and
+the next attempt the examinee starts opens a new sitting.
+"""
+from collections import defaultdict
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Greatest, Least
+from django.utils import timezone
+
+from .models import BatterySitting, ExamAttempt
+from .packing import answered_counts
+
+CLOSED = ("submitted", "expired")
+
+
+def note_answer(attempt_id):
+    """Count one newly answered item on the attempt's sitting."""
+    answered = F("items_answered") + 1
+    BatterySitting.objects.filter(attempts__id=attempt_id).update(
+        items_answered=answered,
+        progress=Least(
+            Value(100.0),
+            Cast(answered, FloatField()) * 100 / Greatest(F("items_total"), Value(1)),
+        ),
+        last_activity_at=timezone.now(),
+    )
+
+
+def refresh_sittings(sitting_ids):
+    """Recompute the denormalized progress of these sittings from their attempts."""
+    sitting_ids = list(sitting_ids)
+    if not sitting_ids:
+        return 0
+
+    latest = {}  # (sitting, exam) -> newest attempt row
+    for row in (
+        ExamAttempt.objects.filter(sitting_id__in=sitting_ids)
+        .order_by("sitting_id", "exam_id", "-attempt_number", "-id")
+        .values("id", "sitting_id", "exam_id", "status", "submitted_at", "duration_seconds")
+    ):
+        latest.setdefault((row["sitting_id"], row["exam_id"]), row)
+
+    answered = answered_counts(r["id"] for r in latest.values())
+
+    per_sitting = defaultdict(list)
+    for (sitting_id, _), row in latest.items():
+        per_sitting[sitting_id].append(row)
+
+    sittings = list(BatterySitting.objects.filter(id__in=sitting_ids))
+    for s in sittings:
+        rows = per_sitting.get(s.id, [])
+        s.exams_submitted = sum(r["status"] == "submitted" for r in rows)
+        s.exams_closed = sum(r["status"] in CLOSED for r in rows)
+        s.items_answered = sum(answered.get(r["id"], 0) for r in rows)
+        s.progress = min(100.0, s.items_answered * 100 / max(s.items_total, 1))
+        durations = [r["duration_seconds"] for r in rows if r["duration_seconds"] is not None]
+        s.duration_seconds = sum(durations) if durations else None
+        if s.status == "in_progress" and s.exams_total and s.exams_closed >= s.exams_total:
+            s.status = "completed"
+            s.completed_at = max((r["submitted_at"] for r in rows if r["submitted_at"]), default=timezone.now())
+            s.progress = 100.0 if s.exams_submitted == s.exams_total else s.progress
+        if s.completed_at and s.completed_at > s.last_activity_at:
+            s.last_activity_at = s.completed_at
+
+    BatterySitting.objects.bulk_update(sittings, [
+        "status", "completed_at", "last_activity_at", "exams_submitted", "exams_closed",
+        "items_answered", "progress", "duration_seconds",
+    ])
+    return len(sittings)
@@ -0,0 +1,74 @@
+# responses/sync.py
+"""
+Batched answer sync for the offline exam client (static/js/exam_offline.js).
+
+The client queues answers in IndexedDB and posts them in batches:
+
+    {"batch_id": "<uuid>", "attempt_id": 1, "exam_id": 2,
+     "answers": [{"question_id": 3, "qtype": "likertquestion", "value": "4", "seq": 17}, ...]}
+
+`seq` increases with every change the client makes in an attempt. The server
+reconciles per (attempt, qtype, question_id), i.e. per Answer row. A write
+only lands if its seq is higher than the row's client_seq (see writes.py),
+so a late or repeated batch can never clobber a newer answer. The batch_id is
+the request's idempotency key: a retry gets the stored response back without
+touching the answers at all.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from exams.catalog import resolve_item_id
+
+from .writes import SAVED, write_answer
+
+
+def max_batch():
+    return getattr(settings, "RESPONSES_SYNC_MAX_BATCH", 500)
+
+
+def parse_batch(data):
+    """
+    (batch_id, attempt_id, exam_id, entries) from a request body, where entries
+    are de-duplicated [(qtype, question_id, value, seq)]. Raises ValueError.
+    """
+    entries = data.get("answers")
+    batch_id = str(data.get("batch_id") or "")
+    if not isinstance(entries, list) or not batch_id:
+        raise ValueError("Missing fields")
+    if len(batch_id) > 64:
+        raise ValueError("batch_id too long")
+    try:
+        attempt_id, exam_id = int(data["attempt_id"]), int(data["exam_id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Missing fields")
+    if len(entries) > max_batch():
+        raise ValueError(f"At most {max_batch()} answers per batch")
+
+    latest = {}
+    for e in entries:
+        try:
+            key = (str(e["qtype"]), int(e["question_id"]))
+            value, seq = str(e["value"]), int(e["seq"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Malformed answer")
+        if seq < 1:
+            raise ValueError("seq must be positive")
+        if key not in latest or seq > latest[key][1]:
+            latest[key] = (value, seq)
+    return batch_id, attempt_id, exam_id, [(qtype, qid, value, seq) for (qtype, qid), (value, seq) in latest.items()]
+
+
+def apply_batch(attempt, exam_id, entries, batch_id):
+    """Apply parsed entries to an open attempt; returns the result the client acknowledges."""
+    result = {"status": "synced", "batch_id": batch_id, "applied": 0, "stale": 0, "unknown": [], "acked_seq": 0}
+    with transaction.atomic():
+        for qtype, question_id, value, seq in entries:
+            result["acked_seq"] = max(result["acked_seq"], seq)
+            item_id = resolve_item_id(exam_id, qtype, question_id)
+            if item_id is None:
+                result["unknown"].append(question_id)
+            elif write_answer(attempt, exam_id, item_id, qtype, value, seq=seq) == SAVED:
+                result["applied"] += 1
+            else:
+                result["stale"] += 1  # already have this write or a newer one
+    return result
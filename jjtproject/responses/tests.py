@@ -1,3 +1,324 @@
-from django.test import TestCase
+import csv
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import ExamineeAccount
+from exams.models import Exam, Item, LikertQuestion, LikertScale, MCQChoice, MCQQuestion, TestBattery
+
+from .events import LocalBroker
+from .models import Answer, ExamAttempt, ExportWatermark, NormTable
+from .norms import build_norms
+from .packing import answered_counts, compile_layout, mcq_key, pack_attempt, vector
+from .writes import SAVED, STALE, UNCHANGED, remember, replayed, write_answer
+
+
+def make_examinee(battery, username="examinee", **fields):
+    defaults = {
+        "password": "x", "expiration_from": date(2026, 1, 1), "expiration_to": date(2099, 12, 31),
+        "first_name": "A", "last_name": "B", "gender": "Male",
+    }
+    return ExamineeAccount.objects.create(username=username, test_battery=battery, **{**defaults, **fields})
+
+
+class AnswerItemMigrationTests(TransactionTestCase):
+    """0006/0007 move answers from (qtype, question_id) to the Item registry."""
+
+    before = [("responses", "0005_examattempt_deadline"), ("exams", "0017_item_registry")]
+    after = [("responses", "0007_answer_keyed_by_item")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.old_apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate_forward(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        return executor.loader.project_state(self.after).apps
+
+    def test_unknown_qtype_is_dropped_instead_of_breaking_not_null(self):
+        TestBattery = self.old_apps.get_model("exams", "TestBattery")
+        Exam = self.old_apps.get_model("exams", "Exam")
+        MCQQuestion = self.old_apps.get_model("exams", "MCQQuestion")
+        ExamineeAccount = self.old_apps.get_model("accounts", "ExamineeAccount")
+        ExamAttempt = self.old_apps.get_model("responses", "ExamAttempt")
+        Answer = self.old_apps.get_model("responses", "Answer")
+
+        battery = TestBattery.objects.create(name="Battery")
+        exam = Exam.objects.create(battery=battery, title="Exam")
+        question = MCQQuestion.objects.create(exam=exam, question_text="Q?")
+        examinee = ExamineeAccount.objects.create(
+            username="examinee", password="x", test_battery=battery,
+            expiration_from=date(2026, 1, 1), expiration_to=date(2026, 12, 31),
+            first_name="A", last_name="B", gender="Male",
+        )
+        attempt = ExamAttempt.objects.create(examinee=examinee, exam=exam)
+        common = {"attempt": attempt, "examinee": examinee, "exam": exam}
+        kept = Answer.objects.create(qtype="mcqquestion", question_id=question.pk, raw_value="1", **common)
+        Answer.objects.create(qtype="bogus", question_id=question.pk, raw_value="?", **common)
+
+        with self.assertLogs("responses.migrations.0006_answer_item", "WARNING") as logs:
+            new_apps = self.migrate_forward()
+
+        self.assertIn("'bogus'", logs.output[0])
+        Answer = new_apps.get_model("responses", "Answer")
+        Item = new_apps.get_model("exams", "Item")
+        self.assertEqual(list(Answer.objects.values_list("id", flat=True)), [kept.pk])
+        self.assertEqual(
+            Answer.objects.get().item_id,
+            Item.objects.get(kind=2, source_id=question.pk).pk,
+        )
+
+
+class ApplyNormsCommandTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        self.exam = Exam.objects.create(battery=battery, title="Exam")
+        self.attempts = [
+            ExamAttempt.objects.create(
+                examinee=make_examinee(battery, f"e{score}"), exam=self.exam,
+                status="submitted", raw_score=score,
+            )
+            for score in (10, 20, 30, 40)
+        ]
+
+    def scaled(self):
+        return [
+            (a.scaled_score, a.stanine)
+            for a in ExamAttempt.objects.filter(exam=self.exam).order_by("raw_score")
+        ]
+
+    def test_writes_mid_rank_percentiles_and_stanines(self):
+        tables = build_norms(self.exam.id, minimum=1)
+        out = StringIO()
+        call_command("apply_norms", "--exam", str(self.exam.id), stdout=out)
+
+        self.assertIn("4 attempt(s) scored", out.getvalue())
+        self.assertEqual(self.scaled(), [(12.5, 3), (37.5, 4), (62.5, 6), (87.5, 7)])
+        male = next(t for t in tables if (t.gender, t.level, t.highest_education_level) == ("Male", "", ""))
+        self.assertEqual(
+            set(ExamAttempt.objects.filter(exam=self.exam).values_list("norm_table_id", flat=True)), {male.id}
+        )
+
+    def test_norm_version_selects_an_inactive_version(self):
+        build_norms(self.exam.id, minimum=1)
+        ExamAttempt.objects.filter(pk=self.attempts[0].pk).update(raw_score=50)
+        build_norms(self.exam.id, minimum=1, activate=False)  # version 2: 20, 30, 40, 50
+
+        call_command("apply_norms", "--exam", str(self.exam.id), "--norm-version", "2", stdout=StringIO())
+        self.assertEqual(self.scaled(), [(12.5, 3), (37.5, 4), (62.5, 6), (87.5, 7)])
+        self.assertEqual(
+            set(NormTable.objects.filter(
+                id__in=ExamAttempt.objects.filter(exam=self.exam).values("norm_table_id")
+            ).values_list("version", flat=True)),
+            {2},
+        )
+
+
+class ExpireOverdueTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        exam = Exam.objects.create(battery=battery, title="Exam")
+        past = timezone.now() - timedelta(hours=1)
+        self.overdue = ExamAttempt.objects.create(
+            examinee=make_examinee(battery, "late"), exam=exam, deadline=past,
+        )
+        self.open = ExamAttempt.objects.create(
+            examinee=make_examinee(battery, "early"), exam=exam, deadline=timezone.now() + timedelta(hours=1),
+        )
+
+    def sweep(self, broker):
+        with mock.patch("responses.events._broker", broker), self.captureOnCommitCallbacks(execute=True):
+            return ExamAttempt.expire_overdue()
+
+    def test_expires_only_overdue_attempts(self):
+        self.assertEqual(self.sweep(LocalBroker()), 1)
+        self.overdue.refresh_from_db()
+        self.open.refresh_from_db()
+        self.assertEqual((self.overdue.status, self.open.status), ("expired", "in_progress"))
+
+    def test_publishes_only_to_a_shared_broker(self):
+        local = LocalBroker()
+        self.sweep(local)
+        self.assertEqual(local.last_id, 0)
+
+        ExamAttempt.objects.filter(pk=self.overdue.pk).update(status="in_progress")
+        shared = LocalBroker()
+        shared.shared = True
+        self.sweep(shared)
+        self.assertEqual(
+            [(t, p["attempt"]) for _, t, p in shared.events_after(0)], [("expired", self.overdue.pk)]
+        )
+
+
+class PackingTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        self.exam = Exam.objects.create(battery=battery, title="Exam")
+        self.mcq = MCQQuestion.objects.create(exam=self.exam, question_text="Pick")
+        self.wrong, self.right = (
+            MCQChoice.objects.create(question=self.mcq, choice_text=t, is_correct=t == "b") for t in "ab"
+        )
+        scale = LikertScale.objects.create(name="S")
+        self.likert = LikertQuestion.objects.create(exam=self.exam, text="Agree?", scale=scale)
+        self.attempt = ExamAttempt.objects.create(
+            examinee=make_examinee(battery), exam=self.exam, status="submitted",
+        )
+
+    def answer(self, question, kind, **values):
+        return Answer.objects.create(
+            attempt=self.attempt, examinee=self.attempt.examinee, exam=self.exam,
+            item=Item.objects.get(kind=kind, source_id=question.pk), **values,
+        )
+
+    def test_choice_edits_do_not_reinterpret_stored_vectors(self):
+        self.answer(self.mcq, Item.MCQ, mcq_choice_id=self.right.pk, raw_value=str(self.right.pk))
+        packed = pack_attempt(self.attempt.pk)
+        self.assertEqual(list(vector(packed)), [0, 2])  # Likert #1 sorts before MCQ #1
+
+        self.wrong.delete()  # "b" would now be choice 1 of the question
+        MCQChoice.objects.create(question=self.mcq, choice_text="c")
+        self.assertNotEqual(compile_layout(self.exam.pk).pk, packed.layout_id)
+        self.assertEqual(list(mcq_key(packed.layout)), [0, 2])
+
+    def test_prune_keeps_answers_the_vector_could_not_encode(self):
+        self.answer(self.mcq, Item.MCQ, mcq_choice_id=self.right.pk, raw_value=str(self.right.pk))
+        kept = self.answer(self.likert, Item.LIKERT, likert_value=300, raw_value="300")
+        pack_attempt(self.attempt.pk)
+
+        call_command("pack_responses", "--prune", "--keep-days", "-1", stdout=StringIO())
+        self.assertEqual(list(Answer.objects.values_list("id", flat=True)), [kept.pk])
+        self.assertEqual(answered_counts([self.attempt.pk]), {self.attempt.pk: 2})
+
+
+class SaveAnswerExamTests(TestCase):
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        self.exam, other = (Exam.objects.create(battery=battery, title=t) for t in ("Exam", "Other"))
+        self.foreign = MCQQuestion.objects.create(exam=other, question_text="Elsewhere?")
+        choice = MCQChoice.objects.create(question=self.foreign, choice_text="a", is_correct=True)
+        examinee = make_examinee(battery)
+        self.attempt = ExamAttempt.objects.create(examinee=examinee, exam=self.exam)
+        session = self.client.session
+        session["examinee_id"] = examinee.pk
+        session.save()
+        self.body = {
+            "attempt_id": self.attempt.pk, "exam_id": other.pk, "question_id": self.foreign.pk,
+            "qtype": "mcqquestion", "value": str(choice.pk),
+        }
+
+    def test_exam_id_must_match_the_attempt(self):
+        for name in ("responses_save_answer", "responses_save_answer_async"):
+            with self.subTest(name):
+                response = self.client.post(reverse(name), self.body, content_type="application/json")
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(Answer.objects.exists())
+
+
+class AnswerFixtureMixin:
+    def setUp(self):
+        battery = TestBattery.objects.create(name="Battery")
+        self.exam = Exam.objects.create(battery=battery, title="Exam")
+        self.attempt = ExamAttempt.objects.create(examinee=make_examinee(battery), exam=self.exam)
+        self.items = [
+            Item.objects.get(kind=Item.MCQ, source_id=MCQQuestion.objects.create(exam=self.exam, question_text=t).pk)
+            for t in ("Q1", "Q2", "Q3")
+        ]
+
+    def write(self, item, raw, **kwargs):
+        return write_answer(self.attempt, self.exam.pk, item.pk, "mcqquestion", raw, **kwargs)
+
+
+class WriteAnswerTests(AnswerFixtureMixin, TestCase):
+    def test_unchanged_value_writes_nothing(self):
+        self.assertEqual(self.write(self.items[0], "1"), SAVED)
+        stamp = Answer.objects.values_list("updated_at", flat=True).get()
+        self.assertEqual(self.write(self.items[0], "1"), UNCHANGED)
+        self.assertEqual(self.write(self.items[0], "2"), SAVED)
+        answer = Answer.objects.get()
+        self.assertEqual((answer.raw_value, answer.mcq_choice_id), ("2", 2))
+        self.assertGreaterEqual(answer.updated_at, stamp)
+
+    def test_client_seq_rejects_stale_and_repeated_writes(self):
+        self.assertEqual(self.write(self.items[0], "1", seq=2), SAVED)
+        self.assertEqual(self.write(self.items[0], "3", seq=1), STALE)
+        self.assertEqual(self.write(self.items[0], "3", seq=2), STALE)
+        self.assertEqual(self.write(self.items[0], "4", seq=3), SAVED)
+        self.assertEqual(Answer.objects.values_list("raw_value", "client_seq").get(), ("4", 3))
+
+    def test_idempotency_key_replays_the_first_result(self):
+        runs = []
+
+        def run():
+            runs.append(1)
+            return {"status": self.write(self.items[0], str(len(runs)))}
+
+        self.assertEqual(remember(self.attempt.pk, "k1", run), ({"status": SAVED}, False))
+        self.assertEqual(remember(self.attempt.pk, "k1", run), ({"status": SAVED}, True))
+        self.assertEqual(replayed(self.attempt.pk, "k1"), {"status": SAVED})
+        self.assertEqual((len(runs), Answer.objects.get().raw_value), (1, "1"))
+
+
+class ChangeFeedTests(AnswerFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        base = timezone.now() - timedelta(hours=1)
+        self.answers = []
+        for minutes, item in enumerate(self.items):
+            self.write(item, "1")
+            answer = Answer.objects.get(item=item)
+            Answer.objects.filter(pk=answer.pk).update(updated_at=base + timedelta(minutes=minutes))
+            answer.refresh_from_db()
+            self.answers.append(answer)
+        staff = get_user_model().objects.create_user("staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+
+    def export(self):
+        response = self.client.get(reverse("responses_export_changes"), {"consumer": "hr"})
+        return list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode("utf-8"))))
+
+    def ack(self, row):
+        return self.client.post(reverse("responses_ack_changes"), {
+            "consumer": "hr", "updated_at": row["Updated At"], "id": row["ID"],
+        })
+
+    def test_export_moves_nothing_until_acknowledged(self):
+        ids = [str(a.pk) for a in self.answers]
+        self.assertEqual([r["ID"] for r in self.export()], ids)
+        self.assertEqual([r["ID"] for r in self.export()], ids)  # a retried GET re-sends
+
+        rows = self.export()
+        self.assertEqual(self.ack(rows[1]).json(), {"consumer": "hr", "acknowledged": 2})
+        self.assertEqual([r["ID"] for r in self.export()], ids[2:])
+        self.assertEqual(ExportWatermark.objects.get(consumer="hr").rows_exported, 2)
+
+    def test_ack_never_moves_backwards(self):
+        rows = self.export()
+        self.ack(rows[2])
+        self.assertEqual(self.ack(rows[0]).json()["acknowledged"], 0)
+        self.assertEqual(self.ack(rows[2]).json()["acknowledged"], 0)
+        watermark = ExportWatermark.objects.get(consumer="hr")
+        self.assertEqual((watermark.last_id, watermark.rows_exported), (self.answers[2].pk, 3))
+        self.assertEqual(self.export(), [])
+
+    def test_ack_rejects_naive_or_future_cursors(self):
+        row = self.export()[0]
+        for updated_at in (row["Updated At"][:19], (timezone.now() + timedelta(days=1)).isoformat()):
+            with self.subTest(updated_at):
+                response = self.ack({**row, "Updated At": updated_at})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(ExportWatermark.objects.filter(consumer="hr", last_id__gt=0).exists())
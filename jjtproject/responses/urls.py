@@ -1,9 +1,17 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path("ping/", views.ping, name="responses_ping"),
     path("start/<int:exam_id>/", views.start_attempt, name="responses_start_attempt"),
     path("save/", views.save_answer, name="responses_save_answer"),
+    path("sync/", views.sync_answers, name="responses_sync_answers"),
     path("submit/<int:attempt_id>/", views.submit_attempt, name="responses_submit_attempt"),
+    # ASGI variants (same contracts as above)
+    path("async/start/<int:exam_id>/", async_views.start_attempt, name="responses_start_attempt_async"),
+    path("async/save/", async_views.save_answer, name="responses_save_answer_async"),
+    path("async/sync/", async_views.sync_answers, name="responses_sync_answers_async"),
+    path("async/submit/<int:attempt_id>/", async_views.submit_attempt, name="responses_submit_attempt_async"),
+    path("changes/export.csv", views.export_answer_changes, name="responses_export_changes"),
+    path("changes/ack/", views.acknowledge_answer_changes, name="responses_ack_changes"),
 ]
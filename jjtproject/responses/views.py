@@ -1,12 +1,35 @@
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponse
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET, require_POST
 import json
 
 from accounts.models import ExamineeAccount
+from exams.catalog import resolve_item_id
 from exams.models import Exam
-from .models import ExamAttempt, Answer
+from .models import ExamAttempt
+from .changefeed import ChangeFeed, acknowledge, iter_csv
+from .sync import apply_batch, parse_batch
+from .writes import idempotency_key, remember, replayed, save_answer_result
+
+
+REQUIRED_ANSWER_FIELDS = ("attempt_id", "exam_id", "question_id", "qtype", "value")
+
+
+def parse_seq(data):
+    """Optional client sequence number of a single answer write; raises ValueError."""
+    seq = data.get("seq")
+    if seq is None:
+        return None
+    seq = int(seq)
+    if seq < 1:
+        raise ValueError
+    return seq
 
 
 def ping(request):
@@ -42,8 +65,11 @@ def save_answer(request):
       "exam_id": int,
       "question_id": int,
       "qtype": "mcqquestion"|"likertquestion"|"truefalsequestion"|"essayquestion",
-      "value": "raw string value"  # choice id / "True"/"False" / "1"-"5" / essay text
+      "value": "raw string value",  # choice id / "True"/"False" / "1"-"5" / essay text
+      "seq": int,                   # optional: client sequence number, stale writes are ignored
+      "idempotency_key": str        # optional (or the Idempotency-Key header): retries are replayed
     }
+    Responds {"status": "saved"|"unchanged"|"stale", "answer_id": int}.
     """
     if request.method != "POST":
         return HttpResponseNotAllowed(["POST"])
@@ -53,56 +79,80 @@ def save_answer(request):
     except json.JSONDecodeError:
         return HttpResponseBadRequest("Invalid JSON")
 
-    required = ("attempt_id", "exam_id", "question_id", "qtype", "value")
-    if not all(k in data for k in required):
+    if not all(k in data for k in REQUIRED_ANSWER_FIELDS):
         return HttpResponseBadRequest("Missing fields")
+    try:
+        seq = parse_seq(data)
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("Invalid seq")
 
-    attempt = get_object_or_404(ExamAttempt, id=data["attempt_id"])
-    exam = get_object_or_404(Exam, id=data["exam_id"])
+    # the attempt must belong to the exam named in the body, as in sync_answers
+    attempt = get_object_or_404(ExamAttempt, id=data["attempt_id"], exam_id=data["exam_id"])
 
     # auth sanity (tie to session examinee)
     examinee_id = request.session.get("examinee_id")
     if not examinee_id or attempt.examinee_id != examinee_id:
         return HttpResponseBadRequest("Invalid examinee context")
 
+    # a retry of a write that already went through: one indexed read, no write
+    key = idempotency_key(request, data)
+    done = replayed(attempt.id, key)
+    if done is not None:
+        return JsonResponse(done)
+
+    # server-side timer: nothing is written once the attempt is closed or overdue
+    if not attempt.is_open:
+        attempt.expire()
+        return JsonResponse({"status": attempt.status, "error": "Attempt is closed"}, status=409)
+
     qtype = data["qtype"]
     raw = str(data["value"])
 
-    mcq_choice_id = None
-    likert_value = None
-    truefalse_value = None
-    essay_text = None
-
-    if qtype == "mcqquestion":
-        mcq_choice_id = int(raw) if raw.isdigit() else None
-    elif qtype == "likertquestion":
-        try:
-            likert_value = int(raw)
-        except ValueError:
-            likert_value = None
-    elif qtype == "truefalsequestion":
-        truefalse_value = (raw == "True")
-    elif qtype == "essayquestion":
-        essay_text = raw
-
-    with transaction.atomic():
-        # Upsert per (attempt, question_id)
-        obj, _created = Answer.objects.update_or_create(
-            attempt=attempt,
-            question_id=int(data["question_id"]),
-            defaults={
-                "examinee_id": attempt.examinee_id,
-                "exam_id": exam.id,
-                "qtype": qtype,
-                "mcq_choice_id": mcq_choice_id,
-                "likert_value": likert_value,
-                "truefalse_value": truefalse_value,
-                "essay_text": essay_text,
-                "raw_value": raw,
-            },
-        )
-
-    return JsonResponse({"status": "saved", "answer_id": obj.id})
+    try:
+        item_id = resolve_item_id(attempt.exam_id, qtype, int(data["question_id"]))
+    except (TypeError, ValueError):
+        item_id = None
+    if item_id is None:
+        return HttpResponseBadRequest("Unknown question")
+
+    result, _replayed = remember(attempt.id, key, lambda: save_answer_result(attempt, attempt.exam_id, item_id, qtype, raw, seq))
+    return JsonResponse(result)
+
+
+@csrf_exempt
+def sync_answers(request):
+    """
+    Batched, idempotent answer sync for the offline exam client (see responses/sync.py).
+    Body JSON: {"batch_id", "attempt_id", "exam_id", "answers": [{"question_id", "qtype", "value", "seq"}]}
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+    try:
+        batch_id, attempt_id, exam_id, entries = parse_batch(data)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    attempt = get_object_or_404(ExamAttempt, id=attempt_id, exam_id=exam_id)
+    examinee_id = request.session.get("examinee_id")
+    if not examinee_id or attempt.examinee_id != examinee_id:
+        return HttpResponseBadRequest("Invalid examinee context")
+
+    # batch_id is the idempotency key: a retried batch is answered from the stored result
+    done = replayed(attempt.id, batch_id)
+    if done is not None:
+        return JsonResponse({**done, "replayed": True})
+
+    if not attempt.is_open:
+        attempt.expire()
+        return JsonResponse({"status": attempt.status, "error": "Attempt is closed"}, status=409)
+
+    result, again = remember(attempt.id, batch_id, lambda: apply_batch(attempt, exam_id, entries, batch_id))
+    return JsonResponse({**result, "replayed": True} if again else result)
 
 
 @csrf_exempt
@@ -117,5 +167,56 @@ def submit_attempt(request, attempt_id):
     if not examinee_id or examinee_id != attempt.examinee_id:
         return HttpResponseBadRequest("Invalid examinee context")
 
-    attempt.finalize()
-    return JsonResponse({"status": "submitted", "attempt_id": attempt.id})
+    if attempt.is_past_deadline():
+        attempt.expire()
+    else:
+        attempt.finalize()
+    return JsonResponse({"status": attempt.status, "attempt_id": attempt.id})
+
+
+def _consumer(data):
+    """The consumer name of a change-feed request (a slug), or None if missing/invalid."""
+    consumer = (data.get("consumer") or "").strip()
+    try:
+        validate_slug(consumer)
+    except ValidationError:
+        return None
+    return consumer if len(consumer) <= 100 else None
+
+
+@staff_member_required
+@require_GET
+def export_answer_changes(request):
+    """
+    Stream Answer rows changed since ?consumer=<slug> last acknowledged, as CSV.
+    Never moves the watermark: POST the last row's cursor to acknowledge_answer_changes.
+    """
+    consumer = _consumer(request.GET)
+    if consumer is None:
+        return HttpResponseBadRequest("consumer is required (letters, digits, - and _)")
+
+    feed = ChangeFeed(consumer)
+    response = StreamingHttpResponse(iter_csv(feed, commit=False), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="answers_changes_{consumer}.csv"'
+    return response
+
+
+@staff_member_required
+@require_POST
+def acknowledge_answer_changes(request):
+    """
+    Advance ?consumer's watermark to the last row it stored: POST consumer,
+    updated_at and id (the "Updated At" and "ID" cells of that row).
+    """
+    consumer = _consumer(request.POST)
+    if consumer is None:
+        return HttpResponseBadRequest("consumer is required (letters, digits, - and _)")
+    updated_at = parse_datetime(request.POST.get("updated_at") or "")
+    last_id = request.POST.get("id") or ""
+    if updated_at is None or timezone.is_naive(updated_at) or not last_id.isdigit():
+        return HttpResponseBadRequest("updated_at (ISO 8601 with offset) and id are required")
+    if updated_at > timezone.now():
+        return HttpResponseBadRequest("updated_at is in the future")
+
+    acked = acknowledge(consumer, updated_at, int(last_id))
+    return JsonResponse({"consumer": consumer, "acknowledged": acked})
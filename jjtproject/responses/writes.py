@@ -0,0 +1,116 @@
+# responses/writes.py
+"""
+Answer writes that are safe to retry.
+
+`write_answer` is the one write path for every answer: the JSON autosave (sync
+and async), the exam page POST and the offline batch sync. It is a conditional
+UPDATE on the (attempt, item) unique index:
+
+  * with a client sequence number: ... WHERE client_seq < seq. A stale or
+    repeated write matches no row.
+  * without one: ... WHERE raw_value <> value. Re-sending the same answer
+    matches no row.
+
+When nothing matched, an index probe tells a rejected write (the row exists)
+from a first answer, which is INSERTed; losing an INSERT race to a concurrent
+request counts as rejected. No row is loaded, and a rejected write changes
+nothing.
+
+Idempotency keys (`IdempotencyKey`) cover the whole request. `replayed` is one
+indexed read that answers a retry with the stored response. `remember`
+records the key and the response of the first run in the same transaction as
+the write.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Answer, IdempotencyKey
+
+SAVED, UNCHANGED, STALE = "saved", "unchanged", "stale"
+MAX_KEY_LENGTH = 64
+
+
+def normalize_value(qtype, raw):
+    """Split a raw submitted value into the typed Answer slot for its qtype."""
+    values = {"mcq_choice_id": None, "likert_value": None, "truefalse_value": None, "essay_text": None}
+    if qtype == "mcqquestion":
+        values["mcq_choice_id"] = int(raw) if raw.isdigit() else None
+    elif qtype == "likertquestion":
+        try:
+            values["likert_value"] = int(raw)
+        except ValueError:
+            pass
+    elif qtype == "truefalsequestion":
+        values["truefalse_value"] = (raw == "True")
+    elif qtype == "essayquestion":
+        values["essay_text"] = raw
+    return values
+
+
+def write_answer(attempt, exam_id, item_id, qtype, raw, seq=None, values=None):
+    """
+    Upsert one answer unless it is stale or unchanged; returns SAVED, UNCHANGED or STALE.
+    `values` overrides normalize_value (the exam page validates Likert values per scale).
+    """
+    fields = {**(values if values is not None else normalize_value(qtype, raw)), "raw_value": raw}
+    if seq is not None:
+        fields["client_seq"] = seq
+
+    rejected = STALE if seq is not None else UNCHANGED
+    rows = Answer.objects.filter(attempt=attempt, item_id=item_id)
+    if (rows.filter(client_seq__lt=seq) if seq is not None else rows.exclude(raw_value=raw)).update(
+        updated_at=timezone.now(), **fields
+    ):
+        return SAVED
+    if rows.exists():
+        return rejected  # a retry or an out-of-order write: one no-op UPDATE and one index probe
+    try:
+        with transaction.atomic():
+            Answer.objects.create(
+                attempt=attempt, item_id=item_id, examinee_id=attempt.examinee_id, exam_id=exam_id, **fields
+            )
+    except IntegrityError:
+        return rejected  # a concurrent request inserted it first
+    return SAVED
+
+
+def save_answer_result(attempt, exam_id, item_id, qtype, raw, seq=None):
+    """write_answer plus the row id, as the JSON autosave endpoints respond."""
+    status = write_answer(attempt, exam_id, item_id, qtype, raw, seq=seq)
+    answer_id = Answer.objects.filter(attempt=attempt, item_id=item_id).values_list("id", flat=True).first()
+    return {"status": status, "answer_id": answer_id}
+
+
+def idempotency_key(request, data):
+    """Key from the Idempotency-Key header or an "idempotency_key" body field (None if absent)."""
+    key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+    return str(key)[:MAX_KEY_LENGTH] if key else None
+
+
+def replayed(attempt_id, key):
+    """The stored response for a key that already completed, or None."""
+    if not key:
+        return None
+    return (
+        IdempotencyKey.objects.filter(attempt_id=attempt_id, key=key, response__isnull=False)
+        .values_list("response", flat=True).first()
+    )
+
+
+def remember(attempt_id, key, run):
+    """
+    Run `run()` once per (attempt, key) and store its JSON-able result. A
+    concurrent duplicate waits on the key's unique index and gets the stored
+    result. Returns (result, replayed).
+    """
+    if not key:
+        return run(), False
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                claim = IdempotencyKey.objects.create(attempt_id=attempt_id, key=key)
+        except IntegrityError:
+            return replayed(attempt_id, key), True
+        result = run()
+        IdempotencyKey.objects.filter(pk=claim.pk).update(response=result)
+    return result, False
@@ -0,0 +1,249 @@
+// static/js/exam_offline.js
+// Offline-first answer sync for the exam page.
+//
+// Every answer change is written to an IndexedDB queue (one entry per
+// attempt + question, newest value wins) with a client sequence number, then
+// synced in batches to the server's /responses/sync/ endpoint. A batch keeps
+// its batch_id across retries so the server can answer a repeat from its
+// replay store; failed syncs back off exponentially with jitter, so a room of
+// kiosks coming back online does not hammer the server at once.
+(function () {
+  "use strict";
+
+  const form = document.getElementById("exam-form");
+  if (!form || !form.dataset.syncUrl) return;
+
+  const ATTEMPT = Number(form.dataset.attemptId);
+  const EXAM = Number(form.dataset.examId);
+  const SYNC_URL = form.dataset.syncUrl;
+  const CSRF = form.querySelector("input[name=csrfmiddlewaretoken]");
+  const statusEl = document.getElementById("sync-status");
+
+  const BATCH_MAX = 200;
+  const DEBOUNCE_MS = 1500;
+  const BACKOFF_BASE_MS = 1000;
+  const BACKOFF_MAX_MS = 60000;
+  const SEQ_KEY = "exam_seq_" + ATTEMPT;
+
+  // ---------------------------------------------------------------- storage
+  // IndexedDB when available; an in-memory Map otherwise (localStorage still
+  // keeps the visible answers, only the queue is then per page load).
+  const store = (function () {
+    const memory = new Map();
+    let dbPromise = null;
+    if (window.indexedDB) {
+      dbPromise = new Promise((resolve) => {
+        const req = indexedDB.open("jjt-exam-offline", 1);
+        req.onupgradeneeded = () => {
+          const os = req.result.createObjectStore("pending", { keyPath: "key" });
+          os.createIndex("attempt", "attempt_id");
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => resolve(null);
+      });
+    }
+
+    function tx(mode, fn) {
+      return dbPromise.then((db) => {
+        if (!db) return fn(null);
+        return new Promise((resolve, reject) => {
+          const t = db.transaction("pending", mode);
+          const result = fn(t.objectStore("pending"));
+          t.oncomplete = () => resolve(result && result.result !== undefined ? result.result : result);
+          t.onerror = () => reject(t.error);
+        });
+      });
+    }
+
+    return {
+      put(entry) {
+        if (!dbPromise) { memory.set(entry.key, entry); return Promise.resolve(); }
+        return tx("readwrite", (os) => os ? os.put(entry) : memory.set(entry.key, entry));
+      },
+      all() {
+        if (!dbPromise) return Promise.resolve([...memory.values()].filter((e) => e.attempt_id === ATTEMPT));
+        return tx("readonly", (os) => os ? os.index("attempt").getAll(ATTEMPT) : null)
+          .then((rows) => rows || [...memory.values()].filter((e) => e.attempt_id === ATTEMPT));
+      },
+      // Drop entries the server acknowledged, unless they changed again since.
+      ack(sent) {
+        if (!dbPromise) {
+          sent.forEach((e) => { const cur = memory.get(e.key); if (cur && cur.seq <= e.seq) memory.delete(e.key); });
+          return Promise.resolve();
+        }
+        return tx("readwrite", (os) => {
+          if (!os) return;
+          sent.forEach((e) => {
+            const req = os.get(e.key);
+            req.onsuccess = () => { if (req.result && req.result.seq <= e.seq) os.delete(e.key); };
+          });
+        });
+      },
+      clear() {
+        return this.all().then((rows) => this.ack(rows.map((r) => ({ key: r.key, seq: Infinity }))));
+      },
+    };
+  })();
+
+  // Monotonic per attempt, and still increasing if localStorage was wiped.
+  function nextSeq() {
+    const last = Number(localStorage.getItem(SEQ_KEY) || 0);
+    const seq = Math.max(last + 1, Date.now());
+    localStorage.setItem(SEQ_KEY, String(seq));
+    return seq;
+  }
+
+  function uuid() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return "b-" + Date.now().toString(36) + "-" + Math.random().toString(36).slice(2, 12);
+  }
+
+  // ------------------------------------------------------------------ state
+  let pendingCount = 0;
+  let inFlight = null;      // {id, entries} kept across retries of the same batch
+  let failures = 0;
+  let timer = null;
+  let closed = false;
+  let busy = false;         // one request at a time per page
+
+  function showStatus(text, cls) {
+    if (!statusEl) return;
+    statusEl.textContent = text;
+    statusEl.className = "badge p-2 " + cls;
+  }
+
+  function refreshStatus() {
+    if (closed) return showStatus("Closed", "bg-secondary");
+    if (!navigator.onLine) return showStatus(`Offline · ${pendingCount} saved on this device`, "bg-warning text-dark");
+    if (pendingCount) return showStatus(`Saving… (${pendingCount})`, "bg-info text-dark");
+    showStatus("All answers saved", "bg-success");
+  }
+
+  function schedule(delay) {
+    clearTimeout(timer);
+    timer = setTimeout(flush, delay);
+  }
+
+  function backoffDelay(retryAfterSeconds) {
+    if (retryAfterSeconds) return retryAfterSeconds * 1000;
+    const exp = Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** Math.min(failures, 10));
+    return exp * (0.5 + Math.random());  // jitter spreads reconnecting clients out
+  }
+
+  // ------------------------------------------------------------------- sync
+  async function flush() {
+    if (busy) return;
+    busy = true;
+    try {
+      await sendBatch();
+    } finally {
+      busy = false;
+    }
+  }
+
+  async function sendBatch() {
+    if (closed || !navigator.onLine) return refreshStatus();
+    if (!inFlight) {
+      const rows = await store.all();
+      pendingCount = rows.length;
+      if (!rows.length) return refreshStatus();
+      rows.sort((a, b) => a.seq - b.seq);
+      inFlight = { id: uuid(), entries: rows.slice(0, BATCH_MAX) };
+    }
+    refreshStatus();
+
+    let response;
+    try {
+      response = await fetch(SYNC_URL, {
+        method: "POST",
+        credentials: "same-origin",
+        keepalive: document.visibilityState === "hidden",
+        headers: { "Content-Type": "application/json", "X-CSRFToken": CSRF ? CSRF.value : "" },
+        body: JSON.stringify({
+          batch_id: inFlight.id,
+          attempt_id: ATTEMPT,
+          exam_id: EXAM,
+          answers: inFlight.entries.map((e) => ({
+            question_id: e.question_id, qtype: e.qtype, value: e.value, seq: e.seq,
+          })),
+        }),
+      });
+    } catch (err) {
+      failures++;
+      return schedule(backoffDelay());   // network down: same batch again later
+    }
+
+    if (response.ok) {
+      await store.ack(inFlight.entries);
+      inFlight = null;
+      failures = 0;
+      const rows = await store.all();
+      pendingCount = rows.length;
+      refreshStatus();
+      if (pendingCount) schedule(0);
+      return;
+    }
+    if (response.status === 409) {      // attempt closed (submitted / time up): nothing more to send
+      closed = true;
+      inFlight = null;
+      await store.clear();
+      pendingCount = 0;
+      return refreshStatus();
+    }
+    if (response.status === 429 || response.status >= 500) {
+      failures++;
+      return schedule(backoffDelay(Number(response.headers.get("Retry-After")) || 0));
+    }
+    // Any other 4xx will not succeed on retry: drop the batch rather than loop.
+    console.error("Answer sync rejected:", response.status);
+    await store.ack(inFlight.entries);
+    inFlight = null;
+    schedule(DEBOUNCE_MS);
+  }
+
+  // -------------------------------------------------------------- capture
+  function enqueue(el) {
+    const box = el.closest(".question-box");
+    const qid = Number((el.name.split("_")[1] || "").trim());
+    if (!box || !qid) return;
+    const qtype = box.dataset.qtype;
+    const entry = {
+      key: `${ATTEMPT}:${qtype}:${qid}`,
+      attempt_id: ATTEMPT,
+      exam_id: EXAM,
+      question_id: qid,
+      qtype: qtype,
+      value: el.value,
+      seq: nextSeq(),
+    };
+    store.put(entry).then(() => store.all()).then((rows) => {
+      pendingCount = rows.length;
+      refreshStatus();
+      schedule(DEBOUNCE_MS);
+    });
+  }
+
+  form.addEventListener("change", (e) => {
+    if (e.target.matches("input[type=radio]") && e.target.checked) enqueue(e.target);
+  });
+  form.addEventListener("input", (e) => {
+    if (e.target.matches("textarea")) enqueue(e.target);
+  });
+
+  // Offline submit would lose the page: hold it until the connection is back.
+  form.addEventListener("submit", (e) => {
+    if (navigator.onLine) return;
+    e.preventDefault();
+    showStatus("Offline · will submit when the connection returns", "bg-warning text-dark");
+    window.addEventListener("online", () => flush().finally(() => form.submit()), { once: true });
+  });
+
+  window.addEventListener("online", () => { failures = 0; schedule(0); });
+  window.addEventListener("offline", refreshStatus);
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "hidden") flush();
+  });
+  setInterval(() => { if (pendingCount) flush(); }, 30000);
+
+  store.all().then((rows) => { pendingCount = rows.length; refreshStatus(); if (rows.length) schedule(0); });
+})();